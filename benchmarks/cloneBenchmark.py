@@ -0,0 +1,79 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Measures how many sprites per second clone() and delete() can turn over, like the shots and asteroids in
+examples/Asteroids.cds, with and without the SpritePool recycling deleted clones, for growing numbers of other
+objects on the card.  Each step clones the template object and deletes the oldest live clone, keeping a fixed number
+of clones alive.  Everything runs on the main thread here, so this measures the runner thread's model work and the
+main thread's view work together.
+
+Needs wxPython and a display.  Run from the repo root:  python benchmarks/cloneBenchmark.py [--clones N] [--live N]
+"""
+
+import os
+import sys
+import argparse
+from collections import deque
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cardstock"))
+import wx
+from stackManager import StackManager
+
+
+def MakeStack(frame, numOthers):
+    sm = StackManager(frame, False)
+    sm.LoadCardAtIndex(0)
+    card = sm.uiCard.model.GetProxy()
+    for i in range(numOthers):
+        card.add_rectangle(name="wall", center=(20 + (i * 7) % 460, 20 + (i * 13) % 460), size=(10, 10))
+    template = card.add_oval(name="asteroid", center=(250, 250), size=(40, 40), fill_color="gray")
+    template.speed = (30, 20)
+    return sm, template
+
+
+def RunClones(frame, numOthers, numClones, numLive, usePool):
+    sm, template = MakeStack(frame, numOthers)
+    if not usePool:
+        sm.spritePool.MAX_PER_TEMPLATE = 0
+    live = deque()
+    start = perf_counter()
+    for i in range(numClones):
+        live.append(template.clone(center=(i % 500, (i * 3) % 500)))
+        if len(live) > numLive:
+            live.popleft().delete()
+    elapsed = perf_counter() - start
+    stats = sm.spritePool.GetStats()
+    view = sm.view
+    sm.SetDown()
+    view.Destroy()
+    return numClones / elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clone() and delete() throughput.")
+    parser.add_argument("--clones", type=int, default=2000, help="clones to make for each measurement")
+    parser.add_argument("--live", type=int, default=20, help="clones to keep alive at once")
+    args = parser.parse_args()
+
+    app = wx.App(False)
+    frame = wx.Frame(None, size=(500, 500))
+
+    print(f"{'others':>7} {'no pool (clones/s)':>19} {'pooled (clones/s)':>18} {'reused':>7}")
+    for numOthers in (0, 100, 500, 1000):
+        plainRate, plainStats = RunClones(frame, numOthers, args.clones, args.live, False)
+        pooledRate, pooledStats = RunClones(frame, numOthers, args.clones, args.live, True)
+        print(f"{numOthers:>7} {plainRate:>19.0f} {pooledRate:>18.0f} {pooledStats['reused']:>7}")
+
+    frame.Destroy()
+    app.Destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Measures the per-frame cost of bounce detection for growing numbers of moving objects, that are all set to bounce
+off of each other, comparing checking every pair against using the SpatialHash broad phase.  This first times the
+geometry alone, on synthetic boxes, and then times whole frames of UiView.FindCollisions() and PerformBounce(), for
+ovals on a real card that all have each other as bounce objects.
+
+The FindCollisions() part needs wxPython and a display.
+Run from the repo root:  python benchmarks/collisionBenchmark.py [--frames N] [--brute-max N]
+"""
+
+import os
+import sys
+import math
+import random
+import argparse
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cardstock"))
+import collisionGeometry
+
+
+OBJECT_SIZE = 20
+DENSITY = 0.05  # Fraction of the card covered by objects, so crowding stays the same as the count grows
+FRAME_TIME = 1/60
+
+
+class Ball(object):
+    def __init__(self, cardSize):
+        self.pos = [random.uniform(0, cardSize - OBJECT_SIZE), random.uniform(0, cardSize - OBJECT_SIZE)]
+        angle = random.uniform(0, 2 * math.pi)
+        self.speed = (math.cos(angle) * 200, math.sin(angle) * 200)
+        self.rotation = random.uniform(0, 360)
+        self.polygons = None
+
+    def Move(self, cardSize):
+        for i in (0, 1):
+            self.pos[i] += self.speed[i] * FRAME_TIME
+            if self.pos[i] < 0 or self.pos[i] > cardSize - OBJECT_SIZE:
+                self.speed = tuple(-s if j == i else s for j, s in enumerate(self.speed))
+        self.polygons = None
+
+    def GetPolygons(self):
+        if self.polygons is None:
+            aff = collisionGeometry.Transform()
+            aff.Translate(self.pos[0] + OBJECT_SIZE/2, self.pos[1] + OBJECT_SIZE/2)
+            aff.Rotate(math.radians(-self.rotation))
+            aff.Translate(-OBJECT_SIZE/2, -OBJECT_SIZE/2)
+            self.polygons = [collisionGeometry.ConvexPolygon(aff.TransformPoints(
+                collisionGeometry.RectPoints(0, 0, OBJECT_SIZE, OBJECT_SIZE)))]
+        return self.polygons
+
+    def GetBounds(self):
+        bounds = collisionGeometry.PolygonsBounds(self.GetPolygons())
+        margin = max(abs(self.speed[0]), abs(self.speed[1])) * FRAME_TIME * 2 + 2
+        return (bounds[0]-margin, bounds[1]-margin, bounds[2]+margin, bounds[3]+margin)
+
+
+def MakeBalls(count):
+    cardSize = int(math.sqrt(count * OBJECT_SIZE * OBJECT_SIZE / DENSITY))
+    random.seed(count)
+    return cardSize, [Ball(cardSize) for i in range(count)]
+
+
+def RunBruteForce(count, frames):
+    cardSize, balls = MakeBalls(count)
+    hits = 0
+    start = perf_counter()
+    for f in range(frames):
+        for b in balls:
+            b.Move(cardSize)
+        for b in balls:
+            polys = b.GetPolygons()
+            for o in balls:
+                if o is not b and collisionGeometry.PolygonsIntersect(polys, o.GetPolygons()):
+                    hits += 1
+    return (perf_counter() - start) / frames, hits
+
+
+def RunSpatialHash(count, frames):
+    cardSize, balls = MakeBalls(count)
+    index = collisionGeometry.SpatialHash()
+    for b in balls:
+        index.Track(b)
+    hits = 0
+    start = perf_counter()
+    for f in range(frames):
+        for b in balls:
+            b.Move(cardSize)
+            index.MarkDirty(b)
+        index.ProcessUpdates(Ball.GetBounds)
+        for b in balls:
+            polys = b.GetPolygons()
+            for o in index.Query(b):
+                if collisionGeometry.PolygonsIntersect(polys, o.GetPolygons()):
+                    hits += 1
+    return (perf_counter() - start) / frames, hits
+
+
+class AllPairsIndex(collisionGeometry.SpatialHash):
+    """ A stand-in for the StackManager's collisionIndex that skips the broad phase, so every pair gets checked """
+
+    def Query(self, key):
+        nearby = set(self.GetTrackedKeys())
+        nearby.discard(key)
+        return nearby
+
+
+def MakeBounceCard(frame, count, useIndex):
+    from stackManager import StackManager
+    cardSize = int(math.sqrt(count * OBJECT_SIZE * OBJECT_SIZE / DENSITY))
+    random.seed(count)
+    sm = StackManager(frame, False)
+    if not useIndex:
+        sm.collisionIndex = AllPairsIndex()
+    sm.stackModel.SetProperty("size", (cardSize, cardSize))
+    sm.LoadCardAtIndex(0)
+    card = sm.uiCard.model.GetProxy()
+    objs = []
+    for i in range(count):
+        obj = card.add_oval(name="ball", size=(OBJECT_SIZE, OBJECT_SIZE),
+                            center=(random.uniform(OBJECT_SIZE, cardSize - OBJECT_SIZE),
+                                    random.uniform(OBJECT_SIZE, cardSize - OBJECT_SIZE)))
+        angle = random.uniform(0, 2 * math.pi)
+        obj.speed = (math.cos(angle) * 200, math.sin(angle) * 200)
+        objs.append(obj)
+    for obj in objs:
+        obj.set_bounce_objects(objs)
+    return sm, cardSize, objs
+
+
+def RunBounceFrame(sm, cardSize, objs):
+    # Move everything, wrapping around the card's edges, and then run the collision part of
+    # StackManager.OnPeriodicTimer()
+    for obj in objs:
+        (x, y) = obj.center
+        speed = obj.speed
+        obj.center = ((x + speed[0] * FRAME_TIME) % cardSize, (y + speed[1] * FRAME_TIME) % cardSize)
+    sm.collisionIndex.ProcessUpdates(lambda m: sm.GetCollisionBounds(m, FRAME_TIME))
+    collisions = {}
+    for obj in objs:
+        sm.GetUiViewByModel(obj._model).FindCollisions(collisions)
+    for v in collisions.values():
+        v[0].PerformBounce(v, FRAME_TIME)
+    return len(collisions)
+
+
+def RunFindCollisions(frame, count, frames, useIndex):
+    sm, cardSize, objs = MakeBounceCard(frame, count, useIndex)
+    RunBounceFrame(sm, cardSize, objs)  # Let every pair work out whether it's inside or outside
+    bounces = 0
+    start = perf_counter()
+    for f in range(frames):
+        bounces += RunBounceFrame(sm, cardSize, objs)
+    elapsed = (perf_counter() - start) / frames
+    view = sm.view
+    sm.SetDown()
+    view.Destroy()
+    return elapsed, bounces
+
+
+def RunFindCollisionsTable(frames, bruteMax):
+    try:
+        import wx
+    except ImportError:
+        print("wxPython isn't installed, so skipping the FindCollisions() measurements")
+        return
+    app = wx.App(False)
+    frame = wx.Frame(None, size=(500, 500))
+
+    print(f"{'objects':>8} {'all pairs (ms)':>15} {'bounces':>8} {'spatial hash (ms)':>18} {'bounces':>8}")
+    for count in (10, 50, 100, 250, 500):
+        hashTime, hashBounces = RunFindCollisions(frame, count, frames, True)
+        if count <= bruteMax:
+            bruteTime, bruteBounces = RunFindCollisions(frame, count, frames, False)
+            bruteStr = f"{bruteTime*1000:.2f}"
+        else:
+            bruteStr, bruteBounces = "-", "-"
+        print(f"{count:>8} {bruteStr:>15} {bruteBounces:>8} {hashTime*1000:>18.2f} {hashBounces:>8}")
+
+    frame.Destroy()
+    app.Destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bounce detection frame times.")
+    parser.add_argument("--frames", type=int, default=20, help="frames to average over")
+    parser.add_argument("--brute-max", type=int, default=500, help="largest object count to run without the broad phase")
+    args = parser.parse_args()
+
+    print(f"{'objects':>8} {'all pairs (ms)':>15} {'spatial hash (ms)':>18}")
+    for count in (10, 50, 100, 250, 500, 1000, 2000):
+        hashTime, hashHits = RunSpatialHash(count, args.frames)
+        if count <= args.brute_max:
+            bruteTime, bruteHits = RunBruteForce(count, args.frames)
+            assert bruteHits == hashHits, "broad phase missed collisions"
+            bruteStr = f"{bruteTime*1000:.2f}"
+        else:
+            bruteStr = "-"
+        print(f"{count:>8} {bruteStr:>15} {hashTime*1000:>18.2f}")
+
+    print()
+    print("Bounce frames through UiView.FindCollisions():")
+    RunFindCollisionsTable(args.frames, args.brute_max)
+
+
+if __name__ == "__main__":
+    main()
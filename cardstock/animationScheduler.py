@@ -0,0 +1,109 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import heapq
+import threading
+from time import time
+
+
+class AnimationScheduler(object):
+    """
+    Keeps track of which objects are moving or animating, so each frame only needs to visit those objects, instead of
+    every object on the card.  Models add themselves when they get a non-zero speed or a new animation, and are dropped
+    once they're idle again.
+    Running animations are also kept in a heap, keyed by their completion time, so finishing them doesn't require
+    checking every animation on every frame.
+    """
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.lock = threading.Lock()
+        self.activeModels = {}   # Insertion-ordered set of models that are moving or animating
+        self.heap = []           # (endTime, seq, model, key, animDict)
+        self.seq = 0
+
+    def Clear(self):
+        with self.lock:
+            self.activeModels = {}
+            self.heap = []
+
+    def GetActiveCount(self):
+        return len(self.activeModels)
+
+    def GetPendingCount(self):
+        return len(self.heap)
+
+    def Activate(self, model):
+        # On Runner or Main thread
+        with self.lock:
+            self.activeModels[model] = None
+
+    def AnimationStarted(self, model, key, animDict):
+        # On Runner or Main thread, called with the model's animLock held
+        with self.lock:
+            self.seq += 1
+            heapq.heappush(self.heap, (animDict["startTime"] + animDict["duration"], self.seq, model, key, animDict))
+            self.activeModels[model] = None
+
+    def RunFrame(self, onFinishedCalls, elapsed_time):
+        # On Main thread.  Move and animate all active objects on the current card, and queue up calls to finish any
+        # animations that are done into onFinishedCalls.  Returns True if anything changed.
+        didRun = False
+        now = time()
+        stackManager = self.stackManager
+
+        with self.lock:
+            models = list(self.activeModels)
+            due = []
+            while self.heap and self.heap[0][0] <= now:
+                due.append(heapq.heappop(self.heap))
+
+        for model in models:
+            ui = stackManager.GetUiViewByModel(model)
+            if ui and ui.RunAnimations(elapsed_time, now):
+                didRun = True
+
+        offCard = []
+        for entry in due:
+            (endTime, seq, model, key, animDict) = entry
+            with model.animLock:
+                animList = model.animations.get(key)
+                if not animList or animList[0] is not animDict:
+                    # This animation was stopped or replaced since it started
+                    continue
+            if not stackManager.GetUiViewByModel(model):
+                # Don't finish animations on other cards until they're shown again
+                offCard.append(entry)
+                continue
+            if animDict["onUpdate"]:
+                animDict["onUpdate"](1.0, animDict)
+                didRun = True
+            def deferFinish(model, key):
+                def f(): model.FinishAnimation(key)
+                return f
+            onFinishedCalls.append(deferFinish(model, key))
+
+        with self.lock:
+            for entry in offCard:
+                heapq.heappush(self.heap, entry)
+            # Drop objects that have stopped moving and animating
+            for model in models:
+                if model.didSetDown or (not model.animations and tuple(model.properties["speed"]) == (0, 0)):
+                    self.activeModels.pop(model, None)
+        return didRun
+
+    def GetMovingUiViews(self):
+        # On Main thread.  Returns the UiViews on the current card for all objects with a non-zero speed.
+        uiViews = []
+        for model in list(self.activeModels):
+            if tuple(model.properties["speed"]) != (0, 0):
+                ui = self.stackManager.GetUiViewByModel(model)
+                if ui:
+                    uiViews.append(ui)
+        return uiViews
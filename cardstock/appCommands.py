@@ -220,12 +220,14 @@ class ReorderCardCommand(Command):
     def Do(self):
         cardList = self.stackManager.stackModel.childModels
         cardList.insert(self.newIndex, cardList.pop(self.cardIndex))
+        self.stackManager.stackModel.InvalidateChildIndex()
         self.stackManager.LoadCardAtIndex(self.newIndex)
         return True
 
     def Undo(self):
         cardList = self.stackManager.stackModel.childModels
         cardList.insert(self.cardIndex, cardList.pop(self.newIndex))
+        self.stackManager.stackModel.InvalidateChildIndex()
         self.stackManager.LoadCardAtIndex(self.cardIndex)
         return True
 
@@ -0,0 +1,157 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import re
+import wx
+from collections import deque
+from time import perf_counter
+import flippedGCDC
+from uiImage import UiImage
+from uiTextLabel import UiTextLabel
+
+
+class CardPrefetcher(object):
+    """
+    While running a stack, warms the caches for the cards the user is likely to go to next, so that flipping to them
+    doesn't stall.  After each card change, this queues up the adjacent cards, and any cards named in literal
+    goto_card() calls in the current card's handlers.  Then on idle frames, it starts decoding their images, and the
+    sounds named in literal play_sound() calls, in the background, and measures their text labels into the
+    TextLayoutCache.
+    Work is limited to frameBudget seconds per idle frame, and stops requesting images once the image cache is
+    maxImageFraction full, so prefetching never evicts images that are in use.
+    """
+
+    MAX_CARDS = 4               # Cards to warm after each card change
+    FRAME_BUDGET = 0.004        # Seconds of work per idle frame
+    MAX_IMAGE_FRACTION = 0.75   # Don't fill the image cache past this fraction of its budget
+    MAX_SOUND_BYTES = 32 * 1024 * 1024
+
+    gotoNameRe = re.compile(r'goto_card\(\s*(["\'])(.+?)\1\s*\)')
+    gotoNumberRe = re.compile(r'goto_card\(\s*(\d+)\s*\)')
+    soundRe = re.compile(r'play_sound\(\s*(["\'])(.+?)\1\s*\)')
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.maxCards = self.MAX_CARDS
+        self.frameBudget = self.FRAME_BUDGET
+        self.maxImageFraction = self.MAX_IMAGE_FRACTION
+        self.maxSoundBytes = self.MAX_SOUND_BYTES
+        self.tasks = deque()      # (method, arg) pairs
+        self.measureDC = None
+        self.measureGC = None
+        self.numCards = 0
+        self.numImages = 0
+        self.numSounds = 0
+        self.numLabels = 0
+
+    def Clear(self):
+        self.tasks.clear()
+        self.measureGC = None
+        if self.measureDC:
+            self.measureDC.SelectObject(wx.NullBitmap)
+            self.measureDC = None
+
+    def OnCardShown(self, cardIndex):
+        # On Main thread, after a card is loaded while running
+        self.tasks.clear()
+        cardModels = self.stackManager.stackModel.childModels
+        numCards = len(cardModels)
+        if numCards < 2:
+            return
+
+        current = cardModels[cardIndex]
+        targets = [cardModels[(cardIndex + 1) % numCards], cardModels[(cardIndex - 1) % numCards]]
+        targets.extend(self.FindGotoTargets(current))
+
+        seen = {current}
+        for model in targets:
+            if model not in seen:
+                seen.add(model)
+                self.tasks.append((self.WarmCard, model))
+                if len(seen) > self.maxCards:
+                    break
+
+    def FindGotoTargets(self, cardModel):
+        # Find the cards named in literal goto_card("name") and goto_card(number) calls in this card's handlers
+        cardModels = self.stackManager.stackModel.childModels
+        names = {m.GetProperty("name"): m for m in cardModels}
+        targets = []
+        for model in [cardModel] + cardModel.GetAllChildModels():
+            for code in model.handlers.values():
+                if "goto_card" not in code:
+                    continue
+                for match in self.gotoNameRe.finditer(code):
+                    if match.group(2) in names:
+                        targets.append(names[match.group(2)])
+                for match in self.gotoNumberRe.finditer(code):
+                    index = int(match.group(1)) - 1
+                    if 0 <= index < len(cardModels):
+                        targets.append(cardModels[index])
+        return targets
+
+    def OnIdleFrame(self):
+        # On Main thread, from the periodic timer, on frames with nothing else to do
+        if not self.tasks:
+            return
+        deadline = perf_counter() + self.frameBudget
+        while self.tasks and perf_counter() < deadline:
+            (method, arg) = self.tasks.popleft()
+            method(arg)
+
+    def WarmCard(self, cardModel):
+        # Queue up the work for each of this card's objects, ahead of the remaining cards
+        tasks = []
+        for model in [cardModel] + cardModel.GetAllChildModels():
+            if model.type == "image":
+                tasks.append((self.WarmImage, model))
+            elif model.type == "textlabel":
+                tasks.append((self.WarmTextLabel, model))
+            for code in model.handlers.values():
+                if "play_sound" in code:
+                    for match in self.soundRe.finditer(code):
+                        tasks.append((self.WarmSound, match.group(2)))
+        self.tasks.extendleft(reversed(tasks))
+        self.numCards += 1
+
+    def WarmImage(self, model):
+        cache = UiImage.imgCache
+        if cache.numBytes > cache.maxBytes * self.maxImageFraction:
+            return
+        path = self.stackManager.resPathMan.GetAbsPath(model.GetProperty("file"))
+        if path:
+            cache.Get(path)
+            self.numImages += 1
+
+    def WarmSound(self, path):
+        # Sounds get decoded on the runner's soundLoader thread, so this only queues them up
+        runner = self.stackManager.runner
+        if runner and runner.GetSoundCacheBytes() < self.maxSoundBytes:
+            runner.PreloadSound(path)
+            self.numSounds += 1
+
+    def WarmTextLabel(self, model):
+        # Lay out the label's text, using a throwaway UiTextLabel that isn't on the card
+        ui = UiTextLabel(None, self.stackManager, model)
+        ui.LayoutText(self.GetMeasureGC())
+        self.numLabels += 1
+
+    def GetMeasureGC(self):
+        if not self.measureGC:
+            self.measureDC = wx.MemoryDC(wx.Bitmap(1, 1))
+            self.measureGC = flippedGCDC.FlippedGCDC(self.measureDC, self.stackManager)
+        return self.measureGC
+
+    def GetStats(self):
+        runner = self.stackManager.runner
+        return {"queued": len(self.tasks),
+                "cards": self.numCards,
+                "images": self.numImages,
+                "sounds": self.numSounds,
+                "sound_bytes": runner.GetSoundCacheBytes() if runner else 0,
+                "labels": self.numLabels}
@@ -14,6 +14,8 @@ http://tomerfiliba.com/recipes/Thread2/
 import threading
 import inspect
 import queue
+import sys
+from time import time
 from wx import CallAfter
 import ctypes
 
@@ -39,7 +41,7 @@ def _async_raise(tid, exctype):
 class CodeRunnerThread(threading.Thread):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.returnQueue = queue.Queue()
+        self.dispatcher = MainThreadDispatcher(self)
         self.is_terminated = False
 
     def _get_my_tid(self):
@@ -71,14 +73,155 @@ class CodeRunnerThread(threading.Thread):
         """raises SystemExit in the context of the given thread, which should
         cause the thread to exit silently (unless caught)"""
         self.is_terminated = True
-        self.returnQueue.put(None) # Stop waiting for any currently running main-thread task
+        self.dispatcher.CancelPending() # Stop waiting for any currently running main-thread task
         self.raise_exc(SystemExit)
-        self.returnQueue.put(None) # Stop waiting for any currently running main-thread task
+        self.dispatcher.CancelPending() # Stop waiting for any currently running main-thread task
+
+
+# -----------------------------------------
+# Batch up all of the runnerThread's calls to the main thread, so that the main thread can run everything pending in
+# a single wx.CallAfter() event loop hop.
+
+class MainThreadFuture(object):
+    """ The result of a main thread call, which the runnerThread waits on. """
+
+    def __init__(self):
+        super().__init__()
+        self.event = threading.Event()
+        self.value = None
+
+    def SetResult(self, value):
+        if not self.event.is_set():
+            self.value = value
+            self.event.set()
+
+    def Result(self):
+        self.event.wait()
+        return self.value
+
+
+class MainThreadDispatcher(object):
+    """
+    Queues up main thread work items from the runnerThread, made through @RunOnMainSync and @RunOnMainAsync calls, and
+    drains all pending items on the main thread in one wx.CallAfter() hop.  Async calls made before a hop runs are
+    coalesced into it.  A hop only runs the items that were already queued when it started, and never waits on the
+    runnerThread, so items that arrive later get a new hop, after the main event loop has had a turn.  We also count
+    hops per frame, and their latency.
+    """
+
+    MAX_DRAIN_TIME = 0.010   # Yield back to the main event loop at least this often
+
+    def __init__(self, thread):
+        super().__init__()
+        self.thread = thread
+        self.items = queue.Queue()
+        self.lock = threading.Lock()
+        self.isDrainScheduled = False
+        self.scheduleTime = None
+        self.pendingFuture = None
+
+        self.numHops = 0
+        self.numItems = 0
+        self.numSyncCalls = 0
+        self.numFrameHops = 0
+        self.lastFrameHops = 0
+        self.maxFrameHops = 0
+        self.totalHopLatency = 0.0
+        self.maxHopLatency = 0.0
+        self.syncWaitTime = 0.0
+
+    def RunAsync(self, func, args, kwargs):
+        # On runnerThread
+        self.Put((func, args, kwargs, None))
+
+    def RunSync(self, func, args, kwargs):
+        # On runnerThread.  Wait for the main thread to run func, and return its result.
+        startTime = time()
+        future = MainThreadFuture()
+        self.pendingFuture = future
+        self.Put((func, args, kwargs, future))
+        ret = future.Result()
+        self.pendingFuture = None
+        self.numSyncCalls += 1
+        self.syncWaitTime += time() - startTime
+        return ret
+
+    def CancelPending(self):
+        future = self.pendingFuture
+        if future:
+            future.SetResult(None)
+
+    def Put(self, item):
+        self.items.put(item)
+        with self.lock:
+            if self.isDrainScheduled:
+                return
+            self.isDrainScheduled = True
+            self.scheduleTime = time()
+        CallAfter(self.Drain)
+
+    def Drain(self):
+        # On main thread.  Run the items that are already pending, and leave any later ones to a new hop.
+        startTime = time()
+        latency = startTime - self.scheduleTime
+        self.numHops += 1
+        self.numFrameHops += 1
+        self.totalHopLatency += latency
+        self.maxHopLatency = max(self.maxHopLatency, latency)
+
+        count = self.items.qsize()
+        while count > 0 and time() - startTime <= self.MAX_DRAIN_TIME:
+            try:
+                item = self.items.get_nowait()
+            except queue.Empty:
+                break
+            self.RunItem(*item)
+            count -= 1
+
+        # Let the main event loop run, and pick up any remaining items in a new hop
+        with self.lock:
+            if self.items.empty():
+                self.isDrainScheduled = False
+                return
+            self.scheduleTime = time()
+        CallAfter(self.Drain)
+
+    def RunItem(self, func, args, kwargs, future):
+        # On main thread
+        self.numItems += 1
+        if self.thread.is_terminated:
+            if future:
+                future.SetResult(None)  # send empty return value to calling thread
+            return
+        try:
+            ret = func(*args, **kwargs)
+            if future:
+                future.SetResult(ret)  # send return value to calling thread
+        except Exception:
+            if future:
+                future.SetResult(None)  # send empty return value to calling thread
+            sys.excepthook(*sys.exc_info())
+
+    def OnFrame(self):
+        # On main thread, once per frame
+        self.lastFrameHops = self.numFrameHops
+        self.maxFrameHops = max(self.maxFrameHops, self.numFrameHops)
+        self.numFrameHops = 0
+
+    def GetStats(self):
+        return {"hops": self.numHops,
+                "items": self.numItems,
+                "sync_calls": self.numSyncCalls,
+                "last_frame_hops": self.lastFrameHops,
+                "max_frame_hops": self.maxFrameHops,
+                "avg_hop_latency": self.totalHopLatency / self.numHops if self.numHops else 0.0,
+                "max_hop_latency": self.maxHopLatency,
+                "sync_wait_time": self.syncWaitTime}
 
 
 # -----------------------------------------
 # Build the @RunOnMainSync decorator, to run the function on the Main thread, and make the runnerThread wait for the
-# return value, passed back through a queue
+# return value, passed back through a MainThreadFuture
 
 def to_main_sync(func, *args, **kwargs):
     """Run a function on the main thread, and await its return value so we can return it on the calling thread"""
@@ -90,25 +233,10 @@ def to_main_sync(func, *args, **kwargs):
         thread = threading.current_thread()
         # no more to_main calls once we're terminated
         if not thread.is_terminated:
-            CallAfter(to_main_sync_helper, thread, func, *args, **kwargs)
-            ret = thread.returnQueue.get() # wait for return value
-            return ret
+            return thread.dispatcher.RunSync(func, args, kwargs) # wait for return value
         return None
 
 
-def to_main_sync_helper(thread, func, *args, **kwargs):
-    # On main thread
-    if not thread.is_terminated:
-        try:
-            ret = func(*args, **kwargs)
-            thread.returnQueue.put(ret) # send return value to calling thread
-        except Exception as e:
-            thread.returnQueue.put(None) # send empty return value to calling thread
-            raise e
-    else:
-        thread.returnQueue.put(None) # send empty return value to calling thread
-
-
 def RunOnMainSync(func):
     """ Used as a decorator, to make Proxy object functions run on the main thread. """
     def wrapper_run_on_main(*args, **kwargs):
@@ -118,11 +246,11 @@ def RunOnMainSync(func):
 
 # -----------------------------------------
 # Build the @RunOnMainAsync decorator, to run the function on the Main thread, and let the runnerThread continue
-# without waiting for a return value -- no queue needed
+# without waiting for a return value -- no future needed
 
 
 def to_main_async(func, *args, **kwargs):
-    """Run a function on the main thread, and await its return value so we can return it on the calling thread"""
+    """Run a function on the main thread, without waiting for it to run"""
     if threading.current_thread() == threading.main_thread():
         # on main thread
         func(*args, **kwargs)
@@ -131,16 +259,10 @@ def to_main_async(func, *args, **kwargs):
         thread = threading.current_thread()
         # no more to_main calls once we're terminated
         if not thread.is_terminated:
-            CallAfter(to_main_async_helper, thread, func, *args, **kwargs)
+            thread.dispatcher.RunAsync(func, args, kwargs)
         return None
 
 
-def to_main_async_helper(thread, func, *args, **kwargs):
-    # On main thread
-    if not thread.is_terminated:
-        func(*args, **kwargs)
-
-
 def RunOnMainAsync(func):
     """ Used as a decorator, to make Proxy object functions run on the main thread. """
     def wrapper_run_on_main_async(*args, **kwargs):
@@ -0,0 +1,416 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Pure-python geometry used for hit testing and collision detection.
+Each object's outline is described as a list of convex polygons in card coordinates, and these are tested against
+each other using the Separating Axis Theorem, the same way the web viewer does using SAT.js.
+Nothing in here touches wx, so it is all safe to use from the runner thread.
+"""
+
+import math
+import threading
+
+ELLIPSE_POINTS = 20  # Matches the web viewer's ellipse approximation
+ARC_POINTS = 5       # Points per rounded corner of a roundrect
+
+
+class Transform(object):
+    """
+    A 2D affine transform, with the same semantics as wx.AffineMatrix2D:
+    x' = a*x + c*y + tx,  y' = b*x + d*y + ty
+    Translate() and Rotate() apply in the current local coordinate system.
+    """
+
+    __slots__ = ("a", "b", "c", "d", "tx", "ty")
+
+    def __init__(self, a=1.0, b=0.0, c=0.0, d=1.0, tx=0.0, ty=0.0):
+        self.a, self.b, self.c, self.d, self.tx, self.ty = a, b, c, d, tx, ty
+
+    def Copy(self):
+        return Transform(self.a, self.b, self.c, self.d, self.tx, self.ty)
+
+    def Translate(self, dx, dy):
+        self.tx += self.a * dx + self.c * dy
+        self.ty += self.b * dx + self.d * dy
+
+    def Rotate(self, radians):
+        cos = math.cos(radians)
+        sin = math.sin(radians)
+        a, b, c, d = self.a, self.b, self.c, self.d
+        self.a = a * cos + c * sin
+        self.b = b * cos + d * sin
+        self.c = c * cos - a * sin
+        self.d = d * cos - b * sin
+
+    def TransformPoint(self, x, y):
+        return (self.a * x + self.c * y + self.tx, self.b * x + self.d * y + self.ty)
+
+    def TransformPoints(self, points):
+        a, b, c, d, tx, ty = self.a, self.b, self.c, self.d, self.tx, self.ty
+        return [(a * x + c * y + tx, b * x + d * y + ty) for x, y in points]
+
+
+class ConvexPolygon(object):
+    """
+    A convex polygon in card coordinates, with its bounding box and edge normals precomputed,
+    so that repeated SAT tests against it stay cheap.
+    """
+
+    __slots__ = ("points", "bounds", "axes")
+
+    def __init__(self, points):
+        self.points = points
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        axes = []
+        n = len(points)
+        for i in range(n):
+            x1, y1 = points[i]
+            x2, y2 = points[(i + 1) % n]
+            if x1 != x2 or y1 != y2:
+                axes.append((y1 - y2, x2 - x1))
+        self.axes = axes
+
+    def ContainsPoint(self, x, y):
+        l, b, r, t = self.bounds
+        if x < l or x > r or y < b or y > t:
+            return False
+        points = self.points
+        n = len(points)
+        sign = 0
+        for i in range(n):
+            x1, y1 = points[i]
+            x2, y2 = points[(i + 1) % n]
+            cross = (x2 - x1) * (y - y1) - (y2 - y1) * (x - x1)
+            if cross > 0:
+                if sign < 0: return False
+                sign = 1
+            elif cross < 0:
+                if sign > 0: return False
+                sign = -1
+        return True
+
+    def Intersects(self, other):
+        if not BoundsIntersect(self.bounds, other.bounds):
+            return False
+        for axes in (self.axes, other.axes):
+            for nx, ny in axes:
+                minA = maxA = None
+                for x, y in self.points:
+                    v = x * nx + y * ny
+                    if minA is None or v < minA: minA = v
+                    if maxA is None or v > maxA: maxA = v
+                minB = maxB = None
+                for x, y in other.points:
+                    v = x * nx + y * ny
+                    if minB is None or v < minB: minB = v
+                    if maxB is None or v > maxB: maxB = v
+                if maxA < minB or maxB < minA:
+                    # Found a separating axis
+                    return False
+        return True
+
+
+def BoundsIntersect(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def UnionBounds(a, b):
+    """ Returns the (left, bottom, right, top) bounds covering both a and b, either of which may be None. """
+    if not a:
+        return b
+    if not b:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def PolygonsBounds(polygons):
+    """ Returns the (left, bottom, right, top) bounds of a list of ConvexPolygons, or None if the list is empty. """
+    if not polygons:
+        return None
+    l, b, r, t = polygons[0].bounds
+    for poly in polygons[1:]:
+        pl, pb, pr, pt = poly.bounds
+        if pl < l: l = pl
+        if pb < b: b = pb
+        if pr > r: r = pr
+        if pt > t: t = pt
+    return (l, b, r, t)
+
+
+def PolygonsContainPoint(polygons, point, slop=0):
+    """ Returns True if the point is inside any of the polygons, or within slop of one, if slop is given. """
+    x, y = float(point[0]), float(point[1])
+    if slop:
+        square = ConvexPolygon(RectPoints(x - slop, y - slop, 2 * slop, 2 * slop))
+        return any(poly.Intersects(square) for poly in polygons)
+    return any(poly.ContainsPoint(x, y) for poly in polygons)
+
+
+def PolygonsIntersect(polygonsA, polygonsB):
+    """ Returns True if any polygon in the first list overlaps any polygon in the second list. """
+    boundsA = PolygonsBounds(polygonsA)
+    boundsB = PolygonsBounds(polygonsB)
+    if not boundsA or not boundsB or not BoundsIntersect(boundsA, boundsB):
+        return False
+    for poly in polygonsA:
+        if not BoundsIntersect(poly.bounds, boundsB):
+            continue
+        for oPoly in polygonsB:
+            if poly.Intersects(oPoly):
+                return True
+    return False
+
+
+class SpatialHash(object):
+    """
+    A broad phase for collision detection.  The bounding boxes of tracked objects are kept in a uniform grid of
+    buckets, so finding the objects whose boxes overlap a given object's box only needs to look at nearby buckets,
+    instead of at every other object.
+    Objects get marked dirty from any thread as they change, and are re-bucketed on the main thread by
+    ProcessUpdates(), right before the boxes are needed.
+    """
+
+    def __init__(self, cellSize=64, maxCells=256):
+        super().__init__()
+        self.cellSize = cellSize
+        self.maxCells = maxCells    # Objects covering more buckets than this get checked against every query
+        self.cells = {}             # (col, row) -> set of keys
+        self.entries = {}           # key -> (bounds, list of cells, or None if large)
+        self.largeKeys = set()
+        self.tracked = set()
+        self.dirty = set()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def Clear(self):
+        with self.lock:
+            self.tracked = set()
+            self.dirty = set()
+        self.cells = {}
+        self.entries = {}
+        self.largeKeys = set()
+
+    def Track(self, key):
+        # Start indexing this key, as of the next ProcessUpdates()
+        with self.lock:
+            self.tracked.add(key)
+            self.dirty.add(key)
+
+    def GetTrackedKeys(self):
+        with self.lock:
+            return list(self.tracked)
+
+    def MarkDirty(self, key):
+        if key in self.tracked:
+            with self.lock:
+                self.dirty.add(key)
+
+    def ProcessUpdates(self, getBounds):
+        # getBounds(key) returns the key's current (left, bottom, right, top) bounds, or None to stop tracking it
+        with self.lock:
+            dirty = self.dirty
+            self.dirty = set()
+        for key in dirty:
+            bounds = getBounds(key)
+            if bounds is None:
+                with self.lock:
+                    self.tracked.discard(key)
+                self.Remove(key)
+            else:
+                self.Update(key, bounds)
+
+    def CellRange(self, bounds):
+        size = self.cellSize
+        return (range(int(math.floor(bounds[0] / size)), int(math.floor(bounds[2] / size)) + 1),
+                range(int(math.floor(bounds[1] / size)), int(math.floor(bounds[3] / size)) + 1))
+
+    def Update(self, key, bounds):
+        entry = self.entries.get(key)
+        cols, rows = self.CellRange(bounds)
+        if len(cols) * len(rows) > self.maxCells:
+            cells = None
+        else:
+            cells = [(c, r) for c in cols for r in rows]
+        if entry:
+            if entry[1] == cells and cells is not None:
+                # Still in the same buckets, so just update the bounds
+                self.entries[key] = (bounds, cells)
+                return
+            self.Remove(key)
+        self.entries[key] = (bounds, cells)
+        if cells is None:
+            self.largeKeys.add(key)
+        else:
+            for cell in cells:
+                bucket = self.cells.get(cell)
+                if bucket is None:
+                    self.cells[cell] = bucket = set()
+                bucket.add(key)
+
+    def Remove(self, key):
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return
+        if entry[1] is None:
+            self.largeKeys.discard(key)
+        else:
+            for cell in entry[1]:
+                bucket = self.cells.get(cell)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self.cells[cell]
+
+    def GetBounds(self, key):
+        entry = self.entries.get(key)
+        return entry[0] if entry else None
+
+    def Query(self, key):
+        # Returns the set of other keys whose boxes overlap this key's box
+        entry = self.entries.get(key)
+        if not entry:
+            return set()
+        bounds, cells = entry
+        entries = self.entries
+        if cells is None:
+            candidates = entries.keys()
+        else:
+            candidates = set(self.largeKeys)
+            for cell in cells:
+                bucket = self.cells.get(cell)
+                if bucket:
+                    candidates.update(bucket)
+        return {k for k in candidates if k is not key and BoundsIntersect(bounds, entries[k][0])}
+
+
+def RectPoints(x, y, w, h):
+    return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+
+
+def EllipsePoints(cx, cy, rx, ry, n=ELLIPSE_POINTS):
+    return [(cx + rx * math.cos(theta), cy + ry * math.sin(theta))
+            for theta in (math.pi * 2 * i / n for i in range(n))]
+
+
+def RoundRectPoints(x, y, w, h, radius):
+    radius = max(0, min(radius, w / 2, h / 2))
+    if radius == 0:
+        return RectPoints(x, y, w, h)
+    points = []
+    corners = ((x + w - radius, y + radius, -90),
+               (x + w - radius, y + h - radius, 0),
+               (x + radius, y + h - radius, 90),
+               (x + radius, y + radius, 180))
+    for cx, cy, start in corners:
+        for i in range(ARC_POINTS):
+            theta = math.radians(start + 90 * i / (ARC_POINTS - 1))
+            points.append((cx + radius * math.cos(theta), cy + radius * math.sin(theta)))
+    return points
+
+
+def SegmentPoints(p1, p2, halfWidth):
+    """ Returns the quad covering a line segment stroked with square caps. """
+    x1, y1 = p1
+    x2, y2 = p2
+    length = math.hypot(x2 - x1, y2 - y1)
+    if length == 0:
+        return RectPoints(x1 - halfWidth, y1 - halfWidth, 2 * halfWidth, 2 * halfWidth)
+    dx = (x2 - x1) / length * halfWidth
+    dy = (y2 - y1) / length * halfWidth
+    return [(x1 - dx + dy, y1 - dy - dx), (x2 + dx + dy, y2 + dy - dx),
+            (x2 + dx - dy, y2 + dy + dx), (x1 - dx - dy, y1 - dy + dx)]
+
+
+def PolylinePieces(points, halfWidth, closed=False):
+    """ Returns one convex quad per segment of a (possibly closed) thick polyline. """
+    pieces = []
+    if len(points) == 1:
+        pieces.append(SegmentPoints(points[0], points[0], halfWidth))
+    for i in range(1, len(points)):
+        pieces.append(SegmentPoints(points[i - 1], points[i], halfWidth))
+    if closed and len(points) > 2:
+        pieces.append(SegmentPoints(points[-1], points[0], halfWidth))
+    return pieces
+
+
+def Cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def SignedArea(points):
+    n = len(points)
+    return sum(points[i][0] * points[(i + 1) % n][1] - points[(i + 1) % n][0] * points[i][1] for i in range(n)) / 2
+
+
+def IsConvex(points):
+    n = len(points)
+    sign = 0
+    for i in range(n):
+        cross = Cross(points[i - 1], points[i], points[(i + 1) % n])
+        if cross > 0:
+            if sign < 0: return False
+            sign = 1
+        elif cross < 0:
+            if sign > 0: return False
+            sign = -1
+    return True
+
+
+def Triangulate(points):
+    """
+    Split a simple polygon into convex pieces.  Convex polygons are returned whole, and concave ones are split
+    into triangles by ear clipping.
+    """
+    pts = []
+    for p in points:
+        p = (float(p[0]), float(p[1]))
+        if not pts or p != pts[-1]:
+            pts.append(p)
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts.pop()
+    if len(pts) < 3:
+        return []
+    if IsConvex(pts):
+        return [pts]
+    if SignedArea(pts) < 0:
+        pts.reverse()
+
+    def InTriangle(p, a, b, c):
+        return Cross(a, b, p) >= 0 and Cross(b, c, p) >= 0 and Cross(c, a, p) >= 0
+
+    indexes = list(range(len(pts)))
+    triangles = []
+    while len(indexes) > 3:
+        n = len(indexes)
+        for i in range(n):
+            ia, ib, ic = indexes[i - 1], indexes[i], indexes[(i + 1) % n]
+            a, b, c = pts[ia], pts[ib], pts[ic]
+            cross = Cross(a, b, c)
+            if cross == 0:
+                # Drop collinear points, which add no area
+                del indexes[i]
+                break
+            if cross < 0:
+                continue
+            if any(InTriangle(pts[j], a, b, c) for j in indexes if j not in (ia, ib, ic)):
+                continue
+            triangles.append([a, b, c])
+            del indexes[i]
+            break
+        else:
+            # No ears found, so this polygon self-intersects.  Fan out whatever is left.
+            break
+    remaining = [pts[i] for i in indexes]
+    for i in range(1, len(remaining) - 1):
+        triangles.append([remaining[0], remaining[i], remaining[i + 1]])
+    return triangles
@@ -36,7 +36,6 @@ from wx.lib.mixins.inspection import InspectionMixin
 from stackExporter import StackExporter
 import mediaSearchDialogs
 from runner import Runner
-from imageFactory import ImageFactory
 from pythonEditor import PythonEditor
 from codeRunnerThread import RunOnMainSync
 # import gc
@@ -752,7 +751,6 @@ class DesignerFrame(wx.Frame):
     def OnRunnerFinished(self, runner):
         self.lastRunErrors = runner.errors
         self.viewer = None
-        ImageFactory.shared().ClearCache()
         self.Show()
         self.Refresh()
         self.Update()
@@ -15,6 +15,7 @@ class FlippedGCDC(wx.GCDC):
     def __init__(self, dc, stackManager, **kwargs):
         super().__init__(dc, **kwargs)
         self.stackManager = stackManager
+        self.dipScale = stackManager.view.FromDIP(1000)/1000.0
 
     def DrawRectangle(self, rect):
         super().DrawRectangle(self.stackManager.ConvRect(rect))
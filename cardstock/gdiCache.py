@@ -0,0 +1,74 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import wx
+from collections import OrderedDict
+
+
+class GDICache(object):
+    """
+    Shares the wx.Colour, wx.Pen, wx.Brush and wx.Font objects used while painting, across all of a StackManager's
+    UiViews, so painting a card doesn't construct new GDI objects for every object on every frame.  Objects are keyed
+    by their color string, width, and style, or by their font descriptor.  The returned objects are shared, so don't
+    modify them.  Each kind keeps at most MAX_ENTRIES, dropping the least recently used ones, since animating a color
+    makes lots of one-off colors.
+    """
+
+    MAX_ENTRIES = 512
+
+    def __init__(self):
+        super().__init__()
+        self.caches = {"colour": OrderedDict(), "pen": OrderedDict(), "brush": OrderedDict(), "font": OrderedDict()}
+        self.created = {kind: 0 for kind in self.caches}
+        self.hits = {kind: 0 for kind in self.caches}
+
+    def Clear(self):
+        for cache in self.caches.values():
+            cache.clear()
+
+    def Get(self, kind, key, make):
+        cache = self.caches[kind]
+        obj = cache.get(key)
+        if obj is not None:
+            cache.move_to_end(key)
+            self.hits[kind] += 1
+            return obj
+        obj = make()
+        cache[key] = obj
+        self.created[kind] += 1
+        if len(cache) > self.MAX_ENTRIES:
+            cache.popitem(last=False)
+        return obj
+
+    def GetColour(self, color, default=None):
+        # Returns the wx.Colour for a color string, or for default if color isn't valid
+        colour = self.Get("colour", color, lambda: wx.Colour(color))
+        if default and not colour.IsOk():
+            return self.GetColour(default)
+        return colour
+
+    def GetPen(self, color, width=1, style=wx.PENSTYLE_SOLID, join=None):
+        def make():
+            pen = wx.Pen(self.GetColour(color), width, style)
+            if join is not None:
+                pen.SetJoin(join)
+            return pen
+        return self.Get("pen", (color, width, style, join), make)
+
+    def GetBrush(self, color, style=wx.BRUSHSTYLE_SOLID):
+        return self.Get("brush", (color, style), lambda: wx.Brush(self.GetColour(color), style))
+
+    def GetFont(self, pixelSize, family=wx.FONTFAMILY_DEFAULT, bold=False, italic=False, underlined=False):
+        return self.Get("font", (pixelSize, family, bold, italic, underlined),
+                        lambda: wx.Font(wx.FontInfo(wx.Size(0, int(pixelSize)))
+                                        .Family(family).Bold(bold).Italic(italic).Underlined(underlined)))
+
+    def GetStats(self):
+        return {"entries": {kind: len(cache) for kind, cache in self.caches.items()},
+                "created": dict(self.created),
+                "hits": dict(self.hits)}
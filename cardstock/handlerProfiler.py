@@ -0,0 +1,98 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import threading
+from collections import deque
+from time import perf_counter
+
+
+class HandlerStats(object):
+    """ Timings for one object's handler.  Clones are counted together with the object they were cloned from. """
+
+    MAX_SAMPLES = 1000  # Percentiles are computed over this many of the most recent calls
+
+    def __init__(self, path, handlerName):
+        super().__init__()
+        self.path = path
+        self.handlerName = handlerName
+        self.count = 0
+        self.totalTime = 0.0
+        self.selfTime = 0.0
+        self.blockedTime = 0.0
+        self.samples = deque(maxlen=self.MAX_SAMPLES)
+
+    def Percentile(self, sortedSamples, p):
+        if not sortedSamples:
+            return 0.0
+        return sortedSamples[min(len(sortedSamples)-1, int(p * len(sortedSamples)))]
+
+    def GetData(self):
+        samples = sorted(self.samples)
+        return {"path": self.path,
+                "handler": self.handlerName,
+                "count": self.count,
+                "total_time": self.totalTime,
+                "self_time": self.selfTime,
+                "blocked_time": self.blockedTime,
+                "p50": self.Percentile(samples, 0.50),
+                "p95": self.Percentile(samples, 0.95),
+                "p99": self.Percentile(samples, 0.99)}
+
+
+class HandlerProfiler(object):
+    """
+    Records how long each handler takes to run, while profiling is turned on in the Runner.  Self time leaves out the
+    time spent in other handlers called from this one (like from broadcast_message() or send_message()), and blocked
+    time is how long the handler spent waiting on the main thread in @RunOnMainSync calls.
+    """
+
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+        self.lock = threading.Lock()
+        self.stats = {}   # (model, handlerName) -> HandlerStats
+        self.stack = []   # [HandlerStats, startTime, childTime, startBlockedTime] for each running handler
+
+    def Reset(self):
+        with self.lock:
+            self.stats = {}
+
+    def GetBlockedTime(self):
+        runnerThread = self.runner.runnerThread
+        return runnerThread.dispatcher.syncWaitTime if runnerThread else 0.0
+
+    def StartHandler(self, uiModel, handlerName):
+        # On runnerThread
+        model = uiModel.clonedFrom if uiModel.clonedFrom else uiModel
+        key = (model, handlerName)
+        stats = self.stats.get(key)
+        if not stats:
+            stats = HandlerStats(self.runner.HandlerPath(model, handlerName), handlerName)
+            with self.lock:
+                self.stats[key] = stats
+        self.stack.append([stats, perf_counter(), 0.0, self.GetBlockedTime()])
+
+    def FinishHandler(self):
+        # On runnerThread
+        if not self.stack:
+            return
+        (stats, startTime, childTime, startBlocked) = self.stack.pop()
+        duration = perf_counter() - startTime
+        with self.lock:
+            stats.count += 1
+            stats.totalTime += duration
+            stats.selfTime += duration - childTime
+            stats.blockedTime += self.GetBlockedTime() - startBlocked
+            stats.samples.append(duration)
+        if self.stack:
+            self.stack[-1][2] += duration
+
+    def GetStats(self):
+        """ Returns a list of dicts, one per handler that has run, with times in seconds """
+        with self.lock:
+            return [s.GetData() for s in self.stats.values()]
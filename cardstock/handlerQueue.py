@@ -0,0 +1,149 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import threading
+from collections import deque
+from enum import Enum
+
+
+class TaskType (Enum):
+    """ Types of tasks in the handlerQueue """
+    Wake = 1            # Wake up the handler thread
+    SetupCard = 2       # Set up for the card we just switched to
+    Handler = 3         # Run an event handler
+    Func = 4            # Run an arbitrary function with args and kwargs
+    Code = 5            # Run an arbitrary string as code
+    StopHandlingMouseEvent = 6  # Stop propagating the current mouse event
+    CallbackMain = 7    # Run a callback func on the main thread.  Used for synchronization.
+    PeriodicBatch = 8   # Run a list of on_periodic Handler tasks, all queued for the same frame
+    UpdateCardVars = 9  # Add, remove, or rename the variables for some objects on the current card
+
+
+class HandlerQueue(object):
+    """
+    The Runner's queue of tasks for the runnerThread.  It works like a FIFO queue.Queue, with put() and get(), except:
+     - Key and mouse press/release events can jump ahead of queued PeriodicBatch and Wake tasks, so input stays
+       responsive when the runner falls behind.  They never jump ahead of other input events, functions, or a pending
+       SetupCard or UpdateCardVars, so handlers always run in order and see the right card and objects.
+     - Redundant Wake, on_mouse_move, and on_key_hold tasks get coalesced, so only the latest one stays queued.
+     - All on_periodic handlers queued for a frame get batched into one PeriodicBatch task.  If a batch is still
+       waiting when the next frame's periodics arrive, objects already in the batch are dropped from the new frame.
+       A SetupCard or UpdateCardVars queued after a batch closes it, so later periodics go into a new batch.
+    """
+
+    urgentHandlers = ("on_key_press", "on_key_release", "on_mouse_press", "on_mouse_release")
+    coalescedHandlers = ("on_mouse_move", "on_key_hold")
+
+    def __init__(self):
+        super().__init__()
+        self.cond = threading.Condition()
+        # Entries are [task, seq] lists, so coalesced tasks can be emptied in place.  PeriodicBatch and Wake entries
+        # go in the skippable lane, and everything else stays in order in the tasks lane.
+        self.tasks = deque()
+        self.skippable = deque()
+        self.seq = 0
+        self.coalesceEntries = {}   # coalesce key -> pending entry
+        self.periodicEntry = None   # The pending PeriodicBatch entry that new on_periodic tasks can join, if any
+        self.depth = 0
+        self.maxDepth = 0
+        self.numUrgent = 0
+        self.numBatches = 0
+        self.drops = {"Wake": 0, "on_mouse_move": 0, "on_key_hold": 0, "on_periodic": 0}
+
+    def qsize(self):
+        return self.depth
+
+    def put(self, task):
+        """ Queue up a task.  Returns False if it was dropped, because an equivalent task was already queued. """
+        with self.cond:
+            taskType = task[0]
+            if taskType == TaskType.Handler:
+                handlerName = task[2]
+                if handlerName == "on_periodic":
+                    if self.periodicEntry:
+                        batch = self.periodicEntry[0][1]
+                        if any(t[1] is task[1] for t in batch):
+                            self.drops["on_periodic"] += 1
+                            return False
+                        batch.append(task)
+                        return True
+                    self.periodicEntry = self.MakeEntry((TaskType.PeriodicBatch, [task]))
+                    self.numBatches += 1
+                    self.Append(self.skippable, self.periodicEntry)
+                    return True
+                elif handlerName in self.coalescedHandlers:
+                    self.Coalesce(self.tasks, (handlerName, task[1], task[4]), task, handlerName)
+                    return True
+                elif handlerName in self.urgentHandlers:
+                    self.numUrgent += 1
+            elif taskType == TaskType.Wake:
+                self.Coalesce(self.skippable, "Wake", task, "Wake")
+                return True
+            elif taskType in (TaskType.SetupCard, TaskType.UpdateCardVars):
+                # Periodics queued after this need to run after it, so don't add them to the pending batch
+                self.periodicEntry = None
+            self.Append(self.tasks, self.MakeEntry(task))
+            return True
+
+    def MakeEntry(self, task):
+        self.seq += 1
+        return [task, self.seq]
+
+    def Coalesce(self, lane, key, task, dropName):
+        # Replace any pending task with the same key, by emptying its entry, and queueing this one at the end
+        oldEntry = self.coalesceEntries.get(key)
+        if oldEntry and oldEntry[0] is not None:
+            oldEntry[0] = None
+            self.depth -= 1
+            self.drops[dropName] += 1
+        entry = self.MakeEntry(task)
+        self.coalesceEntries[key] = entry
+        self.Append(lane, entry)
+
+    def Append(self, lane, entry):
+        lane.append(entry)
+        self.depth += 1
+        if self.depth > self.maxDepth:
+            self.maxDepth = self.depth
+        self.cond.notify()
+
+    def IsUrgent(self, task):
+        return task[0] == TaskType.Handler and task[2] in self.urgentHandlers
+
+    def get(self):
+        """ Wait for and return the next task """
+        with self.cond:
+            while True:
+                for lane in (self.tasks, self.skippable):
+                    # Drop entries that were coalesced into later tasks
+                    while lane and lane[0][0] is None:
+                        lane.popleft()
+                if self.tasks or self.skippable:
+                    if self.tasks and (not self.skippable or self.tasks[0][1] < self.skippable[0][1] or
+                                       self.IsUrgent(self.tasks[0][0])):
+                        entry = self.tasks.popleft()
+                    else:
+                        entry = self.skippable.popleft()
+                    task = entry[0]
+                    entry[0] = None
+                    self.depth -= 1
+                    if entry is self.periodicEntry:
+                        self.periodicEntry = None
+                    return task
+                self.coalesceEntries = {}
+                self.cond.wait()
+
+    def GetStats(self):
+        """ Counters for the runner's queue: current and max depth, urgent tasks and periodic batches queued, and
+        how many tasks of each coalesced kind got dropped """
+        with self.cond:
+            return {"depth": self.depth,
+                    "max_depth": self.maxDepth,
+                    "urgent": self.numUrgent,
+                    "periodic_batches": self.numBatches,
+                    "dropped": self.drops.copy()}
@@ -338,11 +338,12 @@ class HelpDataGlobals():
                      "info": "Return the distance between <b>pointA</b> and <b>pointB</b>."},
         "run_after_delay": {"args": {"duration": {"type": "float", "info": "Number of seconds to delay."},
                                    "func": {"type": "function", "info": "A function to call after the delay."},
-                                   "*args": {"type": "any", "info": "0 or more arguments and/or keyword argumentss to pass into <b>func</b>."}}, "return": None,
+                                   "*args": {"type": "any", "info": "0 or more arguments and/or keyword argumentss to pass into <b>func</b>."}}, "return": "other",
                           "info": "This function lets your program continue running while a timer waits for <b>duration</b> seconds, "
                                   "and then runs the functions <b>func</b>, passing it any additional argumentss you add "
                                   "after <b>func</b>.  Movements, animations, and user interaction "
-                                  "will all continue during this time."},
+                                  "will all continue during this time.  Returns a timer object, and calling its "
+                                  "<b>cancel()</b> method stops <b>func</b> from running, if it hasn't run yet."},
         "time": {"args": {}, "return": "float",
                  "info": "Returns the time in seconds since 'The Unix Epoch', midnight UTC on January 1st, 1970.  That "
                          "date doesn't usually matter, since most often, you'll store the time at one point in your "
@@ -1275,6 +1276,11 @@ class HelpDataStack():
                                        "you can call this <b>get_setup_value()</b> method "
                                        "to get the setupValue that was passed in from the calling stack.  Otherwise this "
                                        "will return None."},
+        "batch_update": {"args": {}, "return": None,
+                            "info": "Use this in a <b>with</b> statement, like <b>with stack.batch_update():</b>, around code "
+                                    "that changes lots of objects' properties at once.  The objects still change right "
+                                    "away, but updating how they look on the card waits until the end of the <b>with</b> "
+                                    "block, so the changes show up all together, and run faster."},
     }
 
     handlers = {}
@@ -0,0 +1,186 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import os
+import wx
+import threading
+import queue
+from collections import OrderedDict
+from time import time, perf_counter
+from imagePyramid import ImagePyramid
+
+
+class CachedImage(object):
+    """ One decoded image file, or None if it couldn't be decoded, with the file's mtime when it was read. """
+
+    __slots__ = ("img", "mtime", "checkTime", "numBytes", "pyramid")
+
+    def __init__(self, img, mtime, checkTime):
+        self.img = img
+        self.mtime = mtime
+        self.checkTime = checkTime
+        self.pyramid = None
+        self.numBytes = 0
+        if img:
+            numPixels = img.GetWidth() * img.GetHeight()
+            self.numBytes = numPixels * (4 if img.HasAlpha() else 3)
+
+
+class ImageCache(object):
+    """
+    Holds decoded images, shared by all image objects, keyed by absolute file path.  Images get decoded on a worker
+    thread, so loading a card full of photos doesn't block the main thread: Get() reports the image as pending until
+    it's ready, and then calls the given callback on the Main thread.
+    The least recently used images are dropped to stay under maxBytes.  Each image remembers its file's mtime, which
+    gets re-checked at most every VALIDATE_INTERVAL seconds, so an image file changed on disk gets reloaded.
+    """
+
+    MAX_BYTES = 512 * 1024 * 1024
+    VALIDATE_INTERVAL = 2.0
+
+    def __init__(self, maxBytes=None):
+        super().__init__()
+        self.maxBytes = maxBytes if maxBytes else self.MAX_BYTES
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # path -> CachedImage
+        self.pending = {}             # path -> [onLoaded callbacks], for images queued or being decoded
+        self.decodeQueue = queue.Queue()
+        self.worker = None
+        self.numBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.numDecodes = 0
+        self.decodeTime = 0.0
+
+    @staticmethod
+    def GetMTime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def SetMaxBytes(self, maxBytes):
+        with self.lock:
+            self.maxBytes = maxBytes
+            self.Evict()
+
+    def Get(self, path, onLoaded=None):
+        # On any thread.  Returns (img, isPending), where img is the decoded wx.Image for path, or None if it doesn't
+        # exist, couldn't be decoded, or isn't decoded yet.  In that last case, isPending is True, and onLoaded(path)
+        # will get called on the Main thread once it is.
+        if not path:
+            return (None, False)
+        now = time()
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and now - entry.checkTime > self.VALIDATE_INTERVAL:
+                if self.GetMTime(path) != entry.mtime:
+                    self.RemoveEntry(path)
+                    entry = None
+                else:
+                    entry.checkTime = now
+            if entry:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return (entry.img, False)
+
+            callbacks = self.pending.get(path)
+            if callbacks is None:
+                if not os.path.exists(path):
+                    return (None, False)
+                self.misses += 1
+                callbacks = []
+                self.pending[path] = callbacks
+                self.decodeQueue.put(path)
+                self.StartWorker()
+            if onLoaded and onLoaded not in callbacks:
+                callbacks.append(onLoaded)
+        return (None, True)
+
+    def GetPyramid(self, path, img):
+        # On Main thread.  Returns the mipmap pyramid for the cached image img, which is kept until img is evicted.
+        with self.lock:
+            entry = self.entries.get(path)
+            if not entry or entry.img is not img:
+                return ImagePyramid(img)
+            if not entry.pyramid:
+                entry.pyramid = ImagePyramid(img)
+                # All of the smaller levels together add up to at most a third of the source
+                extraBytes = entry.numBytes // 3
+                entry.numBytes += extraBytes
+                self.numBytes += extraBytes
+                self.Evict()
+            return entry.pyramid
+
+    def Remove(self, path):
+        with self.lock:
+            self.RemoveEntry(path)
+
+    def Clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.numBytes = 0
+
+    def RemoveEntry(self, path):
+        # With self.lock held
+        entry = self.entries.pop(path, None)
+        if entry:
+            self.numBytes -= entry.numBytes
+
+    def Evict(self):
+        # With self.lock held
+        while self.numBytes > self.maxBytes and len(self.entries) > 1:
+            (path, entry) = self.entries.popitem(last=False)
+            self.numBytes -= entry.numBytes
+            self.evictions += 1
+
+    def StartWorker(self):
+        # With self.lock held
+        if not self.worker:
+            self.worker = threading.Thread(target=self.RunWorker, name="ImageDecoder", daemon=True)
+            self.worker.start()
+
+    def RunWorker(self):
+        # On the worker thread
+        while True:
+            path = self.decodeQueue.get()
+            startTime = perf_counter()
+            mtime = self.GetMTime(path)
+            img = None
+            if mtime is not None:
+                img = wx.Image(path, wx.BITMAP_TYPE_ANY)
+                if not img.IsOk():
+                    img = None
+            elapsed = perf_counter() - startTime
+
+            with self.lock:
+                self.numDecodes += 1
+                self.decodeTime += elapsed
+                self.RemoveEntry(path)
+                entry = CachedImage(img, mtime, time())
+                self.entries[path] = entry
+                self.numBytes += entry.numBytes
+                self.Evict()
+                callbacks = self.pending.pop(path, [])
+
+            if wx.GetApp():
+                for onLoaded in callbacks:
+                    wx.CallAfter(onLoaded, path)
+
+    def GetStats(self):
+        with self.lock:
+            return {"images": len(self.entries),
+                    "bytes": self.numBytes,
+                    "max_bytes": self.maxBytes,
+                    "pending": len(self.pending),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "decodes": self.numDecodes,
+                    "decode_time": self.decodeTime}
@@ -0,0 +1,40 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import wx
+
+
+class ImagePyramid(object):
+    """
+    A mipmap pyramid for a decoded source image: the source, plus successively half-sized copies of it, built lazily
+    as they're first needed.  Scaling from the closest level that's still big enough is much faster than scaling the
+    full-size source, and a fast scale from a level at most twice the target size still looks good.
+    """
+
+    MIN_SIZE = 16  # Don't make levels smaller than this
+
+    def __init__(self, img):
+        super().__init__()
+        self.levels = [img]
+
+    def GetSource(self):
+        return self.levels[0]
+
+    def GetLevel(self, width, height):
+        # On Main thread.  Returns the smallest level that's at least width x height.
+        i = 0
+        level = self.levels[0]
+        while True:
+            size = level.GetSize()
+            halfW, halfH = size.width // 2, size.height // 2
+            if halfW < width or halfH < height or min(halfW, halfH) < self.MIN_SIZE:
+                return level
+            i += 1
+            if i == len(self.levels):
+                self.levels.append(level.Scale(halfW, halfH, quality=wx.IMAGE_QUALITY_BOX_AVERAGE))
+            level = self.levels[i]
@@ -0,0 +1,151 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import os
+import json
+import wx
+
+# (title, stats key, is a time in seconds)
+COLUMNS = [("Handler", "path", False),
+           ("Calls", "count", False),
+           ("Total ms", "total_time", True),
+           ("Self ms", "self_time", True),
+           ("p50 ms", "p50", True),
+           ("p95 ms", "p95", True),
+           ("p99 ms", "p99", True),
+           ("Blocked ms", "blocked_time", True)]
+
+
+class ProfilerWindow(wx.Frame):
+    """
+    Shows per-handler timings from the runner's HandlerProfiler.  Profiling is only turned on while this window is
+    shown, so it costs nothing otherwise.  Click a column header to sort by it.
+    """
+
+    def __init__(self, parent, stackManager):
+        super().__init__(parent, title="Profiler", style=wx.DEFAULT_FRAME_STYLE|wx.FRAME_TOOL_WINDOW)
+        self.SetMinClientSize(wx.Size(self.FromDIP(400),self.FromDIP(100)))
+        self.SetClientSize(wx.Size(self.FromDIP(700),self.FromDIP(300)))
+
+        self.stackManager = stackManager
+        self.stats = []
+        self.sortCol = 3
+        self.sortDescending = True
+        self.hasShown = False
+
+        self.list = wx.ListCtrl(self, style=wx.LC_REPORT|wx.LC_SINGLE_SEL)
+        for i, (title, key, isTime) in enumerate(COLUMNS):
+            self.list.InsertColumn(i, title, wx.LIST_FORMAT_LEFT if i == 0 else wx.LIST_FORMAT_RIGHT,
+                                   self.FromDIP(260 if i == 0 else 62))
+        self.list.Bind(wx.EVT_LIST_COL_CLICK, self.OnColClick)
+
+        self.resetButton = wx.Button(self, label="Reset")
+        self.resetButton.Bind(wx.EVT_BUTTON, self.OnReset)
+        self.exportButton = wx.Button(self, label="Export JSON...")
+        self.exportButton.Bind(wx.EVT_BUTTON, self.OnExport)
+
+        buttonSizer = wx.BoxSizer(wx.HORIZONTAL)
+        buttonSizer.Add(self.resetButton, 0, wx.ALL, 3)
+        buttonSizer.AddStretchSpacer()
+        buttonSizer.Add(self.exportButton, 0, wx.ALL, 3)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.list, 1, wx.EXPAND|wx.ALL, 3)
+        sizer.Add(buttonSizer, 0, wx.EXPAND|wx.ALL, 3)
+        self.SetSizer(sizer)
+        sizer.Layout()
+
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.OnTimer, self.timer)
+        self.Bind(wx.EVT_CLOSE, self.OnClose)
+
+        self.Hide()
+
+    def Show(self, doShow=True):
+        super().Show(doShow)
+        self.EnableProfiling(doShow)
+        if doShow and not self.hasShown:
+            parent = self.GetParent()
+            self.SetPosition(parent.GetPosition() + (0, parent.GetSize().Height))
+            self.hasShown = True
+
+    def Hide(self):
+        self.Show(False)
+
+    def Destroy(self):
+        self.timer.Stop()
+        self.stackManager = None
+        return super().Destroy()
+
+    def EnableProfiling(self, enable):
+        runner = self.stackManager.runner if self.stackManager else None
+        if runner:
+            runner.EnableProfiling(enable)
+        if enable:
+            self.timer.Start(500)
+            self.UpdateStats()
+        else:
+            self.timer.Stop()
+
+    def OnClose(self, event):
+        event.Veto()
+        self.Hide()
+
+    def OnTimer(self, event):
+        self.UpdateStats()
+
+    def OnReset(self, event):
+        runner = self.stackManager.runner
+        if runner and runner.profiler:
+            runner.profiler.Reset()
+        self.UpdateStats()
+
+    def OnExport(self, event):
+        initialDir = os.path.expanduser('~')
+        if self.stackManager.filename:
+            initialDir = os.path.dirname(self.stackManager.filename)
+        dlg = wx.FileDialog(self, "Export profile as...", os.path.join(initialDir, ''), "profile.json",
+                            style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT, wildcard="JSON files (*.json)|*.json")
+        if dlg.ShowModal() == wx.ID_OK:
+            try:
+                with open(dlg.GetPath(), 'w') as f:
+                    f.write(json.dumps(self.stats, indent=2))
+            except OSError:
+                wx.MessageDialog(None, str("Couldn't save file"), "", wx.OK).ShowModal()
+        dlg.Destroy()
+
+    def OnColClick(self, event):
+        col = event.GetColumn()
+        if col == self.sortCol:
+            self.sortDescending = not self.sortDescending
+        else:
+            self.sortCol = col
+            self.sortDescending = (col != 0)
+        self.UpdateList()
+
+    def UpdateStats(self):
+        runner = self.stackManager.runner if self.stackManager else None
+        stats = runner.GetProfileStats() if runner else None
+        if stats is not None:
+            self.stats = stats
+        self.UpdateList()
+
+    def UpdateList(self):
+        key = COLUMNS[self.sortCol][1]
+        rows = sorted(self.stats, key=lambda s: s[key], reverse=self.sortDescending)
+
+        self.list.Freeze()
+        if self.list.GetItemCount() != len(rows):
+            self.list.DeleteAllItems()
+            for i in range(len(rows)):
+                self.list.InsertItem(i, "")
+        for i, s in enumerate(rows):
+            for col, (title, k, isTime) in enumerate(COLUMNS):
+                v = s[k]
+                self.list.SetItem(i, col, f"{v*1000:.2f}" if isTime else str(v))
+        self.list.Thaw()
@@ -0,0 +1,125 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import threading
+from codeRunnerThread import RunOnMainAsync
+
+
+class PropertyChangeQueue(object):
+    """
+    Coalesces the property change notifications that update native views, hit regions, and repaint areas.
+    Changes made on the Main thread outside of a batch are sent right away, as before.  Changes made on the runner
+    thread are collected as one pending notification per (model, key), in the order they first changed, and sent
+    together in a single flush that gets queued up on the main thread along with the runner's other main thread calls,
+    so a handler that moves an object 100 times in a frame only updates its view once, and later sync calls still see
+    up-to-date views.  Inside a batch (from stack.batch_update()), all notifications wait until the batch ends.
+    """
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.lock = threading.Lock()
+        self.pending = {}  # (model, key) -> None, in the order they first changed
+        self.batchDepth = 0
+        self.isFlushScheduled = False
+        self.numChanges = 0
+        self.numNotified = 0
+        self.numFlushes = 0
+
+    def Clear(self):
+        with self.lock:
+            self.pending = {}
+            self.batchDepth = 0
+            self.isFlushScheduled = False
+
+    def Add(self, model, key):
+        # On any thread
+        onMain = threading.current_thread() is threading.main_thread()
+        with self.lock:
+            self.numChanges += 1
+            self.pending[(model, key)] = None
+            if self.batchDepth:
+                return
+            if not onMain:
+                if self.isFlushScheduled:
+                    return
+                self.isFlushScheduled = True
+        if onMain:
+            self.Flush()
+        else:
+            self.ScheduledFlush()
+
+    def BeginBatch(self):
+        # On any thread
+        with self.lock:
+            self.batchDepth += 1
+
+    def EndBatch(self):
+        # On any thread
+        with self.lock:
+            if self.batchDepth == 0:
+                return
+            self.batchDepth -= 1
+            if self.batchDepth or not self.pending:
+                return
+            onMain = threading.current_thread() is threading.main_thread()
+            if not onMain:
+                if self.isFlushScheduled:
+                    return
+                self.isFlushScheduled = True
+        if onMain:
+            self.Flush()
+        else:
+            self.ScheduledFlush()
+
+    @RunOnMainAsync
+    def ScheduledFlush(self):
+        self.Flush()
+
+    def Flush(self):
+        # On Main thread
+        with self.lock:
+            self.isFlushScheduled = False
+            if self.batchDepth or not self.pending:
+                return
+            pending = self.pending
+            self.pending = {}
+            self.numFlushes += 1
+
+        for (model, key) in pending:
+            if not model.didSetDown and self.stackManager.stackModel:
+                self.numNotified += 1
+                self.stackManager.OnPropertyChanged(model, key)
+
+    def GetStats(self):
+        with self.lock:
+            return {"pending": len(self.pending),
+                    "changes": self.numChanges,
+                    "notified": self.numNotified,
+                    "flushes": self.numFlushes}
+
+
+class PropertyBatch(object):
+    """
+    The context manager returned by stack.batch_update(), which holds property change notifications until the with
+    block exits.  Batches can nest.
+    """
+
+    def __init__(self, changeQueue):
+        super().__init__()
+        self.changeQueue = changeQueue
+
+    def __enter__(self):
+        if self.changeQueue:
+            self.changeQueue.BeginBatch()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if self.changeQueue:
+            self.changeQueue.EndBatch()
+        return False
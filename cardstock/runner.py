@@ -6,13 +6,16 @@
 # This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
 # of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-import re
 import sys
 import os
 import traceback
+import ast
+import symtable
+import builtins
 import wx
 import uiView
 import types
+import inspect
 from uiCard import Card
 import colorsys
 from time import sleep, time
@@ -20,29 +23,19 @@ import math
 from errorListWindow import CardStockError
 import threading
 from codeRunnerThread import CodeRunnerThread, RunOnMainSync, RunOnMainAsync
+from timerService import TimerService
+from handlerQueue import HandlerQueue, TaskType
+from handlerProfiler import HandlerProfiler
 import queue
 import sanitizer
-from enum import Enum
 import simpleaudio
 
 
-class TaskType (Enum):
-    """ Types of tasks in the handlerQueue """
-    Wake = 1            # Wake up the handler thread
-    SetupCard = 2       # Set up for the card we just switched to
-    Handler = 3         # Run an event handler
-    Func = 4            # Run an arbitrary function with args and kwargs
-    Code = 5            # Run an arbitrary string as code
-    StopHandlingMouseEvent = 6  # Stop propagating the current mouse event
-    CallbackMain = 7    # Run a callback func on the main thread.  Used for synchronization.
-
-
 class Runner():
     """
     The Runner object runs all of the stack's user-written event handlers.  It keeps track of user variables, so that they
-    can be shared between handlers, offers global variables and functions, and makes event arguments (message,
-    mouse_pos, etc.) available to the handlers that expect them, and then restores any old values of those variables upon
-    finishing those events.
+    can be shared between handlers, offers global variables and functions, and passes event arguments (message,
+    mouse_pos, etc.) into the handlers that expect them, as local variables of each compiled handler.
 
     Keep the UI responsive even if an event handler runs an infinite loop.  Do this by running all handler code in the
     runnerThread.  From there, run all UI calls on the main thread, as required by wxPython.  If we need a return value
@@ -61,21 +54,21 @@ class Runner():
     def __init__(self, stackManager, viewer):
         self.stackManager = stackManager
         self.viewer = viewer
-        self.cardVarKeys = []  # store names of views on the current card, to remove from clientVars before setting up the next card
+        self.cardVars = {}  # name -> model for objects on the current card, to remove from clientVars before setting up the next card
         self.pressedKeys = []
         self.keyTimings = {}
-        self.timers = []
+        self.timerService = TimerService(self)
         self.errors = []
         self.lastHandlerStack = []
         self.didSetup = False
         self.runnerDepth = 0
         self.numOnPeriodicsQueued = 0
-        self.rewrittenHandlerMap = {}
         self.onRunFinished = None
         self.funcDefs = {}
         self.lastCard = None
         self.stopHandlingMouseEvent = False
         self.shouldUpdateVars = False
+        self.profiler = None  # A HandlerProfiler, only while profiling is turned on
 
         self.stackSetupValue = None
         self.stackReturnQueue = queue.Queue()
@@ -85,7 +78,7 @@ class Runner():
         # single item list means run SetupForCard
         # 5-item list means run a handler
         # 0-item list means just wake up to check if the thread is supposed to stop
-        self.handlerQueue = queue.Queue()
+        self.handlerQueue = HandlerQueue()
 
         self.runnerThread = CodeRunnerThread(target=self.StartRunLoop)
         self.runnerThread.start()
@@ -93,6 +86,9 @@ class Runner():
         self.generatingThumbnail = False
 
         self.soundCache = {}
+        self.soundQueue = queue.Queue()  # Paths for the soundLoader thread to decode into soundCache
+        self.pendingSounds = set()
+        self.soundLoader = None
 
         self.stackStartTime = time()
 
@@ -126,6 +122,7 @@ class Runner():
         }
 
         self.clientVars = self.initialClientVars.copy()
+        self.clientVars["__builtins__"] = builtins
 
         self.keyCodeStringMap = {
             wx.WXK_RETURN: "Return",
@@ -182,26 +179,78 @@ class Runner():
         """
         self.clientVars["card"] = cardModel.GetProxy()
         self.clientVars["stack"] = self.stackManager.stackModel.GetProxy()
-        for k in self.cardVarKeys.copy():
-            if k in self.clientVars:
-                self.clientVars.pop(k)
-            self.cardVarKeys.remove(k)
+        for k in self.cardVars:
+            self.clientVars.pop(k, None)
+        self.cardVars = {}
         for m in cardModel.GetAllChildModels():
             name = m.GetProperty("name")
             self.clientVars[name] = m.GetProxy()
-            self.cardVarKeys.append(name)
+            self.cardVars[name] = m
         self.didSetup = True
 
+    def UpdateCardVars(self, added=None, removed=None, renamed=None):
+        """
+        Update just the clientVars for objects added to, removed from, or renamed on the current card, instead of
+        setting up the whole card again.  added is a list of models, removed is a list of (name, model) pairs, and
+        renamed is a list of (oldName, model) pairs.  Like SetupForCard, this gets dispatched to the runner thread.
+        """
+        if threading.currentThread() == self.runnerThread:
+            self.UpdateCardVarsInternal(added, removed, renamed)
+        else:
+            self.handlerQueue.put((TaskType.UpdateCardVars, added, removed, renamed))
+
+    def UpdateCardVarsInternal(self, added, removed, renamed):
+        """ This always runs on the runnerThread. """
+        if removed:
+            for (name, m) in removed:
+                if self.cardVars.get(name) is m:
+                    del self.cardVars[name]
+                    self.clientVars.pop(name, None)
+        if renamed:
+            for (oldName, m) in renamed:
+                if self.cardVars.get(oldName) is m:
+                    del self.cardVars[oldName]
+                    self.clientVars.pop(oldName, None)
+            added = (added or []) + [m for (oldName, m) in renamed if not m.didSetDown]
+        if added:
+            for m in added:
+                name = m.GetProperty("name")
+                self.clientVars[name] = m.GetProxy()
+                self.cardVars[name] = m
+
     def IsRunningHandler(self):
         return len(self.lastHandlerStack) > 0
 
     def EnableUpdateVars(self, enable):
         self.shouldUpdateVars = enable
 
+    def EnableProfiling(self, enable):
+        # Turn handler profiling on or off.  Keep the collected stats if it's already on.
+        if enable and not self.profiler:
+            self.profiler = HandlerProfiler(self)
+        elif not enable:
+            self.profiler = None
+
+    def GetProfileStats(self):
+        """ Per-handler counts and timings, while profiling is on """
+        return self.profiler.GetStats() if self.profiler else None
+
     def StopTimers(self):
-        for t in self.timers:
-            t.Stop()
-        self.timers = []
+        self.timerService.Stop()
+
+    def GetPendingTimerCount(self):
+        """ Number of run_after_delay() calls still waiting to run """
+        return self.timerService.GetPendingCount()
+
+    def GetQueueStats(self):
+        """ Depth and coalescing counters for the handlerQueue """
+        return self.handlerQueue.GetStats() if self.handlerQueue else None
+
+    def GetDispatchStats(self):
+        """ Counters for the runnerThread's batched calls to the main thread: hops per frame, and their latency """
+        if self.runnerThread:
+            return self.runnerThread.dispatcher.GetStats()
+        return None
 
     def DoReturnFromStack(self, stackReturnVal):
         self.stackReturnQueue.put(stackReturnVal)
@@ -255,12 +304,14 @@ class Runner():
         self.lastHandlerStack = None
         self.lastCard = None
         self.stop_sound()
+        if self.soundLoader:
+            self.soundQueue.put(None)
+            self.soundLoader = None
         self.soundCache = None
-        self.cardVarKeys = None
+        self.cardVars = None
         self.clientVars = None
-        self.timers = None
+        self.timerService = None
         self.varUpdateTimer = None
-        self.rewrittenHandlerMap = None
         self.funcDefs = None
         self.handlerQueue = None
         self.stackManager = None
@@ -312,13 +363,15 @@ class Runner():
                     # This is an enqueued task meant to Refresh after running all other tasks,
                     # and also serves to wake up the runner thread for stopping.
                     if not self.stopRunnerThread:
-                        self.stackManager.view.Refresh()  # TODO: This should not need to be called?
                         self.stackManager.view.RefreshIfNeeded()
                     if self.stopRunnerThread:
                         break
                 elif args[0] == TaskType.SetupCard:
                     # Run Setup for the given card
                     self.SetupForCardInternal(args[1])
+                elif args[0] == TaskType.UpdateCardVars:
+                    # Update the variables for objects added, removed, or renamed on the current card
+                    self.UpdateCardVarsInternal(args[1], args[2], args[3])
                 elif args[0] == TaskType.StopHandlingMouseEvent:
                     # Reset StopHandlingMouseEvent
                     self.stopHandlingMouseEvent = False
@@ -339,8 +392,14 @@ class Runner():
                     self.RunHandlerInternal(*args[1:])
                     if args[2] == "on_exit_stack":
                         runningOnExitStack = True
-                    if args[2] == "on_periodic":
-                        self.numOnPeriodicsQueued -= 1
+                elif args[0] == TaskType.PeriodicBatch:
+                    # Run all of a frame's on_periodic handlers
+                    for task in args[1]:
+                        if self.stopRunnerThread:
+                            break
+                        self.lastCard = task[1].GetCard()
+                        self.RunHandlerInternal(*task[1:])
+                    self.numOnPeriodicsQueued -= len(args[1])
 
                 if self.stopRunnerThread:
                     exitCountdown -= 1
@@ -380,14 +439,17 @@ class Runner():
                 return False
 
         if threading.current_thread() == self.runnerThread:
-            self.RunHandlerInternal(uiModel, handlerName, handlerStr, mouse_pos, key_name, arg)
+            self.RunHandlerInternal(uiModel, handlerName, mouse_pos, key_name, arg)
         else:
             if handlerName == "on_periodic":
                 self.numOnPeriodicsQueued += 1
-            self.handlerQueue.put((TaskType.Handler, uiModel, handlerName, handlerStr, mouse_pos, key_name, arg))
+            if not self.handlerQueue.put((TaskType.Handler, uiModel, handlerName, mouse_pos, key_name, arg)):
+                # Coalesced into an equivalent task that's already queued
+                if handlerName == "on_periodic":
+                    self.numOnPeriodicsQueued -= 1
         return True
 
-    def RunHandlerInternal(self, uiModel, handlerName, handlerStr, mouse_pos, key_name, arg):
+    def RunHandlerInternal(self, uiModel, handlerName, mouse_pos, key_name, arg):
         """ Run an eventHandler.  This always runs on the runnerThread. """
         if not self.didSetup:
             return
@@ -397,117 +459,56 @@ class Runner():
 
         self.runnerDepth += 1
 
-        noValue = ("no", "value")  # Use this if this var didn't exist/had no value (not even None)
-
-        # Keep this method re-entrant, by storing old values (or lack thereof) of anything we set here,
-        # (like self, key, etc.) and replacing or deleting them at the end of the run.
-        oldVars = {}
+        # Event arguments are set in clientVars while the handler runs, and are also passed into the compiled handler
+        # function as parameters, for fast access from the handler's own top level code.
+        eventArgs = {"self": uiModel.GetProxy()}
 
-        if "self" in self.clientVars:
-            oldVars["self"] = self.clientVars["self"]
-        else:
-            oldVars["self"] = noValue
-        self.clientVars["self"] = uiModel.GetProxy()
-
-        if arg and handlerName == "on_message":
-            if "message" in self.clientVars:
-                oldVars["message"] = self.clientVars["message"]
-            else:
-                oldVars["message"] = noValue
-            self.clientVars["message"] = arg
+        if handlerName in ("on_message", "on_card_stock_link"):
+            eventArgs["message"] = arg
 
-        if arg and handlerName == "on_done_loading":
-            if "URL" in self.clientVars:
-                oldVars["URL"] = self.clientVars["URL"]
-            else:
-                oldVars["URL"] = noValue
-            self.clientVars["URL"] = arg[0]
-            if "did_load" in self.clientVars:
-                oldVars["did_load"] = self.clientVars["did_load"]
-            else:
-                oldVars["did_load"] = noValue
-            self.clientVars["did_load"] = arg[1]
+        elif handlerName == "on_done_loading":
+            eventArgs["URL"], eventArgs["did_load"] = arg if arg else (None, None)
 
-        if handlerName == "on_card_stock_link":
-            if "message" in self.clientVars:
-                oldVars["message"] = self.clientVars["message"]
-            else:
-                oldVars["message"] = noValue
-            self.clientVars["message"] = arg
+        elif handlerName == "on_selection_changed":
+            eventArgs["is_selected"] = arg
 
-        if handlerName == "on_selection_changed":
-            if "is_selected" in self.clientVars:
-                oldVars["is_selected"] = self.clientVars["is_selected"]
-            else:
-                oldVars["is_selected"] = noValue
-            self.clientVars["is_selected"] = arg
+        elif handlerName == "on_resize":
+            eventArgs["is_initial"] = arg
 
-        if handlerName == "on_resize":
-            if "is_initial" in self.clientVars:
-                oldVars["is_initial"] = self.clientVars["is_initial"]
-            else:
-                oldVars["is_initial"] = noValue
-            self.clientVars["is_initial"] = arg
-
-        if handlerName == "on_periodic":
-            if "elapsed_time" in self.clientVars:
-                oldVars["elapsed_time"] = self.clientVars["elapsed_time"]
-            else:
-                oldVars["elapsed_time"] = noValue
+        elif handlerName == "on_periodic":
             now = time()
             if uiModel.lastOnPeriodicTime:
                 elapsed_time = now - uiModel.lastOnPeriodicTime
             else:
                 elapsed_time = now - self.stackStartTime
             uiModel.lastOnPeriodicTime = now
-            self.clientVars["elapsed_time"] = elapsed_time
+            eventArgs["elapsed_time"] = elapsed_time
 
-        if mouse_pos and handlerName.startswith("on_mouse"):
-            if "mouse_pos" in self.clientVars:
-                oldVars["mouse_pos"] = self.clientVars["mouse_pos"]
-            else:
-                oldVars["mouse_pos"] = noValue
-            self.clientVars["mouse_pos"] = mouse_pos
+        elif handlerName.startswith("on_mouse"):
+            eventArgs["mouse_pos"] = mouse_pos
 
-        if key_name and handlerName.startswith("on_key"):
-            if "key_name" in self.clientVars:
-                oldVars["key_name"] = self.clientVars["key_name"]
-            else:
-                oldVars["key_name"] = noValue
-            self.clientVars["key_name"] = key_name
-
-        if arg and handlerName == "on_key_hold":
-            if "elapsed_time" in self.clientVars:
-                oldVars["elapsed_time"] = self.clientVars["elapsed_time"]
-            else:
-                oldVars["elapsed_time"] = noValue
-            if key_name in self.keyTimings:
-                now = time()
-                elapsed_time = now - self.keyTimings[key_name]
-                self.keyTimings[key_name] = now
-                self.clientVars["elapsed_time"] = elapsed_time
-            else:
-                # Shouldn't happen!  But just in case, return something that won't crash if the users divides by it
-                self.clientVars["elapsed_time"] = 0.01
+        elif handlerName.startswith("on_key"):
+            eventArgs["key_name"] = key_name
+            if handlerName == "on_key_hold":
+                if key_name in self.keyTimings:
+                    now = time()
+                    eventArgs["elapsed_time"] = now - self.keyTimings[key_name]
+                    self.keyTimings[key_name] = now
+                else:
+                    # Shouldn't happen!  But just in case, return something that won't crash if the users divides by it
+                    eventArgs["elapsed_time"] = 0.01
 
-        if arg and handlerName == "on_bounce":
-            if "other_object" in self.clientVars:
-                oldVars["other_object"] = self.clientVars["other_object"]
-            else:
-                oldVars["other_object"] = noValue
-            self.clientVars["other_object"] = arg[0]
-            if "edge" in self.clientVars:
-                oldVars["edge"] = self.clientVars["edge"]
-            else:
-                oldVars["edge"] = noValue
-            self.clientVars["edge"] = arg[1]
+        elif handlerName == "on_bounce":
+            eventArgs["other_object"], eventArgs["edge"] = arg if arg else (None, None)
 
-        # rewrite handlers that use return outside of a function, and replace with an exception that we catch, to
-        # act like a return.
-        handlerStr = self.RewriteHandler(handlerStr)
+        code, funcNames, isModuleCode, syntaxError = self.CompileHandler(uiModel, handlerName)
 
         self.lastHandlerStack.append((uiModel, handlerName))
 
+        profiler = self.profiler
+        if profiler:
+            profiler.StartHandler(uiModel, handlerName)
+
         error = None
         error_class = None
         line_number = None
@@ -516,23 +517,24 @@ class Runner():
         in_func = []
         detail = None
 
-        # Use this for noticing user-definitions of new functions
-        oldClientVars = self.clientVars.copy()
+        # Keep track of where each user function has been defined, so we can send you to the right handler's code in
+        # the Designer when the user clicks on an error in the ErrorList.
+        for funcName in funcNames:
+            self.funcDefs[funcName] = (uiModel, handlerName)
 
         try:
-            exec(handlerStr, self.clientVars)
-            self.ScrapeNewFuncDefs(oldClientVars, self.clientVars, uiModel, handlerName)
+            if syntaxError:
+                raise syntaxError.with_traceback(None)
+            self.RunCompiledHandler(code, isModuleCode, eventArgs)
         except SyntaxError as err:
-            self.ScrapeNewFuncDefs(oldClientVars, self.clientVars, uiModel, handlerName)
             detail = err.msg
             error_class = err.__class__.__name__
             line_number = err.lineno
             errModel = uiModel
             errHandlerName = handlerName
         except Exception as err:
-            self.ScrapeNewFuncDefs(oldClientVars, self.clientVars, uiModel, handlerName)
-            if err.__class__.__name__ == "RuntimeError" and err.args[0] == "Return":
-                # Catch our exception-based return calls
+            if err.__class__.__name__ == "RuntimeError" and err.args and err.args[0] == "Return":
+                # Catch the exception-based returns from run_stack() and return_from_stack()
                 pass
             else:
                 error_class = err.__class__.__name__
@@ -556,13 +558,8 @@ class Runner():
 
         del self.lastHandlerStack[-1]
 
-        # restore the old values from before this handler was called
-        for k, v in oldVars.items():
-            if v == noValue:
-                if k in self.clientVars:
-                    self.clientVars.pop(k)
-            else:
-                self.clientVars[k] = v
+        if profiler:
+            profiler.FinishHandler()
 
         if error_class and self.errors is not None:
             msg = f"{error_class} in {self.HandlerPath(errModel, errHandlerName)}, line {line_number}: {detail}"
@@ -586,45 +583,126 @@ class Runner():
         if self.shouldUpdateVars:
             self.stackManager.UpdateVars()
 
-    def RewriteHandler(self, handlerStr):
-        # rewrite handlers that use return outside of a function, and replace with an exception that we catch, to
-        # act like a return.
-        if "return" in handlerStr:
-            if handlerStr in self.rewrittenHandlerMap:
-                # we cache the rewritten handlers
-                return self.rewrittenHandlerMap[handlerStr]
+    def CompileHandler(self, uiModel, handlerName):
+        """
+        Return (code, funcNames, isModuleCode, syntaxError) for this handler, compiling it only the first time it runs.
+        The result is cached on the model, and ViewModel.SetHandler() drops it whenever that handler's code changes.
+        """
+        compiled = uiModel.compiledHandlers.get(handlerName)
+        if compiled is None:
+            try:
+                compiled = (*self.CompileHandlerCode(uiModel.handlers[handlerName].strip(),
+                                                     self.handlerArgNames.get(handlerName, ())), None)
+            except SyntaxError as err:
+                compiled = (None, (), False, err)
+            uiModel.compiledHandlers[handlerName] = compiled
+        return compiled
+
+    # The event arguments that each handler receives, in addition to self
+    handlerArgNames = {
+        "on_mouse_press": ("mouse_pos",),
+        "on_mouse_move": ("mouse_pos",),
+        "on_mouse_release": ("mouse_pos",),
+        "on_mouse_enter": ("mouse_pos",),
+        "on_mouse_exit": ("mouse_pos",),
+        "on_key_press": ("key_name",),
+        "on_key_hold": ("key_name", "elapsed_time"),
+        "on_key_release": ("key_name",),
+        "on_message": ("message",),
+        "on_card_stock_link": ("message",),
+        "on_done_loading": ("URL", "did_load"),
+        "on_bounce": ("other_object", "edge"),
+        "on_selection_changed": ("is_selected",),
+        "on_resize": ("is_initial",),
+        "on_periodic": ("elapsed_time",),
+    }
+
+    @staticmethod
+    def CompileHandlerCode(handlerStr, argNames=()):
+        """
+        Compile handler code into the body of a function, so return works natively outside of any user function defs.
+        The function takes self and the given event argument names as parameters, for fast access from the handler's
+        own top level code.  Any of those that are used inside a function, lambda, or class defined in the handler are
+        left as globals instead, so those keep reading whichever values are set in clientVars when they get called.
+        Every other name the handler binds at its top level is declared global, so variables and functions are still
+        shared between handlers through clientVars, exactly as if the code had been exec'd as a module.  The
+        function's code object is named <module>, to keep tracebacks looking the same as they did for exec'd code.
+        Code that can only run at module level, like "from x import *", or a top level "global" statement naming one
+        of the event arguments, gets compiled as a module instead, to be exec'd like handlers were before.
+        Returns the code object, the names of all functions defined in the handler, and whether it's module code.
+        """
+        root = ast.parse(handlerStr, "<string>")
+        funcNames = tuple(set(node.name for node in Runner.TopLevelNodes(root)
+                              if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))))
+        nestedNames = set()
+        for node in Runner.TopLevelNodes(root):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                nestedNames.update(n.id for n in ast.walk(node) if isinstance(n, ast.Name))
+        params = tuple(name for name in ("self",) + tuple(argNames) if name not in nestedNames)
+        if Runner.NeedsModuleLevel(root, params):
+            return compile(root, "<string>", "exec"), funcNames, True
+
+        table = symtable.symtable(handlerStr, "<string>", "exec")
+        globalNames = [s.get_name() for s in table.get_symbols()
+                       if (s.is_assigned() or s.is_imported() or s.is_declared_global()) and s.get_name() not in params]
+
+        funcDef = ast.parse(f"def f({', '.join(params)}): pass").body[0]
+        funcDef.name = "<module>"
+        funcDef.body = root.body if root.body else [ast.Pass()]
+        if globalNames:
+            funcDef.body.insert(0, ast.Global(names=globalNames))
+        root.body = [funcDef]
+        ast.fix_missing_locations(root)
+
+        moduleCode = compile(root, "<string>", "exec")
+        for c in moduleCode.co_consts:
+            if isinstance(c, types.CodeType):
+                if c.co_flags & (inspect.CO_GENERATOR | inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR):
+                    raise SyntaxError("'yield' outside function", ("<string>", 1, 0, ""))
+                return c, funcNames, False
+        return None, funcNames, False
+
+    @staticmethod
+    def NeedsModuleLevel(root, params):
+        # True if this handler's code would become a SyntaxError when compiled into the body of a function
+        for node in ast.walk(root):
+            if isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+                return True
+        # Only global statements in the handler's own top level scope can conflict with the function's parameters
+        for node in Runner.TopLevelNodes(root):
+            if isinstance(node, ast.Global):
+                if any(name in params for name in node.names):
+                    return True
+        return False
+
+    @staticmethod
+    def TopLevelNodes(root):
+        # Yield the nodes in the handler's own top level scope, including each function or class def, but not the
+        # nodes inside of them
+        nodes = list(reversed(root.body))
+        while nodes:
+            node = nodes.pop()
+            yield node
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                nodes.extend(reversed(list(ast.iter_child_nodes(node))))
+
+    def RunCompiledHandler(self, code, isModuleCode, eventArgs):
+        # Run compiled handler code, with its event arguments set in clientVars only while it runs, so user functions
+        # called from it see this event's self and arguments.  Old values are restored after, for nested handler calls.
+        clientVars = self.clientVars
+        oldVars = {k: clientVars[k] for k in eventArgs if k in clientVars}
+        clientVars.update(eventArgs)
+        try:
+            if isModuleCode:
+                exec(code, clientVars)
             else:
-                lines = handlerStr.split('\n')
-                funcIndent = None
-                updatedLines = []
-                for line in lines:
-                    if funcIndent is not None:
-                        # if we were inside a function definition, check if it's done
-                        m = re.match(rf"^(\s{{{funcIndent}}})\b", line)
-                        if m:
-                            funcIndent = None
-                    if funcIndent is None:
-                        m = re.match(r"^(\s*)def ", line)
-                        if m:
-                            # mark that we're inside a function def now, so don't replace returns.
-                            funcIndent = len(m.group(1))
-                            updatedLines.append(line)
-                        else:
-                            # not inside a function def, so replace returns with a RuntimeError('Return')
-                            # and catch these later, while running the handler
-                            u = re.sub(r"^(\s*)return\b", r"\1raise RuntimeError('Return')", line)
-                            u = re.sub(r":\s+return\b", ": raise RuntimeError('Return')", u)
-                            updatedLines.append(u)
-                    else:
-                        # now we're inside a function def, so don't replace returns.  they're valid here!
-                        updatedLines.append(line)
-
-                updated = '\n'.join(updatedLines)
-                self.rewrittenHandlerMap[handlerStr] = updated  # cache the updated handler
-                return updated
-        else:
-            # No return used, so keep the handler as-is
-            return handlerStr
+                types.FunctionType(code, clientVars)(**{k: eventArgs[k] for k in code.co_varnames[:code.co_argcount]})
+        finally:
+            for k in eventArgs:
+                if k in oldVars:
+                    clientVars[k] = oldVars[k]
+                else:
+                    clientVars.pop(k, None)
 
     def RunCodeWithExceptionHandling(self, code):
         self.RunWithExceptionHandling(code, None)
@@ -716,13 +794,6 @@ class Runner():
         if self.shouldUpdateVars:
             self.stackManager.UpdateVars()
 
-    def ScrapeNewFuncDefs(self, oldVars, newVars, model, handlerName):
-        # Keep track of where each user function has been defined, so we can send you to the right handler's code in
-        # the Designer when the user clicks on an error in the ErrorList.
-        for (k, v) in newVars.items():
-            if isinstance(v, types.FunctionType) and (k not in oldVars or oldVars[k] != v):
-                self.funcDefs[k] = (model, handlerName)
-
     def HandlerPath(self, model, handlerName, card=None):
         if model.type == "card":
             return f"{model.GetProperty('name')}.{handlerName}()"
@@ -966,6 +1037,45 @@ class Runner():
         if s:
             s.play()
 
+    def PreloadSound(self, filepath):
+        # On Main thread, from the CardPrefetcher.  Queue up a sound to get decoded into soundCache on the soundLoader
+        # thread, before it's played.
+        if self.stopRunnerThread or self.soundCache is None:
+            return
+        filepath = self.stackManager.resPathMan.GetAbsPath(filepath)
+        if filepath in self.soundCache or filepath in self.pendingSounds:
+            return
+        self.pendingSounds.add(filepath)
+        self.soundQueue.put(filepath)
+        if not self.soundLoader:
+            self.soundLoader = threading.Thread(target=self.RunSoundLoader, args=(self.soundQueue,),
+                                                name="SoundLoader", daemon=True)
+            self.soundLoader.start()
+
+    def RunSoundLoader(self, soundQueue):
+        # On the soundLoader thread
+        while True:
+            filepath = soundQueue.get()
+            if filepath is None:
+                return
+            s = None
+            if os.path.exists(filepath):
+                try:
+                    s = simpleaudio.WaveObject.from_wave_file(filepath)
+                except Exception:
+                    s = None
+            soundCache = self.soundCache
+            if s and soundCache is not None and filepath not in soundCache:
+                soundCache[filepath] = s
+            self.pendingSounds.discard(filepath)
+
+    def GetSoundCacheBytes(self):
+        # The number of bytes of decoded audio held in soundCache
+        soundCache = self.soundCache
+        if not soundCache:
+            return 0
+        return sum(len(s.audio_data) for s in list(soundCache.values()))
+
     def stop_sound(self):
         simpleaudio.stop_all()
 
@@ -1041,25 +1151,7 @@ class Runner():
         except ValueError:
             raise TypeError("run_after_delay(): duration must be a number")
 
-        startTime = time()
-
-        @RunOnMainAsync
-        def f():
-            if self.stopRunnerThread or self.generatingThumbnail: return
-
-            adjustedDuration = duration + startTime - time()
-            if adjustedDuration > 0.010:
-                timer = wx.Timer()
-                def onTimer(event):
-                    if self.stopRunnerThread: return
-                    self.EnqueueFunction(func, *args, **kwargs)
-                timer.Bind(wx.EVT_TIMER, onTimer)
-                timer.StartOnce(int(adjustedDuration*1000))
-                self.timers.append(timer)
-            else:
-                self.EnqueueFunction(func, *args, **kwargs)
-
-        f()
+        return self.timerService.Schedule(duration, func, args, kwargs)
 
     @RunOnMainAsync
     def quit(self):
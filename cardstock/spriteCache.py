@@ -0,0 +1,117 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import wx
+from collections import OrderedDict
+import flippedGCDC
+
+
+def MakeViewBitmap(view, width, height):
+    # Make a transparent bitmap to draw into with the same coordinates as view's paint DC, which on Mac are logical
+    # points, backed by a higher-res bitmap on retina displays.
+    if wx.Platform == '__WXMAC__':
+        bitmap = wx.Bitmap()
+        bitmap.CreateScaled(width, height, 32, view.GetContentScaleFactor())
+    else:
+        bitmap = wx.Bitmap.FromRGBA(width, height)
+    return bitmap
+
+
+class SpriteCache(object):
+    """
+    Caches rasterized objects while running a stack, so an object that is only moving or rotating can be painted by
+    blitting a bitmap, instead of re-stroking its paths or re-laying-out its text.  Sprites are keyed by everything
+    that affects an object's appearance (from UiView.GetSpriteKey()) and the DPI scale, so identical objects, like
+    clones, share one sprite.
+    An object only gets a sprite once it paints with the same key twice in a row, so objects whose appearance changes
+    every frame keep painting directly.  The least recently used sprites are dropped to stay under MAX_BYTES.
+    """
+
+    MAX_BYTES = 48 * 1024 * 1024
+    MAX_SPRITE_BYTES = 4 * 1024 * 1024  # Paint anything bigger than this directly
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.sprites = OrderedDict()  # key -> (bitmap, pad, width, height, numBytes)
+        self.numBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def Clear(self):
+        self.sprites = OrderedDict()
+        self.numBytes = 0
+
+    def Paint(self, ui, gc, key):
+        # On Main thread, with gc already transformed into ui's local coords by PrePaint().  Returns False if ui should
+        # paint itself normally.
+        view = self.stackManager.view
+        scale = view.FromDIP(1000)/1000.0
+        key = (key, scale)
+
+        sprite = self.sprites.get(key)
+        if sprite:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            if ui.lastSpriteKey != key:
+                # Still changing, so don't make a sprite yet
+                ui.lastSpriteKey = key
+                return False
+            sprite = self.Render(ui, scale)
+            if not sprite:
+                return False
+            self.Add(key, sprite)
+
+        (bitmap, pad, width, height, numBytes) = sprite
+        h = ui.model.properties["size"][1] * scale
+        gc.cachedGC.DrawBitmap(bitmap, -pad, view.GetSize().Height - h - pad, width, height)
+        return True
+
+    def Render(self, ui, scale):
+        # Paint ui into a new sprite bitmap, in the same coordinates it would use on the view, offset to the sprite's
+        # bottom-left corner, plus padding for pen thickness and antialiasing.
+        view = self.stackManager.view
+        (w, h) = ui.model.properties["size"]
+        pad = int(ui.GetSpritePadding() * scale) + 2
+        width = int(w * scale) + 2*pad
+        height = int(h * scale) + 2*pad
+        numBytes = width * height * 4
+        if wx.Platform == '__WXMAC__':
+            numBytes *= int(view.GetContentScaleFactor() ** 2)
+        if width <= 2*pad or height <= 2*pad or numBytes > self.MAX_SPRITE_BYTES:
+            return None
+
+        bitmap = MakeViewBitmap(view, width, height)
+        dc = wx.MemoryDC(bitmap)
+        gc = flippedGCDC.FlippedGCDC(dc, self.stackManager)
+        gc.cachedGC = gc.GetGraphicsContext()
+        gc.clipRect = None
+        gc.cachedGC.Translate(pad, pad + h * scale - view.GetSize().Height)
+        ui.Paint(gc)
+        del gc.cachedGC
+        del gc
+        dc.SelectObject(wx.NullBitmap)
+        return (bitmap, pad, width, height, numBytes)
+
+    def Add(self, key, sprite):
+        self.sprites[key] = sprite
+        self.numBytes += sprite[4]
+        while self.numBytes > self.MAX_BYTES and len(self.sprites) > 1:
+            (oldKey, oldSprite) = self.sprites.popitem(last=False)
+            self.numBytes -= oldSprite[4]
+            self.evictions += 1
+
+    def GetStats(self):
+        return {"sprites": len(self.sprites),
+                "bytes": self.numBytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
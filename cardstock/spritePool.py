@@ -0,0 +1,144 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import threading
+
+
+class SpritePool(object):
+    """
+    Recycles objects made by clone() once they get deleted, so stacks that keep cloning and deleting sprites, like
+    shots and asteroids, don't keep building and tearing down models and UiViews.  Deleted clones are kept in free
+    lists keyed by their template, the object they were originally cloned from, along with their detached UiViews
+    if those don't use native widgets.  clone() then resets a pooled model from the object being cloned, instead of
+    building a new one.
+    A deleted clone only becomes available again once its view is off the card, and the runner has finished any
+    handler calls that were already queued up for it, so no old handler call can run on its new life.
+    """
+
+    MAX_PER_TEMPLATE = 32
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.lock = threading.Lock()
+        self.free = {}    # template model -> [(model, uiView or None), ...]
+        self.counts = {}  # template model -> number of free and pending entries
+        self.numReused = 0
+        self.numMisses = 0
+        self.numReleased = 0
+        self.numDropped = 0
+
+    def Take(self, model, name=None):
+        # On Runner thread.  Returns (newModel, uiView) for a pooled clone of model's template, reset to be a copy of
+        # model and deduplicated on the current card, or (None, None) if the caller needs to make a new copy.
+        # uiView is None if the caller needs to create a new one.
+        template = model.clonedFrom if model.clonedFrom else model
+        with self.lock:
+            entries = self.free.get(template)
+            if not entries:
+                self.numMisses += 1
+                return (None, None)
+            (newModel, uiView) = entries.pop()
+            self.counts[template] -= 1
+            self.numReused += 1
+
+        newModel.SetBackUp(self.stackManager)
+        newModel.didDelete = False
+        newModel.ResetFromModel(model)
+        newModel.clonedFrom = template
+        if name:
+            newModel.properties["name"] = name
+        self.stackManager.uiCard.model.DeduplicateNamesForModels([newModel])
+        return (newModel, uiView)
+
+    def Release(self, uiView):
+        # On Main thread.  Takes over a deleted clone's uiView, already removed from the card, along with its model,
+        # which is already set down.  Keeps them for reuse if possible, and otherwise sets uiView down.
+        model = uiView.model
+        template = model.clonedFrom
+        sm = self.stackManager
+        keep = template is not None and not template.didSetDown and not sm.isEditing and \
+            model.type not in ("card", "group") and model.didSetDown
+        if keep:
+            with self.lock:
+                count = self.counts.get(template, 0)
+                keep = count < self.MAX_PER_TEMPLATE
+                if keep:
+                    self.counts[template] = count + 1
+                    self.numReleased += 1
+                else:
+                    self.numDropped += 1
+        elif template is not None and template.didSetDown:
+            self.DropTemplate(template)
+        if not keep:
+            uiView.SetDown()
+            return
+
+        # Other objects may still list this one to bounce off of, so don't let its next life inherit that.  Any object
+        # with a bounce list is tracked by the collisionIndex, so only those need checking.
+        for m in sm.collisionIndex.GetTrackedKeys():
+            if model in m.bounceObjs:
+                with m.animLock:
+                    m.bounceObjs.pop(model, None)
+                    m.bounceAlwaysCheck.discard(model)
+
+        if uiView.view:
+            # Native widgets get pooled by the ViewPool, so just keep the model
+            uiView.SetDown()
+            uiView = None
+        else:
+            uiView.Detach()
+            uiView.parent = None
+            # Don't send later mouse events for the old object to the new one
+            if sm.lastMouseMovedUiView is uiView:
+                sm.lastMouseMovedUiView = None
+            if sm.lastMouseDownView is uiView:
+                sm.lastMouseDownView = None
+
+        if sm.runner:
+            # Queue this behind any handler calls for this model that are still waiting to run
+            sm.runner.EnqueueFunction(self.AddFree, template, model, uiView)
+        else:
+            self.AddFree(template, model, uiView)
+
+    def AddFree(self, template, model, uiView):
+        # On Runner thread, or on Main thread when there's no runner
+        with self.lock:
+            if template.didSetDown or template not in self.counts:
+                # The stack or the template went away while this was queued up
+                return
+            self.free.setdefault(template, []).append((model, uiView))
+
+    def DropTemplate(self, template):
+        # On Main thread
+        with self.lock:
+            entries = self.free.pop(template, [])
+            self.counts.pop(template, None)
+        for (model, uiView) in entries:
+            if uiView:
+                uiView.SetDown()
+
+    def Clear(self):
+        # On Main thread
+        with self.lock:
+            free = self.free
+            self.free = {}
+            self.counts = {}
+        for entries in free.values():
+            for (model, uiView) in entries:
+                if uiView:
+                    uiView.SetDown()
+
+    def GetStats(self):
+        with self.lock:
+            return {"templates": len(self.free),
+                    "free": sum(len(v) for v in self.free.values()),
+                    "reused": self.numReused,
+                    "misses": self.numMisses,
+                    "released": self.numReleased,
+                    "dropped": self.numDropped}
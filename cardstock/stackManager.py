@@ -14,6 +14,7 @@ This class is very central to CardStock, and right now, probably contains a bit
 
 
 import wx
+import threading
 from wx.lib.docview import CommandProcessor
 from time import time
 import json
@@ -35,6 +36,16 @@ from uiGroup import UiGroup, GroupModel
 from codeRunnerThread import RunOnMainSync, RunOnMainAsync
 import mediaSearchDialogs
 import flippedGCDC
+import collisionGeometry
+from animationScheduler import AnimationScheduler
+from staticLayerCache import StaticLayerCache
+from spriteCache import SpriteCache
+from textLayoutCache import TextLayoutCache
+from gdiCache import GDICache
+from cardPrefetcher import CardPrefetcher
+from viewPool import ViewPool
+from spritePool import SpritePool
+from propertyChanges import PropertyChangeQueue
 
 # ----------------------------------------------------------------------
 
@@ -43,25 +54,45 @@ class DeferredRefreshWindow(wx.Window):
     This wx.Window subclass allows deferring Refresh() calls.  When this feature is enabled, it flags
     when a Refresh() has been requested, but doesn't call wx.Window.Refresh() until receiving a
     RefreshIfNeeded() call.
+    Refreshes can also be limited to just the damaged areas of the card, given as bounds in card coordinates through
+    RefreshBounds().  These get converted into view rects, and invalidated, in RefreshIfNeeded().
     This class also helps with flipping the vertical coordinate axis of the stack, by using bottom-left corner as the
     origin, and making upwards==positive, on all calls to ScreenToClient(), which is used to wrap all
     event.GetPosition() calls throughout the code.
     """
+
+    MAX_DAMAGED_RECTS = 8  # Past this many separate damaged rects, repaint the box around them, in one pass
+
     def __init__(self, stackManager, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.stackManager = stackManager
         self.needsRefresh = False
         self.deferredRefresh = False
         self.didResize = False
+        self.damagedBounds = []  # Areas to repaint, or None to repaint everything
+        self.damageLock = threading.Lock()
 
     def UseDeferredRefresh(self, deferred):
         self.deferredRefresh = deferred
 
     def Refresh(self, eraseBackground=True, rect=None):
         if not self.deferredRefresh:
-            super().Refresh(eraseBackground)
+            super().Refresh(eraseBackground, rect)
         else:
-            self.needsRefresh = True
+            with self.damageLock:
+                self.damagedBounds = None
+                self.needsRefresh = True
+            self.stackManager.staticLayer.Invalidate()
+
+    def RefreshBounds(self, bounds):
+        # On any thread.  Repaint just the given (left, bottom, right, top) area of the card.
+        if not self.deferredRefresh:
+            self.Refresh()
+        else:
+            with self.damageLock:
+                if self.damagedBounds is not None:
+                    self.damagedBounds.append(bounds)
+                self.needsRefresh = True
 
     def Update(self):
         if not self.deferredRefresh:
@@ -72,11 +103,34 @@ class DeferredRefreshWindow(wx.Window):
         if self.didResize:
             self.stackManager.RepositionViews()
             self.didResize = False
-        if self.needsRefresh:
+        with self.damageLock:
+            needsRefresh = self.needsRefresh
+            damagedBounds = self.damagedBounds
             self.needsRefresh = False
-            super().Refresh(True, None)
+            self.damagedBounds = []
+        if needsRefresh:
+            if damagedBounds is None:
+                super().Refresh(True, None)
+            else:
+                for bounds in damagedBounds:
+                    super().Refresh(False, self.stackManager.BoundsToViewRect(bounds))
             super().Update()
 
+    def GetDamagedRects(self):
+        # On Main thread, while painting.  Returns a list of the rects being repainted, or [None] for the whole view.
+        region = self.GetUpdateRegion()
+        box = region.GetBox()
+        if box.IsEmpty() or box.Contains(wx.Rect(self.GetSize())):
+            return [None]
+        rects = []
+        it = wx.RegionIterator(region)
+        while it.HaveRects():
+            rects.append(it.GetRect())
+            it.Next()
+        if len(rects) > self.MAX_DAMAGED_RECTS:
+            return [box]
+        return rects
+
     def ScreenToClient(self, *args, **kwargs):
         """
         Vertically flip the mouse position / input to the stack view, so the origin is the bottom-left corner.
@@ -106,6 +160,16 @@ class StackManager(object):
         self.resPathMan = resourcePathManager.ResourcePathManager(self)
         self.lastOnPeriodicTime = None
         self.lastMouseDownView = None
+        self.collisionIndex = collisionGeometry.SpatialHash()
+        self.animScheduler = AnimationScheduler(self)
+        self.staticLayer = StaticLayerCache(self)
+        self.spriteCache = SpriteCache(self)
+        self.textLayoutCache = TextLayoutCache(self)
+        self.gdiCache = GDICache()
+        self.prefetcher = CardPrefetcher(self)
+        self.viewPool = ViewPool(self)
+        self.spritePool = SpritePool(self)
+        self.propertyChanges = PropertyChangeQueue(self)
 
         self.analyzer = analyzer.CodeAnalyzer(self)
         self.stackModel = StackModel(self)
@@ -154,11 +218,21 @@ class StackManager(object):
         if self.runner:
             self.runner.CleanupFromRun()
 
+        self.viewPool.Clear()
+        self.spritePool.Clear()
         self.uiCard.SetDown()
         self.uiCard = None
         self.stackModel.SetDown()
         self.stackModel.DismantleChildTree()
         self.stackModel = None
+        self.collisionIndex.Clear()
+        self.animScheduler.Clear()
+        self.staticLayer.Clear()
+        self.spriteCache.Clear()
+        self.textLayoutCache.Clear()
+        self.gdiCache.Clear()
+        self.prefetcher.Clear()
+        self.propertyChanges.Clear()
         self.listeners = None
         self.designer = None
         self.command_processor.ClearCommands()
@@ -209,15 +283,14 @@ class StackManager(object):
             if not self.lastOnPeriodicTime:
                 self.lastOnPeriodicTime = self.runner.stackStartTime
             elapsed_time = now - self.lastOnPeriodicTime
+            if self.runner.runnerThread:
+                self.runner.runnerThread.dispatcher.OnFrame()
+            self.staticLayer.OnFrame()
 
-            # Run animations at 60 Hz / FPS
-            allUi = self.uiCard.GetAllUiViews()
+            # Run animations at 60 Hz / FPS, only for objects that are currently moving or animating
             onFinishedCalls = []
-            if self.uiCard.RunAnimations(onFinishedCalls, elapsed_time):
+            if self.animScheduler.RunFrame(onFinishedCalls, elapsed_time):
                 didRun = True
-            for ui in allUi:
-                if ui.RunAnimations(onFinishedCalls, elapsed_time):
-                    didRun = True
             # Let all animations process, before running their on_finished handlers,
             # which could start new animations.
             for c in onFinishedCalls:
@@ -225,8 +298,9 @@ class StackManager(object):
             self.lastOnPeriodicTime = now
 
             # Check for all collisions
+            self.collisionIndex.ProcessUpdates(lambda m: self.GetCollisionBounds(m, elapsed_time))
             collisions = {}
-            for ui in allUi:
+            for ui in self.animScheduler.GetMovingUiViews():
                 ui.FindCollisions(collisions)
 
             # Perform any bounces
@@ -245,6 +319,20 @@ class StackManager(object):
                     self.UpdateVars()
             else:
                 self.view.RefreshIfNeeded()
+                self.prefetcher.OnIdleFrame()
+
+    def GetCollisionBounds(self, model, elapsed_time):
+        # Bounds for the collision broad phase, grown by about how far this object could move before the next frame,
+        # so that objects get checked a frame before they actually touch.
+        if model.didSetDown:
+            return None
+        bounds = collisionGeometry.PolygonsBounds(model.GetPolygons())
+        if not bounds:
+            pos = model.properties["position"]
+            bounds = (pos[0], pos[1], pos[0], pos[1])
+        speed = model.properties["speed"]
+        margin = max(abs(speed[0]), abs(speed[1])) * max(elapsed_time, 1/60) * 2 + 2
+        return (bounds[0]-margin, bounds[1]-margin, bounds[2]+margin, bounds[3]+margin)
 
     def SetTool(self, tool):
         if self.tool:
@@ -259,7 +347,8 @@ class StackManager(object):
         if self.runner:
             self.runner.ClearPressedKeys()
 
-    def ClearAllViews(self):
+    def ClearAllViews(self, retain=False):
+        # If retain is set, keep the current card's UiViews in the viewPool, in case we come back to this card
         self.SelectUiView(None)
 
         def DelFromMap(ui):
@@ -270,16 +359,30 @@ class StackManager(object):
                     DelFromMap(childUi)
         DelFromMap(self.uiCard)
 
+        if retain and self.uiCard.uiViews:
+            self.viewPool.RetainCard(self.uiCard.model, self.uiCard.uiViews)
+            self.uiCard.uiViews = []
         self.uiCard.RemoveUiViews()
 
     def CreateViews(self, cardModel):
         self.uiCard.SetModel(cardModel)
-        self.AddUiViewsFromModels(cardModel.childModels, canUndo=False)  # Don't allow undoing card loads
+        uiViews = self.viewPool.TakeCard(cardModel) if not self.isEditing else None
+        if uiViews:
+            self.uiCard.uiViews = uiViews
+            for ui in self.uiCard.GetAllUiViews():
+                self.modelToViewMap[ui.model] = ui
+                ui.Reattach()
+                if self.globalCursor and ui.view:
+                    ui.view.SetCursor(wx.Cursor(self.globalCursor))
+        else:
+            self.AddUiViewsFromModels(cardModel.childModels, canUndo=False)  # Don't allow undoing card loads
 
     def SetStackModel(self, model, skipSetDown=False):
         if model == self.stackModel:
             return
         self.ClearAllViews()
+        self.viewPool.ClearCards()
+        self.spritePool.Clear()
         if not skipSetDown:
             self.stackModel.SetDown()
         model.SetStackManager(self)
@@ -303,7 +406,7 @@ class StackManager(object):
             self.cardIndex = index
             if self.designer:
                 self.designer.Freeze()
-            self.ClearAllViews()
+            self.ClearAllViews(retain=not self.isEditing and not reload)
             self.lastFocusedTextField = None
             self.lastMouseMovedUiView = None
             if index is not None:
@@ -319,6 +422,7 @@ class StackManager(object):
                             self.runner.RunHandler(self.uiCard.model, "on_show_card", None)
                         if self.stackModel.GetProperty("can_resize"):
                             self.runner.RunHandler(self.uiCard.model, "on_resize", None, True)
+                        self.prefetcher.OnCardShown(index)
                 self.view.Refresh()
             if self.designer:
                 self.designer.Thaw()
@@ -628,7 +732,7 @@ class StackManager(object):
             if self.globalCursor:
                 if uiView.view:
                     uiView.view.SetCursor(wx.Cursor(self.globalCursor))
-            self.view.Refresh()
+            uiView.RefreshArea()
         return uiView
 
     def AddUiViewsFromModels(self, models, canUndo=True):
@@ -656,6 +760,17 @@ class StackManager(object):
 
         return uiViews
 
+    def AddRecycledUiView(self, uiView):
+        """
+        Puts a UiView from the SpritePool back onto the card, for its model, which clone() has already reset and added
+        to the current card model.
+        """
+        uiView.Recycle(self.uiCard)
+        self.uiCard.uiViews.append(uiView)
+        self.modelToViewMap[uiView.model] = uiView
+        uiView.RefreshArea()
+        return uiView
+
     def AddImageFromPath(self, path):
         im = ImageModel(self)
         im.SetProperty("file", path)
@@ -714,18 +829,17 @@ class StackManager(object):
         return None
 
     def GetUiViewByName(self, name):
-        if self.uiCard.model.properties["name"] == name:
-            return self.uiCard
-        for ui in self.uiCard.GetAllUiViews():
-            if ui.model.properties["name"] == name:
-                return ui
+        model = self.uiCard.model.GetChildModelByName(name)
+        if model:
+            return self.GetUiViewByModel(model)
         return None
 
-    def RemoveUiViewByModel(self, viewModel):
+    def RemoveUiViewByModel(self, viewModel, recycle=False):
         """
         Removes views for the given models, and removes the models from the stack if they're still in the stack tree.
         To split model changes from view changes, just remove the model from the stack before calling this, and then
-        this method will only make changes to the views.
+        this method will only make changes to the views.  If recycle is set, the UiView and model get offered to the
+        SpritePool, for clone() to reuse.
         """
         ui = self.GetUiViewByModel(viewModel)
         if ui:
@@ -739,11 +853,18 @@ class StackManager(object):
                         DelFromMap(childUi)
             DelFromMap(ui)
 
+            paintedBounds = ui.paintedBounds
             self.uiCard.uiViews.remove(ui)
             if ui.model.parent:
                 self.uiCard.model.RemoveChild(ui.model)
-            ui.SetDown()
-            self.view.Refresh()
+            if recycle:
+                self.spritePool.Release(ui)
+            else:
+                ui.SetDown()
+            if paintedBounds and not self.isEditing:
+                self.view.RefreshBounds(paintedBounds)
+            else:
+                self.view.Refresh()
         else:
             if viewModel.parent:
                 viewModel.parent.RemoveChild(viewModel)
@@ -999,7 +1120,21 @@ class StackManager(object):
                 return wx.Rect(wx.Point(bl[0], height - bl[1]), rect.Size)
         return None
 
+    def BoundsToViewRect(self, bounds, margin=3):
+        """
+        Convert (left, bottom, right, top) bounds in card coordinates into a wx.Rect in view pixels, with the origin at
+        the top-left, grown by margin pixels on each side to cover antialiasing.  This flips using the view's height,
+        like ConvPoint(), since the view can be taller than the stack.
+        """
+        scale = self.view.FromDIP(1000)/1000.0
+        height = self.view.GetSize().Height
+        (l, b, r, t) = bounds
+        x = int(l * scale) - margin
+        y = int(height - t * scale) - margin
+        return wx.Rect(x, y, int((r - l) * scale) + 2*margin + 2, int((t - b) * scale) + 2*margin + 2)
+
     def UpdateBuffer(self):
+        self.staticLayer.Invalidate()
         if wx.Platform != '__WXMAC__':
             self.buffer = wx.Bitmap.FromRGBA(self.view.GetSize().Width, self.view.GetSize().Height)
 
@@ -1020,7 +1155,21 @@ class StackManager(object):
         gc = flippedGCDC.FlippedGCDC(dc, self)
         gc.cachedGC = gc.GetGraphicsContext()
 
-        self.uiCard.DoPaint(gc)
+        if self.view.deferredRefresh and not self.isEditing:
+            damagedRects = self.view.GetDamagedRects()
+        else:
+            damagedRects = [None]
+        for rect in damagedRects:
+            # Only paint objects that touch this damaged rect, clipped to it
+            gc.clipRect = rect
+            if rect:
+                gc.SetClippingRegion(rect)
+            if not self.staticLayer.Paint(gc):
+                self.uiCard.DoPaint(gc)
+            if rect:
+                gc.DestroyClippingRegion()
+        gc.clipRect = None
+
         if self.isEditing:
             self.uiCard.DoPaintSelectionBoxes(gc)
             if self.tool:
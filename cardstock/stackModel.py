@@ -12,13 +12,21 @@ from uiCard import CardModel
 import version
 import migrations
 from codeRunnerThread import RunOnMainSync
+from propertyChanges import PropertyBatch
 
 class StackModel(ViewModel):
     """
     This is the model for the stack.  It mostly just contains the cards as its children.
     """
 
+    __slots__ = ()
+
     minSize = wx.Size(200, 200)
+    handlerKeys = ()
+    propertyKeys = []
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "can_save": 'bool',
+                     "can_resize": 'bool'}
 
     def __init__(self, stackManager):
         super().__init__(stackManager)
@@ -30,20 +38,15 @@ class StackModel(ViewModel):
         self.properties["can_save"] = False
         self.properties["can_resize"] = False
 
-        self.propertyTypes["can_save"] = 'bool'
-        self.propertyTypes["can_resize"] = 'bool'
-
-        self.propertyKeys = []
-
-        self.handlers = {}
-
     def AppendCardModel(self, cardModel):
         cardModel.parent = self
         self.childModels.append(cardModel)
+        self.ChildAdded(cardModel)
 
     def InsertCardModel(self, index, cardModel):
         cardModel.parent = self
         self.childModels.insert(index, cardModel)
+        self.ChildAdded(cardModel)
 
     def InsertNewCard(self, name, atIndex):
         card = CardModel(self.stackManager)
@@ -59,21 +62,18 @@ class StackModel(ViewModel):
     def RemoveCardModel(self, cardModel):
         cardModel.parent = None
         self.childModels.remove(cardModel)
+        self.ChildRemoved(cardModel)
 
     def GetCardModel(self, i):
         return self.childModels[i]
 
     def GetModelFromPath(self, path):
+        # Follow a "card.group.object" path, one child name index lookup per part
         parts = path.split('.')
         m = self
         for p in parts:
-            found = False
-            for c in m.childModels:
-                if c.properties['name'] == p:
-                    m = c
-                    found = True
-                    break
-            if not found:
+            m = m.GetChildByName(p) if m.childModels else None
+            if not m:
                 return None
         return m
 
@@ -93,6 +93,7 @@ class StackModel(ViewModel):
 
         super().SetData(stackData)
         self.childModels = []
+        self.InvalidateChildIndex()
         for data in stackData["cards"]:
             m = CardModel(self.stackManager)
             m.parent = self
@@ -128,6 +129,10 @@ class Stack(ViewProxy):
     def get_setup_value(self):
         return self._model.stackManager.runner.GetStackSetupValue()
 
+    def batch_update(self):
+        model = self._model
+        return PropertyBatch(model.stackManager.propertyChanges if not model.didSetDown else None)
+
     def add_card(self, name="card", atNumber=0):
         if not isinstance(name, str):
             raise TypeError("add_card(): name is not a string")
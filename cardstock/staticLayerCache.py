@@ -0,0 +1,137 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import wx
+import flippedGCDC
+from spriteCache import MakeViewBitmap
+
+
+class StaticLayerCache(object):
+    """
+    Caches the static part of the current card in an offscreen bitmap, while running a stack, so each paint only needs
+    to draw the objects that are changing.  The static layer holds the card background, and the card's bottom-most
+    objects, up to the first one that is moving, animating, or has changed within the last STATIC_FRAMES frames.
+    Everything above that gets painted normally on top of the layer, so z-order is always kept.
+    Objects get promoted into the layer once they've stayed unchanged long enough, and a change to any object in the
+    layer demotes it, and drops the layer to be rebuilt at the next paint.
+    """
+
+    STATIC_FRAMES = 30  # Frames an object must stay unchanged to join the static layer
+    MIN_OBJECTS = 2     # Don't bother with a layer that would hold fewer objects than this
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.frame = 0
+        self.bitmap = None
+        self.version = 0           # Bumped on each Invalidate(), so a bitmap built during a change isn't kept
+        self.layerViews = []       # The card's top-level UiViews that are drawn into the bitmap, in z-order
+        self.layerModels = set()
+        self.numRebuilds = 0
+
+    def Invalidate(self):
+        # On any thread
+        self.version += 1
+        self.bitmap = None
+
+    def Clear(self):
+        self.Invalidate()
+        self.layerViews = []
+        self.layerModels = set()
+
+    def OnFrame(self):
+        # On Main thread, once per frame
+        self.frame += 1
+
+    def ObjectChanged(self, ui):
+        # On any thread.  Mark this object, or the top-level group containing it, as changed this frame.
+        uiCard = self.stackManager.uiCard
+        if ui is uiCard:
+            self.Invalidate()
+            return
+        while ui.parent and ui.parent is not uiCard:
+            ui = ui.parent
+        ui.lastChangeFrame = self.frame
+        if ui.model in self.layerModels:
+            self.Invalidate()
+
+    def IsStatic(self, ui):
+        return self.frame - ui.lastChangeFrame >= self.STATIC_FRAMES and \
+            ui.model not in self.stackManager.animScheduler.activeModels
+
+    def GetStaticViews(self):
+        # Returns the bottom-most run of the card's top-level views that are all static
+        uiViews = self.stackManager.uiCard.uiViews
+        count = 0
+        for ui in uiViews:
+            if not self.IsStatic(ui):
+                break
+            count += 1
+        return uiViews[:count]
+
+    def Paint(self, gc):
+        # On Main thread, from StackManager.OnPaint().  Paint the card using the static layer, rebuilding it first if
+        # needed.  Returns False if the card should just be painted normally.
+        sm = self.stackManager
+        if sm.isEditing:
+            return False
+
+        staticViews = self.GetStaticViews()
+        if len(staticViews) < self.MIN_OBJECTS:
+            if self.layerViews:
+                self.Clear()
+            return False
+
+        bitmap = self.bitmap
+        if bitmap is None or len(staticViews) != len(self.layerViews) or \
+                any(a is not b for a, b in zip(staticViews, self.layerViews)):
+            bitmap = self.Rebuild(staticViews)
+
+        size = sm.view.GetSize()
+        gc.cachedGC.DrawBitmap(bitmap, 0, 0, size.Width, size.Height)
+
+        uiCard = sm.uiCard
+        uiCard.PrePaint(gc)
+        for ui in uiCard.uiViews[len(self.layerViews):]:
+            ui.DoPaint(gc)
+        uiCard.PostPaint(gc)
+        return True
+
+    def Rebuild(self, staticViews):
+        # Draw the card background and staticViews into a new bitmap the size of the view
+        sm = self.stackManager
+        version = self.version
+        size = sm.view.GetSize()
+        bitmap = MakeViewBitmap(sm.view, size.Width, size.Height)
+
+        dc = wx.MemoryDC(bitmap)
+        gc = flippedGCDC.FlippedGCDC(dc, sm)
+        gc.cachedGC = gc.GetGraphicsContext()
+        gc.clipRect = None
+
+        uiCard = sm.uiCard
+        uiCard.PrePaint(gc)
+        uiCard.Paint(gc)
+        for ui in staticViews:
+            ui.DoPaint(gc)
+        uiCard.PostPaint(gc)
+
+        del gc.cachedGC
+        del gc
+        dc.SelectObject(wx.NullBitmap)
+
+        self.layerViews = list(staticViews)
+        self.layerModels = set(ui.model for ui in staticViews)
+        if self.version == version:
+            self.bitmap = bitmap
+        self.numRebuilds += 1
+        return bitmap
+
+    def GetStats(self):
+        return {"layer_objects": len(self.layerViews),
+                "rebuilds": self.numRebuilds}
@@ -0,0 +1,114 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections import OrderedDict
+
+
+def WrapLines(text, width, dc):
+    """
+    Breaks text into lines that fit within width, on the given `wx.DC` using its current font settings.
+    Returns a list of (line, lineWidth) tuples, where lineWidth is the width of the line without trailing spaces.
+    """
+
+    wrapped_lines = []
+    for line in text.split('\n'):
+        pte = dc.GetPartialTextExtents(line)
+
+        def AddLine(startIdx, endIdx):
+            text = line[startIdx : endIdx]
+            trimmedEnd = startIdx + len(text.rstrip())
+            lineWidth = 0
+            if trimmedEnd > startIdx:
+                lineWidth = pte[trimmedEnd-1] - (pte[startIdx-1] if startIdx > 0 else 0)
+            wrapped_lines.append((text, lineWidth))
+
+        idx = 0
+        start = 0
+        startIdx = 0
+        spcIdx = -1
+        while idx < len(pte):
+            # remember the last seen space
+            if line[idx] == ' ':
+                spcIdx = idx
+
+            # have we reached the max width?
+            if pte[idx] - start > width:
+                if spcIdx != -1:
+                    idx = min(spcIdx + 1, len(pte) - 1)
+                AddLine(startIdx, idx)
+                start = pte[idx-1]
+                startIdx = idx
+                spcIdx = -1
+
+            idx += 1
+
+        AddLine(startIdx, idx)
+
+    return wrapped_lines
+
+
+class TextLayoutCache(object):
+    """
+    Caches text layouts, shared by all text objects in the stack, so a label that is only moving, rotating, or
+    changing color never needs to re-measure its text.  Layouts are keyed by the text, font, pixel size, wrap width,
+    and DPI scale, and hold the wrapped lines and each line's width.  The fitted font sizes for auto-shrinking labels
+    are cached here too, so each size probed while searching for the best fit only gets measured once.
+    The least recently used entries are dropped once there are more than MAX_LAYOUTS or MAX_FITS of them.
+    """
+
+    MAX_LAYOUTS = 4000
+    MAX_FITS = 1000
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.layouts = OrderedDict()  # (text, fontKey, width, scale) -> [(line, lineWidth), ...]
+        self.fits = OrderedDict()     # fit key -> (font_size, didShrink)
+        self.hits = 0
+        self.misses = 0
+
+    def Clear(self):
+        self.layouts = OrderedDict()
+        self.fits = OrderedDict()
+
+    def GetScale(self):
+        return self.stackManager.view.FromDIP(1000)/1000.0
+
+    def GetLines(self, text, width, dc, fontKey):
+        # On Main thread.  dc must already have the font described by fontKey set on it.
+        key = (text, fontKey, round(width, 2), self.GetScale())
+        lines = self.layouts.get(key)
+        if lines is not None:
+            self.layouts.move_to_end(key)
+            self.hits += 1
+            return lines
+
+        self.misses += 1
+        lines = WrapLines(text, width, dc)
+        self.layouts[key] = lines
+        if len(self.layouts) > self.MAX_LAYOUTS:
+            self.layouts.popitem(last=False)
+        return lines
+
+    def GetFit(self, key):
+        key = (key, self.GetScale())
+        fit = self.fits.get(key)
+        if fit is not None:
+            self.fits.move_to_end(key)
+        return fit
+
+    def SetFit(self, key, fit):
+        self.fits[(key, self.GetScale())] = fit
+        if len(self.fits) > self.MAX_FITS:
+            self.fits.popitem(last=False)
+
+    def GetStats(self):
+        return {"layouts": len(self.layouts),
+                "fits": len(self.fits),
+                "hits": self.hits,
+                "misses": self.misses}
@@ -0,0 +1,157 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import wx
+import heapq
+import threading
+from time import time
+from codeRunnerThread import RunOnMainAsync
+
+
+class Timer(object):
+    """
+    A Timer object is returned from run_after_delay(), and lets stack code cancel the delayed call before it runs.
+    """
+
+    def __init__(self, service, deadline, func, args, kwargs):
+        super().__init__()
+        self._service = service
+        self._deadline = deadline
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._state = "pending"  # pending, fired, or cancelled
+
+    def __repr__(self):
+        return f"<Timer:{self._state}>"
+
+    def __lt__(self, other):
+        return self._deadline < other._deadline
+
+    def cancel(self):
+        """ Stop this timer's function from running.  Returns True if it was still waiting to run. """
+        return self._service.Cancel(self)
+
+    @property
+    def is_pending(self):
+        return self._state == "pending"
+
+
+class TimerService(object):
+    """
+    Runs all of a stack's run_after_delay() calls from a single wx.Timer.  Pending calls are kept in a heap, sorted by
+    deadline, and the timer is always set to go off at the earliest one.  When calls come due, they're sent to the
+    runner's handlerQueue, to run on the runnerThread.
+    Cancelled calls are left in the heap until they reach the top, or until they make up most of the heap.
+    """
+
+    SHORT_DELAY = 0.010  # Calls due sooner than this are queued right away
+
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+        self.heap = []
+        self.lock = threading.Lock()
+        self.numPending = 0
+        self.numCancelled = 0
+        self.timer = None
+        self.timerDeadline = None
+
+    def GetPendingCount(self):
+        return self.numPending
+
+    def Schedule(self, duration, func, args, kwargs):
+        # On Runner thread
+        deadline = time() + duration
+        handle = Timer(self, deadline, func, args, kwargs)
+        if self.runner.stopRunnerThread or self.runner.generatingThumbnail:
+            handle._state = "cancelled"
+            return handle
+        if duration <= self.SHORT_DELAY:
+            handle._state = "fired"
+            self.runner.EnqueueFunction(func, *args, **kwargs)
+            return handle
+        with self.lock:
+            heapq.heappush(self.heap, handle)
+            self.numPending += 1
+            isFirst = self.heap[0] is handle
+        if isFirst:
+            # Only need to reset the wx.Timer if this is now the next call due
+            self.Rearm()
+        return handle
+
+    def Cancel(self, handle):
+        # On Runner or Main thread
+        with self.lock:
+            if handle._state != "pending":
+                return False
+            handle._state = "cancelled"
+            self.numPending -= 1
+            self.numCancelled += 1
+            if self.numCancelled > 64 and self.numCancelled > len(self.heap) / 2:
+                # Mostly cancelled timers, so rebuild the heap without them
+                self.heap = [h for h in self.heap if h._state == "pending"]
+                heapq.heapify(self.heap)
+                self.numCancelled = 0
+        return True
+
+    @RunOnMainAsync
+    def Rearm(self):
+        if self.runner.stopRunnerThread:
+            return
+        with self.lock:
+            while self.heap and self.heap[0]._state != "pending":
+                heapq.heappop(self.heap)
+                self.numCancelled -= 1
+            deadline = self.heap[0]._deadline if self.heap else None
+        if deadline is None:
+            if self.timer:
+                self.timer.Stop()
+            self.timerDeadline = None
+            return
+        if self.timerDeadline is not None and self.timerDeadline <= deadline and self.timer.IsRunning():
+            # Already set to go off by then
+            return
+        if not self.timer:
+            self.timer = wx.Timer()
+            self.timer.Bind(wx.EVT_TIMER, self.OnTimer)
+        self.timerDeadline = deadline
+        self.timer.StartOnce(max(1, int((deadline - time()) * 1000)))
+
+    def OnTimer(self, event):
+        # On Main thread
+        if self.runner.stopRunnerThread:
+            return
+        due = []
+        now = time() + 0.001
+        with self.lock:
+            while self.heap and self.heap[0]._deadline <= now:
+                handle = heapq.heappop(self.heap)
+                if handle._state == "pending":
+                    handle._state = "fired"
+                    self.numPending -= 1
+                    due.append(handle)
+                else:
+                    self.numCancelled -= 1
+        self.timerDeadline = None
+        for handle in due:
+            self.runner.EnqueueFunction(handle._func, *handle._args, **handle._kwargs)
+        self.Rearm()
+
+    def Stop(self):
+        # On Main thread.  Cancel all pending calls.
+        if self.timer:
+            self.timer.Stop()
+            self.timer = None
+        self.timerDeadline = None
+        with self.lock:
+            for handle in self.heap:
+                handle._state = "cancelled"
+            self.heap = []
+            self.numPending = 0
+            self.numCancelled = 0
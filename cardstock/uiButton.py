@@ -48,10 +48,15 @@ class UiButton(UiView):
     def GetCursor(self):
         return wx.CURSOR_HAND
 
+    def Detach(self):
+        super().Detach()
+        self.mouseDownInside = False
+        self.mouseStillInside = False
+
     def OnPropertyChanged(self, model, key):
         super().OnPropertyChanged(model, key)
         if key == "title":
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
         elif key == "style":
             sm = self.stackManager
             sm.SelectUiView(None)
@@ -61,14 +66,14 @@ class UiButton(UiView):
             if self.view:
                 self.view.SetValue(model.GetProperty("is_selected"))
             else:
-                self.stackManager.view.Refresh()
+                self.RefreshArea()
 
     def OnMouseDown(self, event):
         style = self.model.GetProperty("style")
         if not self.stackManager.isEditing:
             self.mouseDownInside = True
             self.mouseStillInside = True
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
             if style == "Radio":
                 self.model.SetProperty("is_selected", True)
             elif style == "Checkbox":
@@ -78,20 +83,20 @@ class UiButton(UiView):
     def OnMouseEnter(self, event):
         if self.mouseDownInside:
             self.mouseStillInside = True
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
         super().OnMouseEnter(event)
 
     def OnMouseExit(self, event):
         if self.mouseDownInside:
             self.mouseStillInside = False
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
         super().OnMouseExit(event)
 
     def OnMouseUpOutside(self, event):
         if self.mouseDownInside:
             self.mouseDownInside = False
             if self.stackManager:
-                self.stackManager.view.Refresh()
+                self.RefreshArea()
 
     def OnMouseUp(self, event):
         if self.stackManager and not self.stackManager.isEditing:
@@ -99,7 +104,7 @@ class UiButton(UiView):
                 if not self.stackManager.isEditing and self.stackManager.runner and self.model.GetHandler("on_click"):
                     self.stackManager.runner.RunHandler(self.model, "on_click", event)
                 self.mouseDownInside = False
-                self.stackManager.view.Refresh()
+                self.RefreshArea()
         super().OnMouseUp(event)
 
     def Paint(self, gc):
@@ -112,17 +117,18 @@ class UiButton(UiView):
             (width, height) = self.model.GetProperty("size")
 
             # Draw shadow round rect
-            gc.SetPen(wx.Pen('#00000044', fd(1)))
-            gc.SetBrush(wx.Brush('#00000044'))
+            gdi = self.stackManager.gdiCache
+            gc.SetPen(gdi.GetPen('#00000044', fd(1)))
+            gc.SetBrush(gdi.GetBrush('#00000044'))
             gc.DrawRoundedRectangle(wx.Rect(1, 0, width-1, height-1), 5)
             # Draw foreground round rect
-            gc.SetPen(wx.Pen('#444444', fd(1)))
-            gc.SetBrush(wx.Brush('#CCCCCC' if hilighted else 'white'))
+            gc.SetPen(gdi.GetPen('#444444', fd(1)))
+            gc.SetBrush(gdi.GetBrush('#CCCCCC' if hilighted else 'white'))
             gc.DrawRoundedRectangle(wx.Rect(0, 1, width-1, height-1), 5)
 
             title = self.model.GetProperty("title")
             if len(title):
-                font = wx.Font(wx.FontInfo(wx.Size(0, fd(fd(16)))).Family(wx.FONTFAMILY_DEFAULT))
+                font = self.stackManager.gdiCache.GetFont(fd(fd(16)))
                 lineHeight = td(font.GetPixelSize().height)
                 (startX, startY) = (0, (height+lineHeight)/2 + (1 if fd(100) == 100 else fd(-3)))
 
@@ -130,7 +136,7 @@ class UiButton(UiView):
                 line = lines.split("\n")[0]
 
                 gc.SetFont(font)
-                gc.SetTextForeground(wx.Colour('black'))
+                gc.SetTextForeground(self.stackManager.gdiCache.GetColour('black'))
                 textWidth = gc.GetTextExtent(line).Width
                 xPos = (startX + (width - td(textWidth)) / 2)
                 gc.DrawText(line, wx.Point(int(xPos), int(startY)))
@@ -139,7 +145,7 @@ class UiButton(UiView):
             title = self.model.GetProperty("title")
             if len(title):
                 (width, height) = self.model.GetProperty("size")
-                font = wx.Font(wx.FontInfo(wx.Size(0, fd(fd(16)))).Family(wx.FONTFAMILY_DEFAULT))
+                font = self.stackManager.gdiCache.GetFont(fd(fd(16)))
                 lineHeight = td(font.GetPixelSize().height)
                 (startX, startY) = (0, (height+lineHeight)/2 + (1 if fd(100) == 100 else fd(-3)))
 
@@ -147,7 +153,7 @@ class UiButton(UiView):
                 line = lines.split("\n")[0]
 
                 gc.SetFont(font)
-                gc.SetTextForeground(wx.Colour('#888888' if hilighted else 'black'))
+                gc.SetTextForeground(self.stackManager.gdiCache.GetColour('#888888' if hilighted else 'black'))
                 textWidth = gc.GetTextExtent(line).Width
                 xPos = (startX + (width - td(textWidth)) / 2)
                 gc.DrawText(line, wx.Point(int(xPos), int(startY)))
@@ -164,12 +170,12 @@ class UiButton(UiView):
 
             title = self.model.GetProperty("title")
             if len(title):
-                font = wx.Font(wx.FontInfo(wx.Size(0, fd(fd(16)))).Family(wx.FONTFAMILY_DEFAULT))
+                font = self.stackManager.gdiCache.GetFont(fd(fd(16)))
                 lineHeight = td(font.GetPixelSize().height)
                 startY = int((height + lineHeight) / 2) + (1 if fd(100) == 100 else fd(-3))
                 startPos = (25, startY)
                 gc.SetFont(font)
-                gc.SetTextForeground(wx.Colour('black'))
+                gc.SetTextForeground(self.stackManager.gdiCache.GetColour('black'))
                 lines = wordwrap(title, fd(width-25), gc)
                 line = lines.split("\n")[0]
                 gc.DrawText(line, startPos)
@@ -182,20 +188,26 @@ class ButtonModel(ViewModel):
     This is the model for a Button object.
     """
 
+    __slots__ = ()
+
     minSize = wx.Size(34,20)
 
+    # Add custom handlers to the top of the list
+    handlerKeys = ("on_setup", "on_click", "on_selection_changed") + ViewModel.handlerKeys[1:]
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "title": "string",
+                     "style": "choice",
+                     "is_selected": "bool",
+                     "rotation": "float"}
+
+    # Custom property order and mask for the inspector
+    clickPropertyKeys = ["name", "title", "style", "rotation", "position", "size"]
+    selectPropertyKeys = ["name", "title", "style", "is_selected", "rotation", "position", "size"]
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.type = "button"
         self.proxyClass = Button
-
-        # Add custom handlers to the top of the list
-        handlers = {"on_setup": "",
-                    "on_click": "",
-                    "on_selection_changed": ""}
-        for k,v in self.handlers.items():
-            handlers[k] = v
-        self.handlers = handlers
         self.initialEditHandler = "on_click"
 
         self.properties["name"] = "button_1"
@@ -204,11 +216,6 @@ class ButtonModel(ViewModel):
         self.properties["is_selected"] = False
         self.properties["rotation"] = 0.0
 
-        self.propertyTypes["title"] = "string"
-        self.propertyTypes["style"] = "choice"
-        self.propertyTypes["is_selected"] = "bool"
-        self.propertyTypes["rotation"] = "float"
-
         self.UpdatePropKeys(self.properties["style"])
 
     def SetProperty(self, key, value, notify=True):
@@ -225,17 +232,25 @@ class ButtonModel(ViewModel):
                         self.stackManager.runner.RunHandler(self, "on_selection_changed", None, value)
         super().SetProperty(key, value, notify)
 
+    def ResetFromModel(self, model):
+        super().ResetFromModel(model)
+        self.UpdatePropKeys(self.properties["style"])
+
+    @property
+    def propertyKeys(self):
+        if self.properties["style"] in ("Border", "Borderless"):
+            return self.clickPropertyKeys
+        return self.selectPropertyKeys
+
     def UpdatePropKeys(self, style):
-        # Custom property order and mask for the inspector
+        # Show the handler that matters for this style
         if style in ("Border", "Borderless"):
-            self.propertyKeys = ["name", "title", "style", "rotation", "position", "size"]
             self.initialEditHandler = "on_click"
             if "on_click" not in self.visibleHandlers:
                 self.visibleHandlers.add("on_click")
             if "on_selection_changed" in self.visibleHandlers and len(self.handlers["on_selection_changed"]) == 0:
                 self.visibleHandlers.remove("on_selection_changed")
         else:
-            self.propertyKeys = ["name", "title", "style", "is_selected", "rotation", "position", "size"]
             self.initialEditHandler = "on_selection_changed"
             if "on_selection_changed" not in self.visibleHandlers:
                 self.visibleHandlers.add("on_selection_changed")
@@ -70,10 +70,11 @@ class UiCard(UiView):
         event.Skip()
 
     def Paint(self, gc):
-        bg = wx.Colour(self.model.GetProperty("fill_color"))
-        if not bg:
-            bg = wx.Colour('white')
-        gc.SetBrush(wx.Brush(bg, wx.BRUSHSTYLE_SOLID))
+        gdi = self.stackManager.gdiCache
+        bg = self.model.GetProperty("fill_color")
+        if not gdi.GetColour(bg).IsOk():
+            bg = 'white'
+        gc.SetBrush(gdi.GetBrush(bg, wx.BRUSHSTYLE_SOLID))
         gc.SetPen(wx.TRANSPARENT_PEN)
         gc.DrawRectangle(self.model.GetFrame().Inflate(1))
 
@@ -81,12 +82,13 @@ class UiCard(UiView):
         if self.isSelected and self.stackManager.tool.name == "hand":
             f = self.model.GetAbsoluteFrame()
             f.Top += 1
-            gc.SetPen(wx.Pen('Blue', self.stackManager.view.FromDIP(3), wx.PENSTYLE_SHORT_DASH))
+            gdi = self.stackManager.gdiCache
+            gc.SetPen(gdi.GetPen('Blue', self.stackManager.view.FromDIP(3), wx.PENSTYLE_SHORT_DASH))
             gc.SetBrush(wx.TRANSPARENT_BRUSH)
             gc.DrawRectangle(f.Deflate(self.stackManager.view.FromDIP(1)))
 
             gc.SetPen(wx.TRANSPARENT_PEN)
-            gc.SetBrush(wx.Brush('blue', wx.BRUSHSTYLE_SOLID))
+            gc.SetBrush(gdi.GetBrush('blue', wx.BRUSHSTYLE_SOLID))
             for box in self.GetLocalResizeBoxRects().values():
                 r = wx.Rect(box.TopLeft + f.TopLeft, box.Size)
                 gc.DrawRectangle(r)
@@ -106,7 +108,6 @@ class UiCard(UiView):
             self.view.Refresh()
         elif key == "size":
             for ui in self.uiViews:
-                ui.ClearHitRegion()
                 ui.OnPropertyChanged(ui.model, "position")
 
     def OnKeyDown(self, event):
@@ -137,29 +138,29 @@ class CardModel(ViewModel):
     allows editing cards, but not the stack model itself.  These properties are size, can_save, and can_resize.
     """
 
+    __slots__ = ()
+
+    reservedNameSet = frozenset(ViewModel.reservedNames)
+
+    # Add custom handlers to the top of the list, and cards don't bounce
+    handlerKeys = ("on_setup", "on_show_card", "on_key_press", "on_key_hold", "on_key_release") + \
+                  tuple(k for k in ViewModel.handlerKeys[1:] if k != "on_bounce") + \
+                  ("on_resize", "on_hide_card", "on_exit_stack")
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "fill_color", "size", "can_save", "can_resize"]
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "fill_color": "color",
+                     "can_save": 'bool',
+                     "can_resize": 'bool'}
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.type = "card"
         self.proxyClass = Card
-        # Add custom handlers to the top of the list
-        handlers = {"on_setup": "", "on_show_card": "", "on_key_press": "", "on_key_hold": "", "on_key_release": ""}
-        del self.handlers["on_bounce"]
-        for k,v in self.handlers.items():
-            handlers[k] = v
-        self.handlers = handlers
-        self.handlers["on_resize"] = ""
-        self.handlers["on_hide_card"] = ""
-        self.handlers["on_exit_stack"] = ""
         self.initialEditHandler = "on_setup"
 
-        # Custom property order and mask for the inspector
         self.properties["name"] = "card_1"
         self.properties["fill_color"] = "white"
-        self.propertyKeys = ["name", "fill_color", "size", "can_save", "can_resize"]
-
-        self.propertyTypes["fill_color"] = "color"
-        self.propertyTypes["can_save"] = 'bool'
-        self.propertyTypes["can_resize"] = 'bool'
 
     def SetProperty(self, key, value, notify=True):
         if key in ["size", "can_save", "can_resize"]:
@@ -203,23 +204,38 @@ class CardModel(ViewModel):
             m = generator.StackGenerator.ModelFromData(self.stackManager, childData)
             m.parent = self
             self.childModels.append(m)
+            self.ChildAdded(m)
 
     def AddChild(self, model):
         self.InsertChild(model, len(self.childModels))
 
     def InsertChild(self, model, index):
         self.childModels.insert(index, model)
+        self.ChildAdded(model)
         model.parent = self
         self.isDirty = True
-        if not self.stackManager.isEditing and self.stackManager.runner and self.stackManager.uiCard.model == self:
-            self.stackManager.runner.SetupForCard(self)
+        runner = self.GetRunnerIfShown()
+        if runner:
+            runner.UpdateCardVars(added=[model] + (model.GetAllChildModels() if model.type == "group" else []))
 
     def RemoveChild(self, model):
         self.childModels.remove(model)
+        self.ChildRemoved(model)
+        runner = self.GetRunnerIfShown()
+        if runner:
+            models = [model] + (model.GetAllChildModels() if model.type == "group" else [])
+            removed = [(m.GetProperty("name"), m) for m in models]
         model.SetDown()
         self.isDirty = True
-        if not self.stackManager.isEditing and self.stackManager.runner and self.stackManager.uiCard.model == self:
-            self.stackManager.runner.SetupForCard(self)
+        if runner:
+            runner.UpdateCardVars(removed=removed)
+
+    def GetRunnerIfShown(self):
+        # Returns the runner if the stack is running, and this is the current card, so its objects are variables
+        sm = self.stackManager
+        if sm and not sm.isEditing and sm.runner and sm.uiCard.model == self:
+            return sm.runner
+        return None
 
     def AddNewObject(self, typeStr, name, size, points=None, kwargs=None):
         if not isinstance(name, str):
@@ -297,15 +313,32 @@ class CardModel(ViewModel):
         names = self.GetDedupNameList(exclude)
         return super().GetNextAvailableName(name, names)
 
+    def IsNameUsed(self, name, extraNames):
+        # Checks the name indexes, instead of gathering up every name on the card
+        if name in extraNames or name in self.reservedNameSet:
+            return True
+        model = self.GetChildModelByName(name)
+        return model is not None and model is not self
+
     def DeduplicateNamesForModels(self, models):
-        usedNames = []
+        # This runs for every clone() call, so look names up in the card's name indexes, instead of building a list
+        # of every name on the card for each model
+        usedNames = set()
 
         def dedup(obj):
             c = obj.GetCard()
             if not c or c != self:
-                newName = self.DeduplicateNameInCard(obj.GetProperty("name"), None, usedNames)
+                newName = obj.GetProperty("name")
+                if self.IsNameUsed(newName, usedNames):
+                    base = newName.rstrip("0123456789_")
+                    if base[-1] != "_":
+                        base += "_"
+                    i = 1
+                    while self.IsNameUsed(base+str(i), usedNames):
+                        i += 1
+                    newName = base+str(i)
                 obj.SetProperty("name", newName)
-                usedNames.append(newName)
+                usedNames.add(newName)
                 for m in obj.childModels:
                     dedup(m)
 
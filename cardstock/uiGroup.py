@@ -9,6 +9,7 @@
 import wx
 from uiView import *
 import generator
+import collisionGeometry
 from codeRunnerThread import RunOnMainSync
 
 
@@ -36,38 +37,34 @@ class UiGroup(UiView):
         f = self.model.GetAbsoluteFrame()
         f.Inflate(20)
         if f.Contains(pt):
-            if not self.hitRegion:
-                self.MakeHitRegion()
-            if self.hitRegion.Contains(pt):
-                for ui in reversed(self.uiViews):
-                    if ui.model.IsVisible():
-                        hit = ui.HitTest(pt)
-                        if hit:
-                            return hit
+            if self.stackManager.isEditing:
+                # The group's whole rect is a click target while editing
+                if not collisionGeometry.PolygonsContainPoint(self.GetHitPolygons(), pt):
+                    return None
+            for ui in reversed(self.uiViews):
+                if ui.model.IsVisible():
+                    hit = ui.HitTest(pt)
+                    if hit:
+                        return hit
+            if self.stackManager.isEditing:
                 return self
+        # Only the sub-objects are click targets while running
         return None
 
-    def ClearHitRegion(self, noParent=False):
-        super().ClearHitRegion(noParent)
+    def GetPaintBounds(self):
+        # Include anything the children draw outside of their own outlines
+        bounds = super().GetPaintBounds()
         for ui in self.uiViews:
-            ui.ClearHitRegion(noParent=True)
+            bounds = collisionGeometry.UnionBounds(bounds, ui.GetPaintBounds())
+        return bounds
 
-    def MakeHitRegion(self):
-        # Make a region in abs/card coordinates
+    def GetHitPolygons(self):
         if self.stackManager.isEditing:
-            # The group's whole rect is a click target while editing
-            super().MakeHitRegion()
-        else:
-            if not self.model.IsVisible():
-                self.hitRegion = wx.Region((0, 0), (0, 0))
-
-            # Only the sub-objects are click targets while running
-            reg = wx.Region()
-            for ui in self.uiViews:
-                uiReg = wx.Region(ui.GetHitRegion())
-                reg.Union(uiReg)
-            self.hitRegion = reg
-            self.hitRegionOffset = self.model.GetAbsolutePosition()
+            polys = self.model.GetFramePolygons()
+            if self.isSelected and self.stackManager.tool.name == "hand":
+                polys = polys + self.GetHandlePolygons()
+            return polys
+        return super().GetHitPolygons()
 
     def OnPropertyChanged(self, model, key):
         super().OnPropertyChanged(model, key)
@@ -78,7 +75,7 @@ class UiGroup(UiView):
             self.model.ResizeChildModels()
         elif key == "child":
             self.RebuildViews()
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
 
     def RemoveChildViews(self):
         for ui in self.uiViews.copy():
@@ -114,6 +111,13 @@ class GroupModel(ViewModel):
     Model for a Group object.  Mostly forwards messages to all of its children.
     """
 
+    __slots__ = ("origFrame",)
+
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "position", "size", "rotation"]
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "rotation": "float"}
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.type = "group"
@@ -121,10 +125,16 @@ class GroupModel(ViewModel):
         self.proxyClass = Group
         self.properties["name"] = "group_1"
         self.properties["rotation"] = 0.0
-        self.propertyTypes["rotation"] = "float"
 
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "position", "size", "rotation"]
+    def MakePolygons(self):
+        # A group touches whatever its children touch
+        polys = []
+        for child in self.childModels:
+            polys.extend(child.GetPolygons())
+        return polys
+
+    def GetFramePolygons(self):
+        return super().MakePolygons()
 
     def GetAllChildModels(self):
         allModels = []
@@ -154,6 +164,7 @@ class GroupModel(ViewModel):
             model = generator.StackGenerator.ModelFromData(self.stackManager, childData)
             model.parent = self
             self.childModels.append(model)
+            self.ChildAdded(model)
             model.origGroupSubviewFrame = model.GetFrame()
             model.origGroupSubviewRotation = model.GetProperty("rotation")
         self.origFrame = self.GetFrame()
@@ -169,6 +180,7 @@ class GroupModel(ViewModel):
         selfPos = self.GetProperty("position")
         for model in models:
             self.childModels.append(model)
+            self.ChildAdded(model)
             model.parent = self
             pos = model.GetProperty("position")
             model.SetProperty("position", [pos[0]-selfPos[0], pos[1]-selfPos[1]], notify=False)
@@ -177,11 +189,14 @@ class GroupModel(ViewModel):
         for model in models:
             model.origGroupSubviewFrame = model.GetFrame()
             model.origGroupSubviewRotation = model.GetProperty("rotation")
+        self.ClearPolygons()
         self.Notify("child")
         self.isDirty = True
 
     def RemoveChild(self, model):
         self.childModels.remove(model)
+        self.ChildRemoved(model)
+        self.ClearPolygons()
         del model.origGroupSubviewFrame
         del model.origGroupSubviewRotation
         pos = model.GetProperty("position")
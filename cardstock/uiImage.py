@@ -6,32 +6,54 @@
 # This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
 # of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-import os
 import wx
 import generator
+from time import time
 from uiView import *
+from imageCache import ImageCache
 
 
 class UiImage(UiView):
     """
     This class is a controller that coordinates management of an image view, based on data from an ImageModel.
     An image does not use its own wx.Window as a view, but instead draws itself onto the stack view.
+    While an image's size keeps changing, like during animate_size(), it gets scaled quickly from the closest level of
+    a mipmap pyramid, and then rescaled in high quality once its size has been stable for SETTLE_MS.
+    Images get decoded in the background by the shared imgCache, and a placeholder is drawn until they're ready.
     """
 
-    imgCache = {}
+    imgCache = ImageCache()
+
+    SETTLE_MS = 100  # Rescale in high quality once the size has been stable for this long
 
     def __init__(self, parent, stackManager, model):
         super().__init__(parent, stackManager, model, None)
         self.scaledBitmap = None
+        self.isScaledFast = False
+        self.lastSizeChangeTime = 0
+        self.settleTimer = None
+        self.loadingPath = None
         self.origImage = self.GetImg(model)
 
+    def SetDown(self):
+        if self.settleTimer:
+            self.settleTimer.Stop()
+            self.settleTimer = None
+        super().SetDown()
+
+    def Recycle(self, parent):
+        super().Recycle(parent)
+        self.scaledBitmap = None
+        self.origImage = None
+        self.loadingPath = None
+        self.lastSizeChangeTime = 0
+
     @classmethod
     def ClearCache(cls, path=None):
         if path:
-            if path in cls.imgCache:
-                del cls.imgCache[path]
+            cls.imgCache.Remove(path)
         else:
-            cls.imgCache = {}
+            cls.imgCache.Clear()
 
     def AspectStrToInt(self, str):
         if str == "Center":
@@ -44,20 +66,26 @@ class UiImage(UiView):
             return 3 # Default to Scale
 
     def GetImg(self, model):
+        # Returns the decoded image, or None.  If it's still being decoded, OnImageLoaded() gets called once it's ready.
         file = model.GetProperty("file")
         filepath = self.stackManager.resPathMan.GetAbsPath(file)
 
-        if filepath in self.imgCache:
-            img = self.imgCache[filepath]
-        else:
-            if filepath and os.path.exists(filepath):
-                img = wx.Image(filepath, wx.BITMAP_TYPE_ANY)
-                self.imgCache[filepath] = img
-            else:
-                img = None
+        (img, isPending) = self.imgCache.Get(filepath, self.OnImageLoaded)
+        self.loadingPath = filepath if isPending else None
         return img
 
-    def MakeScaledBitmap(self):
+    def OnImageLoaded(self, path):
+        # On Main thread
+        if self.model and path == self.loadingPath:
+            self.origImage = self.GetImg(self.model)
+            self.scaledBitmap = None
+            self.RefreshArea()
+
+    def GetPyramid(self):
+        filepath = self.stackManager.resPathMan.GetAbsPath(self.model.GetProperty("file"))
+        return self.imgCache.GetPyramid(filepath, self.origImage)
+
+    def MakeScaledBitmap(self, fast=False):
         img = self.origImage
         if not img:
             return None
@@ -67,33 +95,39 @@ class UiImage(UiView):
         imgSize = img.GetSize()
         viewSize = self.stackManager.view.FromDIP(self.model.GetProperty("size"))
         fit = self.model.GetProperty("fit")
+        quality = wx.IMAGE_QUALITY_BILINEAR if fast else wx.IMAGE_QUALITY_HIGH
 
-        if xFlipped or yFlipped:
-            if xFlipped:
-                img = img.Mirror(horizontally=True)
-            if yFlipped:
-                img = img.Mirror(horizontally=False)
-
+        scaledSize = None
         if fit == "Stretch":
-            img = img.Scale(self.stackManager.view.FromDIP(viewSize.width), self.stackManager.view.FromDIP(viewSize.height), quality=wx.IMAGE_QUALITY_HIGH)
+            scaledSize = (self.stackManager.view.FromDIP(viewSize.width), self.stackManager.view.FromDIP(viewSize.height))
         elif fit == "Contain":
             scaleX = viewSize.width / imgSize.width
             scaleY = viewSize.height / imgSize.height
             scale = min(scaleX, scaleY)
-            img = img.Scale(max(1, int(imgSize.width * scale)),
-                            max(1, int(imgSize.height * scale)), quality=wx.IMAGE_QUALITY_HIGH)
+            scaledSize = (max(1, int(imgSize.width * scale)), max(1, int(imgSize.height * scale)))
         elif fit == "Fill":
             scaleX = viewSize.width / imgSize.width
             scaleY = viewSize.height / imgSize.height
             scale = max(scaleX, scaleY)
-            img = img.Scale(int(imgSize.width * scale),
-                            int(imgSize.height * scale), quality=wx.IMAGE_QUALITY_HIGH)
-            imgSize = img.GetSize()
+            scaledSize = (int(imgSize.width * scale), int(imgSize.height * scale))
+
+        if scaledSize:
+            if fast:
+                img = self.GetPyramid().GetLevel(*scaledSize)
+            img = img.Scale(*scaledSize, quality=quality)
+            if fit == "Fill":
+                imgSize = img.GetSize()
+
+        # Mirror after scaling, so we flip fewer pixels
+        if xFlipped:
+            img = img.Mirror(horizontally=True)
+        if yFlipped:
+            img = img.Mirror(horizontally=False)
 
         if fit in ["Center", "Fill"]:
             if self.stackManager.view.FromDIP(100) != 100:
                 img = img.Scale(self.stackManager.view.FromDIP(imgSize.width),
-                                self.stackManager.view.FromDIP(imgSize.height), quality=wx.IMAGE_QUALITY_HIGH)
+                                self.stackManager.view.FromDIP(imgSize.height), quality=quality)
                 imgSize = self.stackManager.view.FromDIP(imgSize)
             offX = 0 if imgSize.Width <= viewSize.Width else self.stackManager.view.ToDIP(int((imgSize.Width - viewSize.Width) / 2))
             offY = 0 if imgSize.Height <= viewSize.Height else self.stackManager.view.ToDIP(int((imgSize.Height - viewSize.Height) / 2))
@@ -102,33 +136,53 @@ class UiImage(UiView):
             img = img.GetSubImage(wx.Rect(int(offX), int(offY), w, h))
 
         self.scaledBitmap = img.ConvertToBitmap(32)
+        self.isScaledFast = fast
+
+    def OnSizeSettled(self):
+        # On Main thread, once the size has stopped changing for SETTLE_MS.  Replace a fast scale with a good one.
+        if self.model and self.isScaledFast:
+            self.scaledBitmap = None
+            self.RefreshArea()
 
     def OnPropertyChanged(self, model, key):
         super().OnPropertyChanged(model, key)
 
         if key in ["size", "fit", "file", "xFlipped", "yFlipped"]:
             self.scaledBitmap = None
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
+
+        if key == "size":
+            self.lastSizeChangeTime = time()
 
         if key == "file":
             self.origImage = self.GetImg(self.model)
             self.scaledBitmap = None
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
         elif key == "fit":
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
 
     def ClearCachedData(self):
         self.scaledBitmap = None
         self.origImage = None
-        self.stackManager.view.Refresh()
+        self.RefreshArea()
 
     def Paint(self, gc):
         if self.model.GetProperty("file"):
-            if not self.origImage:
+            if not self.origImage and not self.loadingPath:
                 self.origImage = self.GetImg(self.model)
-            if self.origImage:
+            if self.loadingPath:
+                self.PaintPlaceholder(gc)
+            elif self.origImage:
                 if not self.scaledBitmap:
-                    self.MakeScaledBitmap()
+                    if time() - self.lastSizeChangeTime < self.SETTLE_MS / 1000:
+                        # Size is still changing, so scale quickly now, and well once it settles
+                        self.MakeScaledBitmap(fast=True)
+                        if self.settleTimer:
+                            self.settleTimer.Start(self.SETTLE_MS)
+                        else:
+                            self.settleTimer = wx.CallLater(self.SETTLE_MS, self.OnSizeSettled)
+                    else:
+                        self.MakeScaledBitmap()
 
                 imgSize = self.scaledBitmap.GetSize()
                 viewSize = self.stackManager.view.FromDIP(self.model.GetProperty("size"))
@@ -139,14 +193,30 @@ class UiImage(UiView):
         if self.stackManager.isEditing:
             self.PaintBoundingBox(gc)
 
+    def PaintPlaceholder(self, gc):
+        gc.SetPen(wx.TRANSPARENT_PEN)
+        gc.SetBrush(self.stackManager.gdiCache.GetBrush('#E8E8E8'))
+        gc.DrawRectangle(wx.Rect(wx.Point(0,0), self.model.GetProperty("size")))
+
 
 class ImageModel(ViewModel):
     """
     This is the model for an Image object.
     """
 
+    __slots__ = ()
+
     minSize = wx.Size(2, 2)
 
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "file", "fit", "position", "size", "rotation"]
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "file": "file",
+                     "fit": "choice",
+                     "rotation": "float",
+                     "xFlipped": "bool",
+                     "yFlipped": "bool"}
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.type = "image"
@@ -159,15 +229,6 @@ class ImageModel(ViewModel):
         self.properties["xFlipped"] = False
         self.properties["yFlipped"] = False
 
-        self.propertyTypes["file"] = "file"
-        self.propertyTypes["fit"] = "choice"
-        self.propertyTypes["rotation"] = "float"
-        self.propertyTypes["xFlipped"] = "bool"
-        self.propertyTypes["yFlipped"] = "bool"
-
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "file", "fit", "position", "size", "rotation"]
-
     def PerformFlips(self, fx, fy, notify=True):
         super().PerformFlips(fx, fy, notify)
         if fx:
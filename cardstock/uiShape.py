@@ -8,7 +8,7 @@
 
 import wx
 from uiView import *
-from imageFactory import ImageFactory
+import collisionGeometry
 
 
 class UiShape(UiView):
@@ -21,14 +21,21 @@ class UiShape(UiView):
     def __init__(self, parent, stackManager, model):
         super().__init__(parent, stackManager, model, None)
         self.cachedPaths = {}
+        self.pointsKey = None
+
+    @property
+    def hitSlop(self):
+        # Make lines extra thick for easier clicking
+        return 3 if self.model.type in ["pen", "line", "polygon"] else 0
 
     def SetDown(self):
         self.cachedPaths = None
         super().SetDown()
 
-    def ClearHitRegion(self, noParent=False):
-        super().ClearHitRegion(noParent)
+    def Recycle(self, parent):
+        super().Recycle(parent)
         self.cachedPaths = {}
+        self.pointsKey = None
 
     def MakeShapePath(self, context, inflate=0):
         # Create a path, un-rotated, in this object's local coords (object.position at 0,0)
@@ -62,6 +69,23 @@ class UiShape(UiView):
             path.AddLineToPoint(*points[0])
         return path
 
+    def GetSpriteKey(self):
+        model = self.model
+        with model.animLock:
+            props = model.properties
+            key = (model.type, tuple(props["size"]), props["pen_color"], props.get("fill_color"),
+                   props["pen_thickness"], props.get("corner_radius"))
+        if model.type in ["pen", "line", "polygon"]:
+            # Cache the points tuple until the shape changes, so we don't rebuild it each frame
+            version = model.shapeVersion
+            if not self.pointsKey or self.pointsKey[0] != version:
+                self.pointsKey = (version, tuple((p[0], p[1]) for p in model.GetScaledPoints()))
+            key += self.pointsKey[1]
+        return key
+
+    def GetSpritePadding(self):
+        return self.model.properties["pen_thickness"] / 2 + 1
+
     def FlipPath(self, gc, path):
         flipAff = gc.cachedGC.CreateMatrix()
         scale = self.stackManager.view.FromDIP(1000)/1000.0
@@ -80,21 +104,20 @@ class UiShape(UiView):
                 fill_color = self.model.properties["fill_color"]
             pen_color = self.model.properties["pen_color"]
 
-        pen_color = wx.Colour(pen_color)
-        if not pen_color:
-            pen_color = wx.Colour('black')
+        gdi = self.stackManager.gdiCache
+        if not gdi.GetColour(pen_color).IsOk():
+            pen_color = 'black'
         if thickness == 0:
             pen = wx.TRANSPARENT_PEN
         else:
-            pen = wx.Pen(pen_color, self.stackManager.view.FromDIP(int(thickness)), wx.PENSTYLE_SOLID)
+            pen = gdi.GetPen(pen_color, self.stackManager.view.FromDIP(int(thickness)), wx.PENSTYLE_SOLID,
+                             wx.JOIN_MITER if hasFill else None)
         gc.cachedGC.SetPen(pen)
 
         if hasFill:
-            pen.SetJoin(wx.JOIN_MITER)
-            fill_color = wx.Colour(fill_color)
-            if not fill_color:
-                fill_color = wx.Colour('white')
-            gc.cachedGC.SetBrush(wx.Brush(fill_color, wx.BRUSHSTYLE_SOLID))
+            if not gdi.GetColour(fill_color).IsOk():
+                fill_color = 'white'
+            gc.cachedGC.SetBrush(gdi.GetBrush(fill_color, wx.BRUSHSTYLE_SOLID))
 
         if "paint" in self.cachedPaths:
             path = self.cachedPaths["paint"]
@@ -121,8 +144,9 @@ class UiShape(UiView):
             if (self.model.type in ["pen", "line", "polygon"]):
                 # Make lines extra thick for easier clicking
                 selThickness += self.stackManager.view.FromDIP(6)
-            gc.cachedGC.SetPen(wx.Pen('Blue', selThickness, wx.PENSTYLE_SHORT_DASH))
-            gc.cachedGC.SetBrush(wx.Brush('Blue', wx.BRUSHSTYLE_SOLID))
+            gdi = self.stackManager.gdiCache
+            gc.cachedGC.SetPen(gdi.GetPen('Blue', selThickness, wx.PENSTYLE_SHORT_DASH))
+            gc.cachedGC.SetBrush(gdi.GetBrush('Blue', wx.BRUSHSTYLE_SOLID))
 
             # We're already affine-transformed, so just flip vertically and draw
             if "paintSel" in self.cachedPaths:
@@ -145,67 +169,6 @@ class UiShape(UiView):
                     self.FlipPath(gc, path)
                     gc.cachedGC.FillPath(path)
 
-    def MakeHitRegion(self):
-        # Make a region in absolute/card coordinates
-        if not self.model.IsVisible():
-            self.hitRegion = wx.Region((0,0), (0,0))
-
-        with self.model.animLock:
-            thickness = self.model.GetProperty("pen_thickness")
-            s = self.model.GetProperty("size")
-            origPoints = self.model.GetScaledPoints()
-            rotRect = self.model.RotatedRect(self.model.RectFromPoints(origPoints))
-
-        if self.model.type in ["pen", "line", "polygon"]:
-            # Make lines extra thick for easier clicking
-            thickness += 6
-
-        # Draw the region offset up/right, to allow space for bottom/left resize boxes,
-        # since they would otherwise be at negative coords, which would be outside the
-        # hitRegion bitmap.  Then set the offset of the hitRegion bitmap down/left to make up for it.
-        regOffset = (thickness+20)/2 + 24
-
-        height = rotRect.Size[1]+2*regOffset
-        img = ImageFactory.shared().GetImage(rotRect.Size[0]+2*regOffset, height)
-        context = wx.GraphicsRenderer.GetDefaultRenderer().CreateContextFromImage(img)
-        context.SetBrush(wx.Brush('white', wx.BRUSHSTYLE_SOLID))
-        context.SetPen(wx.Pen('white', int(thickness), wx.PENSTYLE_SOLID))
-
-        aff = self.model.GetAffineTransform()
-        vals = aff.Get()
-        # Draw into region bmp rotated but not translated
-        vals = (vals[0].m_11, vals[0].m_12, vals[0].m_21, vals[0].m_22, vals[1][0] - (rotRect.Position.x-regOffset), vals[1][1] - (rotRect.Position.y-regOffset))
-        aff = context.CreateMatrix(*vals)
-
-        if "hitReg" in self.cachedPaths:
-            path = self.cachedPaths["hitReg"]
-        else:
-            path = self.MakeShapePath(context)
-            path.Transform(aff)
-            self.cachedPaths["hitReg"] = path
-
-        if self.model.type not in ["line", "pen"]:
-            context.FillPath(path)
-        context.StrokePath(path)
-
-        if self.stackManager.isEditing and self.isSelected and self.stackManager.tool.name == "hand":
-            for resizerRect in self.GetLocalResizeBoxRects().values():
-                path = context.CreatePath()
-                path.AddRectangle(resizerRect.Left, resizerRect.Top, resizerRect.Width, resizerRect.Height)
-                path.Transform(aff)
-                context.FillPath(path)
-            path = context.CreatePath()
-            path.AddCircle(*self.GetLocalRotationHandlePoint(), 6)
-            path.Transform(aff)
-            context.FillPath(path)
-        context.Flush()
-
-        reg = img.ConvertToRegion(0,0,0)
-        ImageFactory.shared().RecycleImage(img)
-        reg.Offset(int(rotRect.Position.x-regOffset), int(rotRect.Position.y-regOffset))
-        self.hitRegion = reg
-        self.hitRegionOffset = self.model.GetAbsolutePosition()
-
     def GetLocalResizeBoxPoints(self):
         thicknessOffset = self.model.GetProperty("pen_thickness")/2
         resizerPoints = super().GetLocalResizeBoxPoints()
@@ -217,8 +180,7 @@ class UiShape(UiView):
     def OnPropertyChanged(self, model, key):
         super().OnPropertyChanged(model, key)
         if key in ["size", "shape", "pen_color", "pen_thickness", "fill_color", "corner_radius", "rotation"]:
-            self.ClearHitRegion()
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
         if key in ["size", "shape", "pen_thickness", "corner_radius", "rotation"]:
             self.cachedPaths = {}
 
@@ -237,8 +199,18 @@ class LineModel(ViewModel):
     This is the model class for Line and Pen objects, and the superclass for models for the other shapes.
     """
 
+    __slots__ = ("points", "scaledPoints")
+
     minSize = wx.Size(2, 2)
 
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "pen_color", "pen_thickness", "position", "size", "rotation"]
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "originalSize": "size",
+                     "pen_color": "color",
+                     "pen_thickness": "uint",
+                     "rotation": "float"}
+
     def __init__(self, stackManager, shapeType):
         super().__init__(stackManager)
         self.type = shapeType
@@ -258,14 +230,6 @@ class LineModel(ViewModel):
         self.properties["pen_thickness"] = 2
         self.properties["rotation"] = 0.0
 
-        self.propertyTypes["originalSize"] = "size"
-        self.propertyTypes["pen_color"] = "color"
-        self.propertyTypes["pen_thickness"] = "uint"
-        self.propertyTypes["rotation"] = "float"
-
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "pen_color", "pen_thickness", "position", "size", "rotation"]
-
     def GetData(self):
         data = super().GetData()
         data["points"] = self.points.copy()
@@ -275,6 +239,14 @@ class LineModel(ViewModel):
         super().SetData(data)
         self.type = data["type"]
         self.points = data["points"]
+        self.ClearPolygons(True)
+
+    def ResetFromModel(self, model):
+        super().ResetFromModel(model)
+        self.type = model.type
+        self.points = model.points.copy()
+        self.scaledPoints = None
+        self.ClearPolygons(True)
 
     def SetShape(self, shape):
         self.type = shape["type"]
@@ -282,6 +254,7 @@ class LineModel(ViewModel):
         self.properties["pen_thickness"] = shape["thickness"]
         self.points = shape["points"]
         self.isDirty = True
+        self.ClearPolygons(True)
         self.Notify("shape")
 
     def SetProperty(self, key, value, notify=True):
@@ -293,6 +266,7 @@ class LineModel(ViewModel):
     def DidUpdateShape(self):  # If client updates the points list already passed to AddShape
         self.isDirty = True
         self.scaledPoints = None
+        self.ClearPolygons(True)
         self.Notify("shape")
 
     def PerformFlips(self, fx, fy, notify=True):
@@ -302,6 +276,7 @@ class LineModel(ViewModel):
                 origSize = self.properties["originalSize"]
                 self.points = [((origSize[0] - p[0]) if fx else p[0], (origSize[1] - p[1]) if fy else p[1]) for p in self.points]
                 self.scaledPoints = None
+                self.ClearPolygons(True)
                 if notify:
                     self.Notify("size")
 
@@ -331,6 +306,28 @@ class LineModel(ViewModel):
         pos = self.GetAbsolutePosition()
         return [p + pos for p in self.GetScaledPoints()]
 
+    def MakeLocalPolygons(self):
+        points = self.GetScaledPoints()
+        t = self.properties["pen_thickness"] / 2
+        if self.type in ["line", "pen"]:
+            return collisionGeometry.PolylinePieces(points, t)
+        elif self.type == "polygon":
+            pieces = collisionGeometry.Triangulate(points)
+            if t:
+                pieces.extend(collisionGeometry.PolylinePieces(points, t, closed=True))
+            return pieces
+        elif len(points) == 2:
+            # rect, oval, and roundrect shapes are defined by 2 corner points, and stroked around that frame
+            l, b = min(points[0][0], points[1][0]) - t, min(points[0][1], points[1][1]) - t
+            w, h = abs(points[1][0] - points[0][0]) + 2*t, abs(points[1][1] - points[0][1]) + 2*t
+            if self.type == "oval":
+                return [collisionGeometry.EllipsePoints(l + w/2, b + h/2, w/2, h/2)]
+            elif self.type == "roundrect":
+                radius = min(self.properties["corner_radius"], (w-2*t)/2, (h-2*t)/2) + t
+                return [collisionGeometry.RoundRectPoints(l, b, w, h, radius)]
+            return [collisionGeometry.RectPoints(l, b, w, h)]
+        return super().MakeLocalPolygons()
+
     @staticmethod
     def RectFromPoints(points):
         rect = wx.Rect(int(points[0][0]), int(points[0][1]), 1, 1)
@@ -498,15 +495,18 @@ class ShapeModel(LineModel):
     This is the model class for Oval and Rectangle objects, and the superclass for models for round-rects.
     """
 
+    __slots__ = ()
+
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "pen_color", "pen_thickness", "fill_color", "position", "size", "rotation"]
+    propertyTypes = {**LineModel.propertyTypes,
+                     "fill_color": "color"}
+
     def __init__(self, stackManager, shapeType):
         super().__init__(stackManager, shapeType)
         self.proxyClass = Shape
 
         self.properties["fill_color"] = "white"
-        self.propertyTypes["fill_color"] = "color"
-
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "pen_color", "pen_thickness", "fill_color", "position", "size", "rotation"]
 
     def SetShape(self, shape):
         self.properties["fill_color"] = shape["fill_color"]
@@ -585,15 +585,18 @@ class RoundRectModel(ShapeModel):
     This is the model class for Round Rectangle objects.
     """
 
+    __slots__ = ()
+
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "pen_color", "pen_thickness", "fill_color", "corner_radius", "position", "size", "rotation"]
+    propertyTypes = {**ShapeModel.propertyTypes,
+                     "corner_radius": "uint"}
+
     def __init__(self, stackManager, shapeType):
         super().__init__(stackManager, shapeType)
         self.proxyClass = RoundRect
 
         self.properties["corner_radius"] = 8
-        self.propertyTypes["corner_radius"] = "uint"
-
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "pen_color", "pen_thickness", "fill_color", "corner_radius", "position", "size", "rotation"]
 
     def SetShape(self, shape):
         self.properties["corner_radius"] = shape["corner_radius"] if "corner_radius" in shape else 8
@@ -32,7 +32,7 @@ class UiTextBase(UiView):
         super().OnPropertyChanged(model, key)
         if key == "text":
             if self.model.type == "textlabel":
-                self.stackManager.view.Refresh()
+                self.RefreshArea()
             else:
                 if self.view:
                     wasEditable = self.view.IsEditable()
@@ -50,10 +50,10 @@ class UiTextBase(UiView):
             if self.view:
                 self.view.Refresh()
             else:
-                self.stackManager.view.Refresh()
+                self.RefreshArea()
         elif key == "alignment":
             if self.model.type == "textlabel":
-                self.stackManager.view.Refresh()
+                self.RefreshArea()
             else:
                 sm = self.stackManager
                 sm.SelectUiView(None)
@@ -90,7 +90,7 @@ class UiTextBase(UiView):
         if view is None:
             self.font = font
             self.text_color = colorStr
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
         elif not isinstance(view, stc.StyledTextCtrl):
             view.SetFont(font)
             view.SetForegroundColour(colorStr)
@@ -155,6 +155,18 @@ class TextBaseModel(ViewModel):
     This is the model for a TextLabel object.
     """
 
+    __slots__ = ()
+
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "text": "string",
+                     "alignment": "choice",
+                     "text_color": "color",
+                     "font": "choice",
+                     "font_size": "uint",
+                     "is_bold": "bool",
+                     "is_italic": "bool",
+                     "is_underlined": "bool"}
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.proxyClass = None
@@ -168,15 +180,6 @@ class TextBaseModel(ViewModel):
         self.properties["is_italic"] = False
         self.properties["is_underlined"] = False
 
-        self.propertyTypes["text"] = "string"
-        self.propertyTypes["alignment"] = "choice"
-        self.propertyTypes["text_color"] = "color"
-        self.propertyTypes["font"] = "choice"
-        self.propertyTypes["font_size"] = "uint"
-        self.propertyTypes["is_bold"] = "bool"
-        self.propertyTypes["is_italic"] = "bool"
-        self.propertyTypes["is_underlined"] = "bool"
-
 
 class TextBaseProxy(ViewProxy):
     """
@@ -33,6 +33,8 @@ class UiTextField(UiTextBase):
         self.stackManager = stackManager
         self.isInlineEditing = False
         self.inlineStartText = None
+        self.poolKind = None
+        self.fieldBindings = None
         stackManager.view.Freeze()
         field = self.CreateField(stackManager, model)
         super().__init__(parent, stackManager, model, field)
@@ -47,7 +49,30 @@ class UiTextField(UiTextBase):
             alignment = wx.TE_CENTER
 
         pos = self.stackManager.ConvRect(model.GetAbsoluteFrame()).TopLeft
-        if model.GetProperty("is_multiline"):
+        isMultiline = model.GetProperty("is_multiline")
+
+        # While running, reuse a pooled field with the same fixed style, if there is one
+        field = None
+        if not stackManager.isEditing:
+            self.poolKind = ("stc" if isMultiline else "text", alignment)
+            field = stackManager.viewPool.TakeView(self.poolKind)
+
+        if field:
+            field.SetEditable(True)
+            field.SetSize(model.GetProperty("size"))
+            field.SetPosition(pos)
+            field.ChangeValue(text)
+            field.EmptyUndoBuffer()
+            # Don't carry over the old field's zoom, scroll position, or selection
+            if isMultiline:
+                field.SetZoom(0)
+                field.SetFirstVisibleLine(0)
+                field.SetXOffset(0)
+                field.SetEmptySelection(0)
+            else:
+                field.SetInsertionPoint(0)
+                field.ShowPosition(0)
+        elif isMultiline:
             field = CDSSTC(parent=stackManager.view, size=model.GetProperty("size"), pos=pos,
                                        style=alignment | wx.BORDER_SIMPLE | stc.STC_WRAP_WORD)
             field.SetUseHorizontalScrollBar(False)
@@ -56,23 +81,16 @@ class UiTextField(UiTextBase):
             field.SetWrapMode(stc.STC_WRAP_WORD)
             field.SetMarginWidth(1, 0)
             field.ChangeValue(text)
-            field.Bind(stc.EVT_STC_MODIFIED, self.OnSTCTextChanged)
-            field.Bind(stc.EVT_STC_ZOOM, self.OnZoom)
-            field.Bind(wx.EVT_KEY_DOWN, self.OnSTCKeyDown)
             field.EmptyUndoBuffer()
         else:
             field = CDSTextCtrl(parent=stackManager.view, size=model.GetProperty("size"), pos=pos,
                                 style=wx.TE_PROCESS_ENTER | alignment)
             field.ChangeValue(text)
-            field.Bind(wx.EVT_TEXT, self.OnTextChanged)
-            field.Bind(CDS_EVT_TEXT_UNDO, self.OnTextChanged)
             field.EmptyUndoBuffer()
 
-        self.BindEvents(field)
-        field.Bind(wx.EVT_TEXT_ENTER, self.OnTextEnter)
-        field.Bind(wx.EVT_SET_FOCUS, self.OnFocus)
-        field.Bind(wx.EVT_KILL_FOCUS, self.OnLoseFocus)
-        field.Bind(wx.EVT_KEY_DOWN, self.OnKeyDown)
+        self.fieldBindings = self.GetFieldBindings(isMultiline)
+        for (event, handler) in self.fieldBindings:
+            field.Bind(event, handler)
         self.UpdateFont(model, field)
 
         if stackManager.isEditing:
@@ -81,6 +99,32 @@ class UiTextField(UiTextBase):
             field.SetEditable(model.GetProperty("is_editable"))
         return field
 
+    def GetFieldBindings(self, isMultiline):
+        if isMultiline:
+            bindings = [(stc.EVT_STC_MODIFIED, self.OnSTCTextChanged),
+                        (stc.EVT_STC_ZOOM, self.OnZoom),
+                        (wx.EVT_KEY_DOWN, self.OnSTCKeyDown)]
+        else:
+            bindings = [(wx.EVT_TEXT, self.OnTextChanged),
+                        (CDS_EVT_TEXT_UNDO, self.OnTextChanged)]
+        return bindings + self.GetEventBindings() + [(wx.EVT_TEXT_ENTER, self.OnTextEnter),
+                                                     (wx.EVT_SET_FOCUS, self.OnFocus),
+                                                     (wx.EVT_KILL_FOCUS, self.OnLoseFocus),
+                                                     (wx.EVT_KEY_DOWN, self.OnKeyDown)]
+
+    def DestroyView(self):
+        # While running, put the field back in the ViewPool, instead of destroying it
+        field = self.view
+        if field and self.poolKind and not self.stackManager.isEditing:
+            self.StopInlineEditing(notify=False)
+            if field.HasCapture():
+                field.ReleaseMouse()
+            self.UnbindEvents(field, self.fieldBindings)
+            if self.stackManager.viewPool.GiveView(self.poolKind, field):
+                self.view = None
+                return
+        super().DestroyView()
+
     def GetCursor(self):
         if self.stackManager.isEditing and not self.isInlineEditing:
             return wx.CURSOR_HAND
@@ -250,18 +294,22 @@ class TextFieldModel(TextBaseModel):
     This is the model for a TextField object.
     """
 
+    __slots__ = ()
+
     minSize = wx.Size(32,20)
 
+    # Add custom handlers to the top of the list
+    handlerKeys = ("on_setup", "on_text_changed", "on_text_enter") + TextBaseModel.handlerKeys[1:]
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "text", "alignment", "font", "font_size", "text_color", "is_editable", "is_multiline", "position", "size"]
+    propertyTypes = {**TextBaseModel.propertyTypes,
+                     "is_editable": "bool",
+                     "is_multiline": "bool"}
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.type = "textfield"
         self.proxyClass = TextField
-
-        # Add custom handlers to the top of the list
-        handlers = {"on_setup": "", "on_text_changed": "", "on_text_enter": ""}
-        for k,v in self.handlers.items():
-            handlers[k] = v
-        self.handlers = handlers
         self.initialEditHandler = "on_text_enter"
 
         self.properties["name"] = "field_1"
@@ -269,12 +317,6 @@ class TextFieldModel(TextBaseModel):
         self.properties["is_multiline"] = False
         self.properties["font_size"] = 12
 
-        self.propertyTypes["is_editable"] = "bool"
-        self.propertyTypes["is_multiline"] = "bool"
-
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "text", "alignment", "font", "font_size", "text_color", "is_editable", "is_multiline", "position", "size"]
-
     @RunOnMainSync
     def GetSelectedText(self):
         uiView = self.stackManager.GetUiViewByModel(self)
@@ -11,6 +11,7 @@ from appCommands import SetPropertyCommand
 from uiView import *
 from uiTextBase import *
 from uiTextField import CDSTextCtrl
+from textLayoutCache import WrapLines
 
 
 class UiTextLabel(UiTextBase):
@@ -19,15 +20,37 @@ class UiTextLabel(UiTextBase):
     """
 
     def __init__(self, parent, stackManager, model):
-        self.lastFontSize = None
-        self.lastDidShrink = False
         super().__init__(parent, stackManager, model, None)
         self.UpdateFont(model, None)
 
-    def OnPropertyChanged(self, model, key):
-        super().OnPropertyChanged(model, key)
-        if key in ["text", "font", "font_size", "size", "can_auto_shrink"]:
-            self.lastFontSize = None
+    def Recycle(self, parent):
+        super().Recycle(parent)
+        self.UpdateFont(self.model, None)
+
+    def GetPaintFont(self, pixelSize):
+        props = self.model.properties
+        return self.stackManager.gdiCache.GetFont(pixelSize, self.FamilyForName(props["font"]), props["is_bold"],
+                                                  props["is_italic"], props["is_underlined"])
+
+    def GetFontKey(self, pixelSize):
+        props = self.model.properties
+        return (props["font"], props["is_bold"], props["is_italic"], props["is_underlined"], pixelSize)
+
+    def GetSpriteKey(self):
+        props = self.model.properties
+        return (props["text"], props["font"], props["font_size"], props["text_color"], props["alignment"],
+                props["can_auto_shrink"], props["is_bold"], props["is_italic"], props["is_underlined"],
+                tuple(props["size"]))
+
+    def GetSpritePadding(self):
+        # Paint() can draw its last line up to a line height below the frame, and descenders and italics hang past
+        # that, so leave room for them, based on the font's pixel size
+        props = self.model.properties
+        pixelSize = self.stackManager.view.FromDIP(self.ScaleFontSize(props["font_size"], None))
+        pad = pixelSize * 1.5
+        if props["is_italic"]:
+            pad += pixelSize / 3
+        return int(pad) + 2
 
     def StartInlineEditing(self):
         # Show a temporary StyledTextCtrl with the same frame and font as the label
@@ -75,27 +98,27 @@ class UiTextLabel(UiTextBase):
             self.stackManager.view.Refresh()
 
     def DoesTextFitWithSize(self, gc, font_size):
-        font = wx.Font(self.font)
-        font.SetPixelSize(wx.Size(0, self.stackManager.view.FromDIP(font_size)))
-        gc.SetFont(font)
+        pixelSize = self.stackManager.view.FromDIP(font_size)
+        gc.SetFont(self.GetPaintFont(pixelSize))
         (width, height) = self.model.GetProperty("size")
-        lines = wordwrap(self.model.GetProperty("text"), width, gc)
+        lines = self.stackManager.textLayoutCache.GetLines(self.model.GetProperty("text"), width, gc,
+                                                           self.GetFontKey(pixelSize))
         extraLineSpacing = 1.25 if wx.Platform == "__WXMSW__" else 1.1
         lineHeight = int(font_size * extraLineSpacing)
-        numLines = len(lines.split('\n'))
-        return height > lineHeight * numLines
+        return height > lineHeight * len(lines)
 
     def GetFontSizeFit(self, gc):
-        if self.lastFontSize is not None:
-            return (self.lastFontSize, self.lastDidShrink)
         font_size = self.ScaleFontSize(self.model.GetProperty("font_size"), None)
-        if self.DoesTextFitWithSize(gc, font_size):
-            self.lastFontSize = font_size
-            self.lastDidShrink = False
-            return (font_size, False)
-        self.lastFontSize = self.FindFittingFontSize(gc, 1, font_size)
-        self.lastDidShrink = True
-        return (self.lastFontSize, True)
+        key = (self.model.GetProperty("text"), self.GetFontKey(font_size), tuple(self.model.GetProperty("size")))
+        layoutCache = self.stackManager.textLayoutCache
+        fit = layoutCache.GetFit(key)
+        if fit is None:
+            if self.DoesTextFitWithSize(gc, font_size):
+                fit = (font_size, False)
+            else:
+                fit = (self.FindFittingFontSize(gc, 1, font_size), True)
+            layoutCache.SetFit(key, fit)
+        return fit
 
     def FindFittingFontSize(self, gc, lower, upper):
         font_size = int((upper + lower) / 2)
@@ -107,12 +130,10 @@ class UiTextLabel(UiTextBase):
         else:
             return lower
 
-    def Paint(self, gc):
-        dipScale = self.stackManager.view.FromDIP(1000)/1000.0
-        align = self.model.GetProperty("alignment")
+    def LayoutText(self, gc):
+        # Fit and wrap the text, using the shared TextLayoutCache.  Sets the font on gc, and returns
+        # (font_size, didShrink, lines), with font_size in pixels, and lines as a list of (line, lineWidth).
         (width, height) = self.model.GetProperty("size")
-
-        font = wx.Font(self.font)
         font_size = self.ScaleFontSize(self.model.GetProperty("font_size"), None)
 
         didShrink = False
@@ -121,22 +142,27 @@ class UiTextLabel(UiTextBase):
 
         # Shouldn't need to double FromDIP the size here... wx Bug?
         font_size = self.stackManager.view.FromDIP(self.stackManager.view.FromDIP(font_size))
-        font.SetPixelSize(wx.Size(0, font_size))
+        gc.SetFont(self.GetPaintFont(font_size))
+        lines = self.stackManager.textLayoutCache.GetLines(self.model.GetProperty("text"), width * gc.dipScale, gc,
+                                                           self.GetFontKey(font_size))
+        return (font_size, didShrink, lines)
 
+    def Paint(self, gc):
+        dipScale = gc.dipScale
+        align = self.model.GetProperty("alignment")
+        (width, height) = self.model.GetProperty("size")
         width *= dipScale
 
-        gc.SetFont(font)
-        gc.SetTextForeground(wx.Colour(self.text_color))
-        lines = wordwrap(self.model.GetProperty("text"), width, gc)
+        (font_size, didShrink, lines) = self.LayoutText(gc)
+        gc.SetTextForeground(self.stackManager.gdiCache.GetColour(self.text_color))
 
         offsetY = height * dipScale
         extraLineSpacing = 1.25 if wx.Platform == "__WXMSW__" else 1.1
         lineHeight = int(font_size / dipScale * extraLineSpacing)
 
-        for line in lines.split('\n'):
+        for (line, textWidth) in lines:
             line = line.rstrip()
             if align in ["Center", "Right"]:
-                textWidth = gc.GetTextExtent(line).Width
                 if align == "Center":
                     xPos = (width - textWidth)/2/dipScale
                 else:
@@ -164,6 +190,14 @@ class TextLabelModel(TextBaseModel):
     This is the model for a TextLabel object.
     """
 
+    __slots__ = ()
+
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "text", "alignment", "font", "font_size", "text_color", "can_auto_shrink", "position", "size", "rotation"]
+    propertyTypes = {**TextBaseModel.propertyTypes,
+                     "can_auto_shrink": "bool",
+                     "rotation": "float"}
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.type = "textlabel"
@@ -172,12 +206,6 @@ class TextLabelModel(TextBaseModel):
         self.properties["can_auto_shrink"] = True
         self.properties["rotation"] = 0.0
 
-        self.propertyTypes["can_auto_shrink"] = "bool"
-        self.propertyTypes["rotation"] = "float"
-
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "text", "alignment", "font", "font_size", "text_color", "can_auto_shrink", "position", "size", "rotation"]
-
 
 class TextLabel(TextBaseProxy):
     """
@@ -204,30 +232,4 @@ def wordwrap(text, width, dc):
     width, on the given `wx.DC` using its current font settings.
     """
 
-    wrapped_lines = []
-    text = text.split('\n')
-    for line in text:
-        pte = dc.GetPartialTextExtents(line)
-        idx = 0
-        start = 0
-        startIdx = 0
-        spcIdx = -1
-        while idx < len(pte):
-            # remember the last seen space
-            if line[idx] == ' ':
-                spcIdx = idx
-
-            # have we reached the max width?
-            if pte[idx] - start > width:
-                if spcIdx != -1:
-                    idx = min(spcIdx + 1, len(pte) - 1)
-                wrapped_lines.append(line[startIdx : idx])
-                start = pte[idx-1]
-                startIdx = idx
-                spcIdx = -1
-
-            idx += 1
-
-        wrapped_lines.append(line[startIdx : idx])
-
-    return '\n'.join(wrapped_lines)
+    return '\n'.join(line for (line, lineWidth) in WrapLines(text, width, dc))
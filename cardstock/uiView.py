@@ -17,7 +17,9 @@ from codeRunnerThread import RunOnMainSync, RunOnMainAsync
 from cardstockFrameParts import *
 import sanitizer
 import math
-from imageFactory import ImageFactory
+import collisionGeometry
+from collections.abc import MutableMapping
+from types import MappingProxyType
 
 
 class UiView(object):
@@ -26,6 +28,8 @@ class UiView(object):
     their views and models.
     """
 
+    hitSlop = 0  # Extra distance around this object's outline that still counts as a click
+
     def __init__(self, parent, stackManager, model, view):
         super().__init__()
         self.stackManager = stackManager
@@ -34,9 +38,12 @@ class UiView(object):
         self.view = view
         self.model = None
         self.SetModel(model)
-        self.hitRegion = None
         self.isSelected = False
         self.hasMouseMoved = False
+        self.paintedBounds = None  # Card area covered by this object the last time it was painted
+        self.lastChangeFrame = 0   # Frame when this object last changed, used by the StaticLayerCache
+        self.lastSpriteKey = None  # Appearance key from the last paint, used by the SpriteCache
+        self.lastBounceKeys = ()   # bounceObjs checked by the last FindCollisions()
         self.SetView(view)
 
         self.lastEditedHandler = None
@@ -55,16 +62,51 @@ class UiView(object):
         self.parent = None
         self.uiViews = None
         self.model = None
-        self.hitRegion = None
+
+    def Detach(self):
+        # Called when this UiView is taken off the card, to be kept by the ViewPool for when its card is shown again
+        if self.view:
+            if self.view.HasCapture():
+                self.view.ReleaseMouse()
+            self.view.Hide()
+        self.hasMouseMoved = False
+
+    def Reattach(self):
+        # Called when a UiView retained by the ViewPool goes back onto the card
+        self.paintedBounds = None
+        if self.view:
+            self.OnPropertyChanged(self.model, "position")
+            self.view.Show(self.model.IsVisible())
+
+    def Recycle(self, parent):
+        # Called when a UiView kept by the SpritePool goes back onto the card, for its model that clone() just reset,
+        # so drop anything cached from its last life
+        self.parent = parent
+        self.isSelected = False
+        self.paintedBounds = None
+        self.lastSpriteKey = None
+        self.lastBounceKeys = ()
+
+    def GetEventBindings(self):
+        return [(wx.EVT_LEFT_DOWN, self.FwdOnMouseDown),
+                (wx.EVT_LEFT_DCLICK, self.FwdOnMouseDown),
+                (wx.EVT_RIGHT_DOWN, self.FwdOnRightDown),
+                (wx.EVT_MOTION, self.FwdOnMouseMove),
+                (wx.EVT_LEFT_UP, self.FwdOnMouseUp),
+                (wx.EVT_KEY_DOWN, self.FwdOnKeyDown),
+                (wx.EVT_KEY_UP, self.FwdOnKeyUp)]
 
     def BindEvents(self, view):
-        view.Bind(wx.EVT_LEFT_DOWN, self.FwdOnMouseDown)
-        view.Bind(wx.EVT_LEFT_DCLICK, self.FwdOnMouseDown)
-        view.Bind(wx.EVT_RIGHT_DOWN, self.FwdOnRightDown)
-        view.Bind(wx.EVT_MOTION, self.FwdOnMouseMove)
-        view.Bind(wx.EVT_LEFT_UP, self.FwdOnMouseUp)
-        view.Bind(wx.EVT_KEY_DOWN, self.FwdOnKeyDown)
-        view.Bind(wx.EVT_KEY_UP, self.FwdOnKeyUp)
+        for (event, handler) in self.GetEventBindings():
+            view.Bind(event, handler)
+
+    def UnbindEvents(self, view, bindings=None):
+        # Remove this UiView's handlers from view, including the ones bound more than once
+        if bindings is None:
+            bindings = self.GetEventBindings()
+        for (event, handler) in bindings + [(wx.EVT_SIZE, self.OnResize)]:
+            while view.Unbind(event, handler=handler):
+                pass
 
     def FwdOnRightDown( self, event): self.stackManager.OnRightDown( self, event)
     def FwdOnMouseDown( self, event): self.stackManager.OnMouseDown( self, event)
@@ -120,16 +162,45 @@ class UiView(object):
                     self.view.SetSize(s)
                 self.view.SetPosition(pos)
                 self.view.Refresh()
-            if key == "position":
-                # If we're just moving the object, we don't need to rebuild the hit region, just offset it
-                self.MoveHitRegion()
-            else:
-                self.ClearHitRegion()
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
         elif key == "is_visible":
             if self.view:
                 self.view.Show(self.model.IsVisible())
-            self.stackManager.view.Refresh()
+            self.RefreshArea()
+
+    def GetPaintBounds(self):
+        # The (left, bottom, right, top) card area this object paints over, including rotation and anything it draws
+        # outside of its outline, or None if empty
+        bounds = collisionGeometry.PolygonsBounds(self.model.GetPolygons())
+        margin = self.GetPaintMargin()
+        if bounds and margin:
+            # Grow by enough to also cover a margin around a rotated outline
+            margin *= 1.5
+            bounds = (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+        return bounds
+
+    def GetPaintMargin(self):
+        # How far outside of its outline this object may draw, in card coords, like pen thickness, overflowing text,
+        # hitSlop, and native focus rings
+        margin = max(self.GetSpritePadding(), self.hitSlop)
+        if self.view:
+            margin = max(margin, 4)
+        return margin
+
+    def RefreshArea(self):
+        # Repaint the area this object was last painted in, and the area it covers now
+        if not self.parent and self.model.type not in ("card", "stack"):
+            return  # Not on the card, like a view the CardPrefetcher is only measuring
+        view = self.stackManager.view
+        self.stackManager.staticLayer.ObjectChanged(self)
+        if self.model.type in ("card", "stack") or self.stackManager.isEditing:
+            view.Refresh()
+            return
+        if self.paintedBounds:
+            view.RefreshBounds(self.paintedBounds)
+        bounds = self.GetPaintBounds()
+        if bounds and bounds != self.paintedBounds:
+            view.RefreshBounds(bounds)
 
     def OnResize(self, event):
         pass
@@ -149,7 +220,6 @@ class UiView(object):
     def SetSelected(self, selected):
         if self.isSelected != selected:
             self.isSelected = selected
-            self.ClearHitRegion()
             self.stackManager.view.Refresh()
 
     def OnMouseDown(self, event):
@@ -180,10 +250,10 @@ class UiView(object):
             self.stackManager.runner.RunHandler(self.model, "on_mouse_exit", event)
         event.Skip()
 
-    def RunAnimations(self, onFinishedCalls, elapsed_time):
-        # Move the object by speed.x and speed.y pixels per second
+    def RunAnimations(self, elapsed_time, now):
+        # Move the object by speed.x and speed.y pixels per second, and update any in-progress animations.
+        # Finished animations get completed by the stackManager's animScheduler.
         updateList = []
-        finishList = []
         didRun = False
         with self.model.animLock:
             if self.model.type not in ["stack", "card"]:
@@ -194,26 +264,15 @@ class UiView(object):
                     didRun = True
 
             # Run any in-progress animations
-            now = time()
             for (key, animList) in self.model.animations.items():
                 animDict = animList[0]
                 if "startTime" in animDict:
                     progress = (now - animDict["startTime"]) / animDict["duration"]
-                    if progress < 1.0:
-                        if animDict["onUpdate"]:
-                            updateList.append([animDict, progress])
-                    else:
-                        if animDict["onUpdate"]:
-                            updateList.append([animDict, 1.0])
-                        finishList.append(key)
+                    if progress < 1.0 and animDict["onUpdate"]:
+                        updateList.append([animDict, progress])
         for (d,p) in updateList:
             d["onUpdate"](p, d)
             didRun = True
-        for key in finishList:
-            def deferFinish(key):
-                def f(): self.model.FinishAnimation(key)
-                return f
-            onFinishedCalls.append(deferFinish(key))
         return didRun
 
     def FindCollisions(self, collisions):
@@ -221,10 +280,25 @@ class UiView(object):
         # and add them to the collisions list, to be handled after all are found.
         removeFromBounceObjs = []
         if not self.model.didSetDown and self.model.GetProperty("is_visible") and tuple(self.model.GetProperty("speed")) != (0, 0):
-            for k,v in self.model.bounceObjs.items():
+            # Objects whose boxes don't overlap ours can't be touching us, so only check nearby objects, plus any
+            # that we're inside of, or haven't checked yet.
+            bounceObjs = self.model.bounceObjs
+            alwaysCheck = self.model.bounceAlwaysCheck
+            nearby = self.stackManager.collisionIndex.Query(self.model)
+            keys = [k for k in nearby if k in bounceObjs]
+            keys.extend(k for k in alwaysCheck.copy() if k not in nearby)
+            lastKeys = self.lastBounceKeys
+            self.lastBounceKeys = set(keys)
+            for k in keys:
+                v = bounceObjs.get(k)
+                if v is None:
+                    continue
                 other_ui = self.stackManager.GetUiViewByModel(k)
                 (mode, last_dist) = v
 
+                if not other_ui:
+                    continue
+
                 if not other_ui.model.GetProperty("is_visible"):
                     continue
 
@@ -239,8 +313,17 @@ class UiView(object):
 
                 if not mode:
                     # Determine whether we're inside or outside of this object
-                    self.model.bounceObjs[k][0] = "In" if other_ui.model.GetProxy().is_touching_point(self.model.GetCenter()) else "Out"
-                    self.model.bounceObjs[k][1] = new_dist
+                    v[0] = "In" if other_ui.model.GetProxy().is_touching_point(self.model.GetCenter()) else "Out"
+                    v[1] = new_dist
+                    if v[0] == "Out":
+                        alwaysCheck.discard(k)
+                    continue
+
+                if k not in lastKeys:
+                    # The broad phase skipped this pair since its last check, so last_dist is stale.  Track it again
+                    # from here.  The broad phase boxes include a couple of frames of movement, so pairs come back
+                    # into the neighborhood before they can touch.
+                    v[1] = new_dist
                     continue
 
                 edges = self.model.GetProxy().is_touching_edge(other_ui.model.GetProxy(), mode == "In")
@@ -294,10 +377,11 @@ class UiView(object):
                                 if eStr in edges: edgeList.append(eStr)
                             collisions[key] = (self, other_ui, selfBounceAxes, otherBounceAxes, tuple(edgeList), mode)
 
-                self.model.bounceObjs[k][1] = new_dist
+                v[1] = new_dist
 
             for k in removeFromBounceObjs:
-                del self.model.bounceObjs[k]
+                bounceObjs.pop(k, None)
+                alwaysCheck.discard(k)
 
     def PerformBounce(self, info, elapsed_time):
         # Perform this bounce for this object, and the other object
@@ -358,14 +442,41 @@ class UiView(object):
         return didRun
 
     def DoPaint(self, gc):
-        # Recursively paint this object and all children
+        # Recursively paint this object and all children.  When repainting only part of the card, skip any objects
+        # that are outside of it.
+        if not self.stackManager.isEditing and self.model.type != "card":
+            bounds = self.GetPaintBounds() if self.model.IsVisible() else None
+            if not bounds:
+                return
+            if gc.clipRect and not gc.clipRect.Intersects(self.stackManager.BoundsToViewRect(bounds)):
+                return
+            self.paintedBounds = bounds
         self.PrePaint(gc)
         if self.model.IsVisible():
-            self.Paint(gc)
+            if not self.PaintSprite(gc):
+                self.Paint(gc)
             for ui in self.uiViews:
                 ui.DoPaint(gc)
         self.PostPaint(gc)
 
+    def PaintSprite(self, gc):
+        # Blit this object from the SpriteCache, if it can be cached.  Returns False if it still needs to be painted.
+        if self.stackManager.isEditing:
+            return False
+        key = self.GetSpriteKey()
+        if key is None:
+            return False
+        return self.stackManager.spriteCache.Paint(self, gc, key)
+
+    def GetSpriteKey(self):
+        # Returns a hashable tuple of everything that affects how this object looks in local coords, or None if it
+        # shouldn't be drawn from a cached sprite
+        return None
+
+    def GetSpritePadding(self):
+        # How far this object may draw outside of its frame, in local coords
+        return 0
+
     def DoPaintSelectionBoxes(self, gc):
         # Recursively paint selection boxes for this object and all children, if selected
         self.PrePaint(gc)
@@ -378,19 +489,12 @@ class UiView(object):
     def PrePaint(self, gc):
         # Rotate and Translate the GC, such that we can draw this object in local coords
         stackSize = self.stackManager.stackModel.properties["size"]
-        pos = self.model.properties["position"]
-        rot = self.model.GetProperty("rotation")
-        rot = math.radians(rot) if rot else None
         gc.cachedGC.PushState()
-        scale = self.stackManager.view.FromDIP(1000)/1000.0
-
-        if rot:
-            cen = self.model.properties["size"] / 2
-            gc.cachedGC.Translate(scale*(pos[0] + cen[0]), scale*(stackSize.height - (pos[1] + cen[1])))
-            gc.cachedGC.Rotate(rot)
-            gc.cachedGC.Translate(scale*(-cen[0]), scale*(cen[1] - stackSize.height))
+        (isRotated, m) = self.model.GetPaintTransform(gc.dipScale, stackSize.height)
+        if isRotated:
+            gc.cachedGC.ConcatTransform(gc.cachedGC.CreateMatrix(*m))
         else:
-            gc.cachedGC.Translate(scale*pos[0], -pos[1]*scale)
+            gc.cachedGC.Translate(m[4], m[5])
 
 
     def Paint(self, gc):
@@ -399,7 +503,7 @@ class UiView(object):
     def PaintBoundingBox(self, gc, color='Gray'):
         if self.stackManager.isEditing:
             gc.SetBrush(wx.TRANSPARENT_BRUSH)
-            gc.SetPen(wx.Pen(color, self.stackManager.view.FromDIP(1), wx.PENSTYLE_DOT))
+            gc.SetPen(self.stackManager.gdiCache.GetPen(color, self.stackManager.view.FromDIP(1), wx.PENSTYLE_DOT))
 
             pos = wx.Point(0,0)-[int(x) for x in self.model.GetProperty("position")]
             f = self.model.GetFrame()
@@ -412,13 +516,14 @@ class UiView(object):
             f = self.model.GetFrame()
             f.Offset(pos)
 
-            gc.SetPen(wx.Pen('Blue', self.stackManager.view.FromDIP(3), wx.PENSTYLE_SHORT_DASH))
+            gdi = self.stackManager.gdiCache
+            gc.SetPen(gdi.GetPen('Blue', self.stackManager.view.FromDIP(3), wx.PENSTYLE_SHORT_DASH))
             gc.SetBrush(wx.TRANSPARENT_BRUSH)
             gc.DrawRectangle(f.Inflate(2))
 
             if self.model.parent and self.model.parent.type != "group":
                 gc.SetPen(wx.TRANSPARENT_PEN)
-                gc.SetBrush(wx.Brush('Blue', wx.BRUSHSTYLE_SOLID))
+                gc.SetBrush(gdi.GetBrush('Blue', wx.BRUSHSTYLE_SOLID))
                 for box in self.GetLocalResizeBoxRects().values():
                     gc.DrawRectangle(wx.Rect(box.TopLeft + f.TopLeft, box.Size))
                 rotPt = self.GetLocalRotationHandlePoint()
@@ -436,9 +541,7 @@ class UiView(object):
             inflate += self.model.properties["pen_thickness"]
         f.Inflate(int(inflate))
         if f.Contains(pt):
-            if not self.hitRegion:
-                self.MakeHitRegion()
-            if self.hitRegion.Contains(pt):
+            if collisionGeometry.PolygonsContainPoint(self.GetHitPolygons(), pt, self.hitSlop):
                 return self
         return None
 
@@ -461,7 +564,7 @@ class UiView(object):
 
     def GetResizeBoxPoints(self):
         points = self.GetLocalResizeBoxPoints()
-        aff = self.model.GetAffineTransform()
+        aff = self.model.GetGeometryTransform()
         return {k:wx.Point(tuple(int(x) for x in aff.TransformPoint(*p))) for k,p in points.items()}
 
     def GetResizeBoxRects(self):
@@ -479,118 +582,28 @@ class UiView(object):
         return None
 
     def GetRotationHandlePoint(self):
-        aff = self.model.GetAffineTransform()
+        aff = self.model.GetGeometryTransform()
         pt = self.GetLocalRotationHandlePoint()
         if pt:
             return aff.TransformPoint(*pt)
         return None
 
-    def ClearHitRegion(self, noParent=False):
-        self.hitRegion = None
-        if self.parent and noParent == False and self.parent.model.type == "group":
-            self.parent.ClearHitRegion()
-
-    def GetHitRegion(self):
-        if not self.hitRegion:
-            self.MakeHitRegion()
-        return self.hitRegion
-
-    def MoveHitRegion(self):
-        if self.hitRegion:
-            oldPos = self.hitRegionOffset
-            newPos = self.model.GetAbsolutePosition()
-            self.hitRegion.Offset(wx.Point(newPos-oldPos))
-            self.hitRegionOffset += tuple(wx.Point(newPos-oldPos))
-            if self.parent and self.parent.model.type == "group":
-                self.parent.ClearHitRegion()
-
-    def MakeHitRegion(self):
-        # Make a region in absolute/card coordinates
-        if not self.model.IsVisible():
-            self.hitRegion = wx.Region((0,0), (0,0))
-
-        s = self.model.GetProperty("size")
-        rect = wx.Rect(0, 0, s.Width + 1, s.Height + 1)
-        points = self.model.RotatedRectPoints(rect)
-        points.append(points[0])
-
-        l2 = list(map(list, zip(*points)))
-        rotSize = (max(l2[0]) - min(l2[0]) - 1, max(l2[1]) - min(l2[1]) - 1)
-        rotPos_x, rotPos_y = (min(l2[0]), min(l2[1]))
-
-        # Draw the region offset up/right, to allow space for bottom/left resize boxes,
-        # since they would otherwise be at negative coords, which would be outside the
-        # hitRegion bitmap.  Then set the offset of the hitRegion bitmap down/left to make up for it.
-        regOffset = 20
-
-        img = ImageFactory.shared().GetImage(rotSize[0]+2*regOffset, rotSize[1]+2*regOffset)
-        context = wx.GraphicsRenderer.GetDefaultRenderer().CreateContextFromImage(img)
-        context.SetBrush(wx.Brush('white', wx.BRUSHSTYLE_SOLID))
-
-        aff = self.model.GetAffineTransform()
-        vals = aff.Get()
-        # Draw into region bmp rotated but not translated
-        vals = (vals[0].m_11, vals[0].m_12, vals[0].m_21, vals[0].m_22, vals[1][0] - (rotPos_x-regOffset), vals[1][1] - (rotPos_y-regOffset))
-        aff = context.CreateMatrix(*vals)
-
-        path = context.CreatePath()
-        p1 = rect.TopLeft
-        p2 = rect.BottomRight
-        path.AddRectangle(p1[0], p1[1], p2[0] - p1[0], p2[1] - p1[1])
-        path.Transform(aff)
-        context.FillPath(path)
-
+    def GetHitPolygons(self):
+        # Get the clickable area of this object, as convex polygons in absolute/card coordinates
+        polys = self.model.GetPolygons()
         if self.stackManager.isEditing and self.isSelected and self.stackManager.tool.name == "hand":
-            for resizerRect in self.GetLocalResizeBoxRects().values():
-                path = context.CreatePath()
-                path.AddRectangle(resizerRect.Left, resizerRect.Top-2, resizerRect.Width, resizerRect.Height)
-                path.Transform(aff)
-                context.FillPath(path)
-            rotPt = self.GetLocalRotationHandlePoint()
-            if rotPt:
-                path = context.CreatePath()
-                path.AddCircle(*[int(x) for x in rotPt], 6)
-                path.Transform(aff)
-                context.FillPath(path)
-        context.Flush()
-
-        reg = img.ConvertToRegion(0,0,0)
-        ImageFactory.shared().RecycleImage(img)
-        reg.Offset(int(rotPos_x-regOffset), int(rotPos_y-regOffset))
-        self.hitRegion = reg
-        self.hitRegionOffset = self.model.GetAbsolutePosition()
-
-    def MakeRegionFromLocalRect(self, rect):
-        # Make a region in absolute/card coordinates
-        points = self.model.RotatedRectPoints(rect)
-        points.append(points[0])
-
-        l2 = list(map(list, zip(*points)))
-        rotSize = (max(l2[0]) - min(l2[0]), max(l2[1]) - min(l2[1]))
-        rotPos_x, rotPos_y = (min(l2[0]), min(l2[1]))
-
-        img = ImageFactory.shared().GetImage(*rotSize)
-        context = wx.GraphicsRenderer.GetDefaultRenderer().CreateContextFromImage(img)
-        context.SetBrush(wx.Brush('white', wx.BRUSHSTYLE_SOLID))
-
-        aff = self.model.GetAffineTransform()
-        vals = aff.Get()
-        # Draw into region bmp rotated but not translated
-        vals = (vals[0].m_11, vals[0].m_12, vals[0].m_21, vals[0].m_22, vals[1][0] - (rotPos_x), vals[1][1] - (rotPos_y))
-        aff = context.CreateMatrix(*vals)
-
-        path = context.CreatePath()
-        p1 = rect.TopLeft
-        p2 = rect.BottomRight
-        path.AddRectangle(p1[0], p1[1], p2[0] - p1[0], p2[1] - p1[1])
-        path.Transform(aff)
-        context.FillPath(path)
-        context.Flush()
-
-        reg = img.ConvertToRegion(0,0,0)
-        ImageFactory.shared().RecycleImage(img)
-        reg.Offset(rotPos_x, rotPos_y)
-        return reg
+            polys = polys + self.GetHandlePolygons()
+        return polys
+
+    def GetHandlePolygons(self):
+        # Resize boxes and the rotation handle are click targets too, while this object is selected
+        aff = self.model.GetGeometryTransform()
+        pieces = [collisionGeometry.RectPoints(r.Left, r.Top, r.Width, r.Height)
+                  for r in self.GetLocalResizeBoxRects().values()]
+        rotPt = self.GetLocalRotationHandlePoint()
+        if rotPt:
+            pieces.append(collisionGeometry.EllipsePoints(rotPt[0], rotPt[1], 6, 6, 12))
+        return [collisionGeometry.ConvexPolygon(aff.TransformPoints(p)) for p in pieces]
 
     handlerDisplayNames = {
         'on_setup':      "on_setup(self):",
@@ -618,33 +631,118 @@ class UiView(object):
     }
 
 
+class HandlerTable(MutableMapping):
+    """
+    Sparse storage for a model's event handler code.  This acts like a dict holding every handler the model's class
+    supports, in display order, with "" for the empty ones, but only stores the handlers that actually have code.
+    Keys that aren't in the class's list, like old handler names being migrated, are stored even when empty, and
+    come after the class's handlers.
+    """
+
+    __slots__ = ("names", "code")
+
+    def __init__(self, names):
+        self.names = names  # The model class's shared handlerKeys tuple
+        self.code = None    # Created on the first handler with code
+
+    def __getitem__(self, key):
+        if self.code and key in self.code:
+            return self.code[key]
+        if key in self.names:
+            return ""
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if not value and key in self.names:
+            if self.code:
+                self.code.pop(key, None)
+            return
+        if self.code is None:
+            self.code = {}
+        self.code[key] = value
+
+    def __delitem__(self, key):
+        # Deleting one of the class's handlers just empties it
+        if key in self.names:
+            if self.code:
+                self.code.pop(key, None)
+        elif self.code and key in self.code:
+            del self.code[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.names or (self.code is not None and key in self.code)
+
+    def __iter__(self):
+        yield from self.names
+        if self.code:
+            yield from [k for k in self.code if k not in self.names]
+
+    def __len__(self):
+        if not self.code:
+            return len(self.names)
+        return len(self.names) + sum(1 for k in self.code if k not in self.names)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def Copy(self):
+        table = HandlerTable(self.names)
+        if self.code:
+            table.code = self.code.copy()
+        return table
+
+
 class ViewModel(object):
     """
     This is the abstract base class for the other model classes.
     The model holds the property values and event handler text for each object.
-    It also holds the type of each property, and the ordered list of properties to display in the inspector.
+    The type of each property, the ordered list of properties to display in the inspector, and the list of handlers
+    are shared by all models of a class, as class-level tables that subclasses extend, and are never modified per
+    object.  Handler code is stored sparsely, and the animation state and lock only get created once they're used,
+    so that stacks with lots of objects stay small.
     It also handles animating properties of the object, like position, size, or color.
     """
 
+    __slots__ = ("type", "parent", "handlers", "lazyCompiledHandlers", "initialEditHandler", "lazyVisibleHandlers",
+                 "properties", "childModels", "childIndex", "stackManager", "isDirty", "proxy", "lastOnPeriodicTime", "animations",
+                 "bounceObjs", "bounceAlwaysCheck", "proxyClass", "lazyAnimLock", "didSetDown", "didDelete",
+                 "clonedFrom", "changeCount", "polygonVersion", "polygonCache", "shapeVersion", "localPolygonCache",
+                 "transformCache", "paintTransformCache", "absFrameCache", "origGroupSubviewFrame",
+                 "origGroupSubviewRotation")
+
     minSize = wx.Size(20, 20)
     reservedNames = helpData.HelpData.ReservedNames()
+    geometryKeys = ("position", "size", "rotation", "pen_thickness", "corner_radius", "originalSize")
+    shapeKeys = ("size", "pen_thickness", "corner_radius", "originalSize")
+
+    handlerKeys = ("on_setup", "on_mouse_enter", "on_mouse_press", "on_mouse_move", "on_mouse_release",
+                   "on_mouse_exit", "on_bounce", "on_message", "on_periodic")
+    propertyKeys = ["name", "position", "size"]
+    propertyTypes = {"name": "string",
+                     "position": "floatpoint",
+                     "center": "floatpoint",
+                     "size": "size",
+                     "speed": "point",
+                     "is_visible": "bool",
+                     "data": "dict"
+                     }
+
+    # Shared, read-only stand-ins for the animation and bounce state of objects that aren't animating or bouncing
+    noAnimations = MappingProxyType({})
+    noBounceObjs = MappingProxyType({})
+    noAlwaysCheck = frozenset()
+    lockCreationLock = threading.Lock()
 
     def __init__(self, stackManager):
         super().__init__()
         self.type = None
         self.parent = None
-        self.handlers = {"on_setup": "",
-                         "on_mouse_enter": "",
-                         "on_mouse_press": "",
-                         "on_mouse_move": "",
-                         "on_mouse_release": "",
-                         "on_mouse_exit": "",
-                         "on_bounce": "",
-                         "on_message": "",
-                         "on_periodic": ""
-                         }
+        self.handlers = HandlerTable(self.handlerKeys)
+        self.lazyCompiledHandlers = None
         self.initialEditHandler = "on_mouse_press"
-        self.visibleHandlers = set()
+        self.lazyVisibleHandlers = None
 
         self.properties = {"name": "",
                            "size": wx.Size(0,0),
@@ -653,28 +751,64 @@ class ViewModel(object):
                            "is_visible": True,
                            "data": {}
                            }
-        self.propertyKeys = ["name", "position", "size"]
-        self.propertyTypes = {"name": "string",
-                              "position": "floatpoint",
-                              "center": "floatpoint",
-                              "size": "size",
-                              "speed": "point",
-                              "is_visible": "bool",
-                              "data": "dict"
-                              }
 
         self.childModels = []
+        self.childIndex = None  # name -> child model, built when first needed
         self.stackManager = stackManager
         self.isDirty = False
         self.proxy = None
         self.lastOnPeriodicTime = None
-        self.animations = {}
-        self.bounceObjs = {}
+        self.animations = self.noAnimations
+        self.bounceObjs = self.noBounceObjs
+        self.bounceAlwaysCheck = self.noAlwaysCheck  # bounceObjs we're inside of, or haven't checked, so can't skip
         self.proxyClass = ViewProxy
-        self.animLock = threading.Lock()
+        self.lazyAnimLock = None
         self.didSetDown = False
         self.didDelete = False
         self.clonedFrom = None
+        self.changeCount = 0  # Bumped on every property change, so the ViewPool can tell if a retained view is stale
+        # Cached collision polygons, stored with the version they were built for, so a cache filled on one thread
+        # while another thread changes this object never gets used after the change.
+        self.polygonVersion = 0
+        self.polygonCache = None
+        self.shapeVersion = 0
+        self.localPolygonCache = None
+        # Cached transforms and absolute frame, which also use polygonVersion, since it gets bumped whenever this
+        # object or any group containing it moves, resizes, or rotates.
+        self.transformCache = None
+        self.paintTransformCache = None
+        self.absFrameCache = None
+        self.origGroupSubviewFrame = None
+        self.origGroupSubviewRotation = None
+
+    @property
+    def animLock(self):
+        # On any thread
+        lock = self.lazyAnimLock
+        if lock is None:
+            with self.lockCreationLock:
+                if self.lazyAnimLock is None:
+                    self.lazyAnimLock = threading.Lock()
+                lock = self.lazyAnimLock
+        return lock
+
+    @property
+    def compiledHandlers(self):
+        # Cache of handler code compiled by the runner, keyed by handler name
+        if self.lazyCompiledHandlers is None:
+            self.lazyCompiledHandlers = {}
+        return self.lazyCompiledHandlers
+
+    @compiledHandlers.setter
+    def compiledHandlers(self, compiledHandlers):
+        self.lazyCompiledHandlers = compiledHandlers
+
+    @property
+    def visibleHandlers(self):
+        # Handlers shown in the code editor, even if they're empty
+        if self.lazyVisibleHandlers is None:
+            self.lazyVisibleHandlers = set()
+        return self.lazyVisibleHandlers
 
     def __repr__(self):
         return f"<{self.GetDisplayType()}:'{self.GetProperty('name')}'>"
@@ -695,8 +829,11 @@ class ViewModel(object):
             if self.proxy:
                 self.proxy._model = None
                 self.proxy = None
-            self.animations = {}
-            self.bounceObjs = {}
+            self.animations = self.noAnimations
+            self.bounceObjs = self.noBounceObjs
+            self.bounceAlwaysCheck = self.noAlwaysCheck
+            if self.stackManager:
+                self.stackManager.collisionIndex.MarkDirty(self)
             self.stackManager = None
             self.parent = None
 
@@ -704,10 +841,17 @@ class ViewModel(object):
         for child in self.childModels:
             child.DismantleChildTree()
         self.childModels = None
+        self.childIndex = None
 
     def CreateCopy(self, name=None):
-        data = self.GetData()
-        newModel = generator.StackGenerator.ModelFromData(self.stackManager, data)
+        if self.type in ("card", "group"):
+            data = self.GetData()
+            newModel = generator.StackGenerator.ModelFromData(self.stackManager, data)
+            if self.lazyCompiledHandlers:
+                newModel.compiledHandlers = self.lazyCompiledHandlers.copy()  # Same code, so reuse compiled handlers
+        else:
+            newModel = generator.StackGenerator.ModelFromType(self.stackManager, self.type)
+            newModel.ResetFromModel(self)
         newModel.clonedFrom = self.clonedFrom if self.clonedFrom else self
         if newModel.type != "card":
             if name:
@@ -773,27 +917,108 @@ class ViewModel(object):
             m.SetStackManager(stackManager)
 
     def GetAffineTransform(self):
-        # Get the transform that converts local coords to abs coords
-        m = self
-        ancestors = []
+        # Get the transform that converts local coords to abs coords, as a new wx.AffineMatrix2D that the caller can
+        # modify
+        t = self.GetGeometryTransform()
         aff = wx.AffineMatrix2D()
-        while m and m.type not in ["card", "stack"]:
-            ancestors.append(m)
-            m = m.parent
-        for m in reversed(ancestors):
-            pos = m.GetProperty("position")
-            size = m.GetProperty("size")
-            rot = m.GetProperty("rotation")
+        aff.Set(wx.Matrix2D(t.a, t.b, t.c, t.d), wx.Point2DDouble(t.tx, t.ty))
+        return aff
+
+    def GetGeometryTransform(self):
+        # Same as GetAffineTransform(), but as a pure-python collisionGeometry.Transform, usable from any thread.
+        # This is cached, and shared with child objects, so don't modify it.
+        version = self.polygonVersion
+        parent = self.parent
+        cache = self.transformCache
+        if cache and cache[0] == version and cache[1] is parent:
+            return cache[2]
+
+        if self.type in ["card", "stack"]:
+            aff = collisionGeometry.Transform()
+        else:
+            aff = parent.GetGeometryTransform().Copy() if parent else collisionGeometry.Transform()
+            pos = self.properties["position"]
+            size = self.properties["size"]
+            rot = self.properties.get("rotation")
             aff.Translate(pos[0] + size[0]/2, pos[1] + size[1]/2)
             if rot:
                 aff.Rotate(math.radians(-rot))
             aff.Translate(-size[0]/2, -size[1]/2)
+        self.transformCache = (version, parent, aff)
         return aff
 
+    def GetPaintTransform(self, scale, stackHeight):
+        # Returns (isRotated, (a, b, c, d, tx, ty)), the matrix that UiView.PrePaint() applies to its parent's
+        # transform, to draw this object in local coords.  Unrotated objects only need the translation.
+        key = (self.polygonVersion, scale, stackHeight)
+        cache = self.paintTransformCache
+        if cache and cache[0] == key:
+            return cache[1]
+
+        pos = self.properties["position"]
+        rot = self.properties.get("rotation")
+        aff = collisionGeometry.Transform()
+        if rot:
+            cen = self.properties["size"] / 2
+            aff.Translate(scale*(pos[0] + cen[0]), scale*(stackHeight - (pos[1] + cen[1])))
+            aff.Rotate(math.radians(rot))
+            aff.Translate(scale*(-cen[0]), scale*(cen[1] - stackHeight))
+        else:
+            aff.Translate(scale*pos[0], -pos[1]*scale)
+        result = (bool(rot), (aff.a, aff.b, aff.c, aff.d, aff.tx, aff.ty))
+        self.paintTransformCache = (key, result)
+        return result
+
+    def ClearPolygons(self, shapeChanged=False, ancestors=True):
+        # Invalidate the cached polygons of this object, its children, and any groups containing it
+        self.polygonVersion += 1
+        if shapeChanged:
+            self.shapeVersion += 1
+        if self.stackManager:
+            self.stackManager.collisionIndex.MarkDirty(self)
+        if self.childModels:
+            for child in self.childModels:
+                child.ClearPolygons(ancestors=False)
+        if ancestors:
+            m = self.parent
+            while m and m.type == "group":
+                m.polygonVersion += 1
+                if m.stackManager:
+                    m.stackManager.collisionIndex.MarkDirty(m)
+                m = m.parent
+
+    def GetPolygons(self):
+        # Returns this object's outline as a list of collisionGeometry.ConvexPolygons in absolute/card coords
+        version = self.polygonVersion
+        cache = self.polygonCache
+        if cache and cache[0] == version:
+            return cache[1]
+        polys = self.MakePolygons()
+        self.polygonCache = (version, polys)
+        return polys
+
+    def MakePolygons(self):
+        aff = self.GetGeometryTransform()
+        return [collisionGeometry.ConvexPolygon(aff.TransformPoints(p)) for p in self.GetLocalPolygons()]
+
+    def GetLocalPolygons(self):
+        # Returns this object's outline as a list of convex point lists, in local coords
+        version = self.shapeVersion
+        cache = self.localPolygonCache
+        if cache and cache[0] == version:
+            return cache[1]
+        pieces = self.MakeLocalPolygons()
+        self.localPolygonCache = (version, pieces)
+        return pieces
+
+    def MakeLocalPolygons(self):
+        s = self.properties["size"]
+        return [collisionGeometry.RectPoints(0, 0, s[0], s[1])]
+
     def RotatedPoints(self, points, aff=None):
         # convert points in the local system to abs
         if aff is None:
-            aff = self.GetAffineTransform()
+            return [wx.RealPoint(*p) for p in self.GetGeometryTransform().TransformPoints(points)]
         return [wx.RealPoint(*aff.TransformPoint(*p)) for p in points]
 
     def RotatedRectPoints(self, rect, aff=None):
@@ -832,7 +1057,7 @@ class ViewModel(object):
         parent = self.parent
         pos = self.GetProperty("position")
         if self.parent and (self.parent.type != "card" or self.GetProperty("rotation")):
-            aff = parent.GetAffineTransform()
+            aff = parent.GetGeometryTransform()
             pos = aff.TransformPoint(*pos)
         return wx.RealPoint(*pos)
 
@@ -849,7 +1074,7 @@ class ViewModel(object):
         if self.parent and self.parent.type == "card" and not self.GetProperty("rotation"):
             pos = self.GetProperty("position")
             return pos + tuple(s/2)
-        aff = self.GetAffineTransform()
+        aff = self.GetGeometryTransform()
         p = wx.RealPoint(*aff.TransformPoint(int(s[0]/2), int(s[1]/2)))
         return p
 
@@ -884,9 +1109,18 @@ class ViewModel(object):
         return wx.Rect(*[int(x) for x in p], *[int(x) for x in s])
 
     def GetAbsoluteFrame(self):
-        if self.parent and self.parent.type == "card" and not self.GetProperty("rotation"):
-            return self.GetFrame()
-        return self.RotatedRect(wx.Rect(wx.Point(0,0), self.properties["size"]))
+        version = self.polygonVersion
+        parent = self.parent
+        cache = self.absFrameCache
+        if cache and cache[0] == version and cache[1] is parent:
+            return wx.Rect(*cache[2])
+
+        if parent and parent.type == "card" and not self.GetProperty("rotation"):
+            f = self.GetFrame()
+        else:
+            f = self.RotatedRect(wx.Rect(wx.Point(0,0), self.properties["size"]))
+        self.absFrameCache = (version, parent, tuple(f.Get()))
+        return f
 
     def SetFrame(self, rect):
         self.SetProperty("position", rect.Position)
@@ -917,6 +1151,7 @@ class ViewModel(object):
     def SetData(self, data):
         for k, v in data["handlers"].items():
             self.handlers[k] = v
+        self.compiledHandlers = None
         for k, v in data["properties"].items():
             if k in self.propertyTypes:
                 if self.propertyTypes[k] == "point":
@@ -931,6 +1166,7 @@ class ViewModel(object):
     def SetFromModel(self, model):
         for k, v in model.handlers.items():
             self.handlers[k] = v
+        self.compiledHandlers = None
         for k, v in model.properties.items():
             if self.propertyTypes[k] == "point":
                 self.SetProperty(k, wx.Point(tuple(int(x) for x in v)), notify=False)
@@ -941,10 +1177,38 @@ class ViewModel(object):
             else:
                 self.SetProperty(k, v, notify=False)
 
+    def ResetFromModel(self, model):
+        # Make this model into a copy of model, which has the same type, without the GetData() and SetData() round
+        # trip.  Like GetData(), this leaves out speed and is_visible.  Used by clone(), for new and recycled objects.
+        self.handlers = model.handlers.Copy()
+        # Same code, so reuse already-compiled handlers
+        self.compiledHandlers = model.lazyCompiledHandlers.copy() if model.lazyCompiledHandlers else None
+        props = self.properties
+        for k, v in model.properties.items():
+            propType = self.propertyTypes.get(k)
+            if v is None:
+                pass
+            elif propType == "point":
+                v = wx.Point(v[0], v[1])
+            elif propType == "floatpoint":
+                v = wx.RealPoint(v[0], v[1])
+            elif propType == "size":
+                v = wx.Size(v[0], v[1])
+            elif propType == "dict":
+                v = sanitizer.SanitizeDict(v, [])
+            elif propType == "list":
+                v = list(v)
+            props[k] = v
+        props["speed"] = wx.Point(0,0)
+        props["is_visible"] = True
+        self.changeCount += 1
+        self.isDirty = True
+        self.ClearPolygons(True)
+
     # Custom property order and mask for the inspector
     def PropertyKeys(self):
         if self.parent and self.parent.type == 'group':
-            keys = self.propertyKeys.copy()
+            keys = list(self.propertyKeys)
             keys.remove('position')
             keys.remove('size')
             if 'rotation' in keys:
@@ -991,12 +1255,64 @@ class ViewModel(object):
     def GetChildModelByName(self, name):
         if self.properties["name"] == name:
             return self
+        # Search depth-first, in order, so an object inside an earlier group beats a later sibling with the same name.
+        # The index finds the first direct child with this name, so only groups before it need searching.
+        found = self.GetChildByName(name)
         for child in self.childModels:
-            result = child.GetChildModelByName(name)
-            if result:
-                return result
+            if child is found:
+                return found
+            if child.childModels:
+                result = child.GetChildModelByName(name)
+                if result:
+                    return result
         return None
 
+    def GetChildByName(self, name):
+        # Returns the direct child with this name, or None.  Uses an index of childModels by name, which gets built
+        # when first needed, and then kept up to date as children are added, removed, and renamed.  If siblings share
+        # a name, the first one wins, like a scan of childModels would.
+        index = self.childIndex
+        if index is None:
+            index = {}
+            for child in self.childModels:
+                index.setdefault(child.properties["name"], child)
+            self.childIndex = index
+        return index.get(name)
+
+    def InvalidateChildIndex(self):
+        self.childIndex = None
+
+    def ChildAdded(self, model):
+        # Call after adding model to childModels
+        index = self.childIndex
+        if index is not None:
+            name = model.properties["name"]
+            if name in index:
+                self.childIndex = None  # Rebuild, to find whichever of the same-named children comes first
+            else:
+                index[name] = model
+
+    def ChildRemoved(self, model):
+        # Call after removing model from childModels
+        index = self.childIndex
+        if index is not None:
+            name = model.properties["name"]
+            if index.get(name) is model:
+                del index[name]
+            if len(index) != len(self.childModels):
+                self.childIndex = None  # Some children shared a name, so another one might need to be found now
+
+    def ChildRenamed(self, model, oldName):
+        index = self.childIndex
+        if index is not None:
+            if index.get(oldName) is model:
+                del index[oldName]
+            name = model.properties["name"]
+            if name in index or len(index) + 1 != len(self.childModels):
+                self.childIndex = None
+            else:
+                index[name] = model
+
     def GetCard(self):
         if self.type == 'stack':
             return None
@@ -1025,6 +1341,7 @@ class ViewModel(object):
             return
         self.parent.childModels.remove(self)
         self.parent.childModels.insert(index, self)
+        self.parent.InvalidateChildIndex()
         if self.GetCard() == self.stackManager.uiCard.model:
             ui = self.stackManager.GetUiViewByModel(self)
             if ui.view:
@@ -1032,7 +1349,7 @@ class ViewModel(object):
             else:
                 ui.parent.uiViews.remove(ui)
                 ui.parent.uiViews.insert(index, ui)
-                self.stackManager.view.Refresh()
+                ui.RefreshArea()
 
     def OrderMoveBy(self, delta):
         index = self.parent.childModels.index(self) + delta
@@ -1050,22 +1367,23 @@ class ViewModel(object):
 
     def Notify(self, key):
         if self.stackManager:
-            self.stackManager.OnPropertyChanged(self, key)
+            self.stackManager.propertyChanges.Add(self, key)
 
     def SetProperty(self, key, value, notify=True):
         if self.didSetDown: return
         if self.stackManager and self.stackManager.isEditing and key in ["speed"]: return
-        if key in self.propertyTypes and self.propertyTypes[key] == "point" and not isinstance(value, wx.Point):
+        propType = self.propertyTypes.get(key)
+        if propType == "point" and not isinstance(value, wx.Point):
             value = wx.Point(tuple(int(x) for x in value))
-        elif key in self.propertyTypes and self.propertyTypes[key] == "floatpoint" and not isinstance(value, wx.RealPoint):
+        elif propType == "floatpoint" and not isinstance(value, wx.RealPoint):
             value = wx.RealPoint(value[0], value[1])
-        elif key in self.propertyTypes and self.propertyTypes[key] == "size" and not isinstance(value, wx.Point):
+        elif propType == "size" and not isinstance(value, wx.Point):
             value = wx.Size(tuple(int(x) for x in value))
-        elif key in self.propertyTypes and self.propertyTypes[key] == "choice" and value not in self.GetPropertyChoices(key):
+        elif propType == "choice" and value not in self.GetPropertyChoices(key):
             return
-        elif key in self.propertyTypes and self.propertyTypes[key] == "color" and isinstance(value, wx.Colour):
+        elif propType == "color" and isinstance(value, wx.Colour):
             value = value.GetAsString(flags=wx.C2S_HTML_SYNTAX)
-        elif key in self.propertyTypes and self.propertyTypes[key] == "uint" and value < 0:
+        elif propType == "uint" and value < 0:
             value = 0
 
         if key == "name":
@@ -1084,7 +1402,20 @@ class ViewModel(object):
             value = value % 360
 
         if self.properties[key] != value:
+            oldValue = self.properties[key]
             self.properties[key] = value
+            if key == "name" and self.parent:
+                self.parent.ChildRenamed(self, oldValue)
+                if self.type != "card":
+                    card = self.GetCard()
+                    runner = card.GetRunnerIfShown() if card and card.type == "card" else None
+                    if runner:
+                        runner.UpdateCardVars(renamed=[(oldValue, self)])
+            if key in self.geometryKeys:
+                self.ClearPolygons(key in self.shapeKeys)
+            elif key == "speed" and self.stackManager and tuple(value) != (0, 0):
+                self.stackManager.animScheduler.Activate(self)
+            self.changeCount += 1
             if notify:
                 self.Notify(key)
             self.isDirty = True
@@ -1131,6 +1462,7 @@ class ViewModel(object):
     def SetHandler(self, key, value):
         if self.handlers[key] != value:
             self.handlers[key] = value
+            self.compiledHandlers.pop(key, None)
             self.isDirty = True
 
     def SetBounceModels(self, models):
@@ -1138,7 +1470,13 @@ class ViewModel(object):
         for m in models:
             if isinstance(m, ViewModel):
                 objs[m] = [None, None]
-        self.bounceObjs = objs
+        self.bounceObjs = objs if objs else self.noBounceObjs
+        self.bounceAlwaysCheck = set(objs) if objs else self.noAlwaysCheck
+        if self.stackManager:
+            # Index these objects, so the collision check can skip any that aren't nearby
+            self.stackManager.collisionIndex.Track(self)
+            for m in objs:
+                self.stackManager.collisionIndex.Track(m)
 
     def AddAnimation(self, key, duration, onUpdate, onStart=None, onFinish=None, onCancel=None):
         # On Runner thread
@@ -1150,6 +1488,8 @@ class ViewModel(object):
                     "onCancel": onCancel
                     }
         with self.animLock:
+            if self.animations is self.noAnimations:
+                self.animations = {}
             if key not in self.animations:
                 self.animations[key] = [animDict]
                 self.StartAnimation(key)
@@ -1164,6 +1504,8 @@ class ViewModel(object):
                 animDict["startTime"] = time()
                 if animDict["onStart"]:
                     animDict["onStart"](animDict)
+                if self.stackManager:
+                    self.stackManager.animScheduler.AnimationStarted(self, key, animDict)
 
     def FinishAnimation(self, key):
         # On Main thread
@@ -1197,7 +1539,7 @@ class ViewModel(object):
                 animDict = animList[0]
                 if "startTime" in animDict and animDict["onCancel"]:
                     animDict["onCancel"](animDict)
-            self.animations = {}
+            self.animations = self.noAnimations
 
     def DeduplicateName(self, name, existingNames):
         existingNames.extend(self.reservedNames) # disallow globals
@@ -1247,10 +1589,10 @@ class ViewProxy(object):
 
     def __getattr__(self, item):
         model = self._model
-        if model:
-            for m in model.childModels:
-                if m.properties["name"] == item:
-                    return m.GetProxy()
+        if model and model.childModels:
+            m = model.GetChildByName(item)
+            if m:
+                return m.GetProxy()
         return super().__getattribute__(item)
 
     def send_message(self, message):
@@ -1268,8 +1610,11 @@ class ViewProxy(object):
         if not model: return None
 
         if model.type != "card":
-            # update the model immediately on the runner thread
-            newModel = model.CreateCopy(name)
+            sm = model.stackManager
+            # update the model immediately on the runner thread, reusing a deleted clone of the same object if we can
+            (newModel, newUi) = sm.spritePool.Take(model, name)
+            if not newModel:
+                newModel = model.CreateCopy(name)
             newModel.SetProperty("speed", model.GetProperty("speed"), notify=False)
             newModel.lastOnPeriodicTime = time()
             if not self.is_visible:
@@ -1287,9 +1632,14 @@ class ViewProxy(object):
 
             @RunOnMainAsync
             def func():
-                if not newModel.didSetDown:
-                    # add the view on the main thread
-                    newModel.stackManager.AddUiViewsFromModels([newModel], False)
+                # add the view on the main thread
+                if newUi:
+                    if not newModel.didSetDown and newModel.parent is sm.uiCard.model:
+                        sm.AddRecycledUiView(newUi)
+                    else:
+                        newUi.SetDown()
+                elif not newModel.didSetDown:
+                    sm.AddUiViewsFromModels([newModel], False)
             func()
         else:
             @RunOnMainSync
@@ -1328,8 +1678,8 @@ class ViewProxy(object):
         if model.type != "card":
             @RunOnMainAsync
             def func():
-                # update views on the main thread
-                sm.RemoveUiViewByModel(model)
+                # update views on the main thread, and offer them to the SpritePool if this is a clone
+                sm.RemoveUiViewByModel(model, recycle=model.clonedFrom is not None)
             func()
         else:
             @RunOnMainSync
@@ -1555,7 +1905,7 @@ class ViewProxy(object):
         if eventName not in model.handlers:
             raise TypeError(f"set_code_for_event(): this object has no event called '{eventName}'")
 
-        model.handlers[eventName] = code
+        model.SetHandler(eventName, code)
 
     def set_bounce_objects(self, objects):
         if not isinstance(objects, (list, tuple)):
@@ -1577,17 +1927,10 @@ class ViewProxy(object):
             raise ValueError("is_touching_point(): point needs to be a point or a list of two numbers")
 
         model = self._model
-        if not model: return False
-
-        @RunOnMainSync
-        def f():
-            if model.didSetDown: return False
-            s = model.stackManager.GetUiViewByModel(model)
-            if not s:
-                return False
-            sreg = s.GetHitRegion()
-            return sreg.Contains(wx.Point(tuple(int(x) for x in point))) == wx.InRegion
-        return f()
+        if not model or model.didSetDown: return False
+        if not model.stackManager.GetUiViewByModel(model):
+            return False
+        return collisionGeometry.PolygonsContainPoint(model.GetPolygons(), point)
 
     def is_touching(self, obj):
         if not isinstance(obj, ViewProxy):
@@ -1596,19 +1939,10 @@ class ViewProxy(object):
         model = self._model
         oModel = obj._model
         if not model or not oModel: return False
-
-        @RunOnMainSync
-        def f():
-            if model.didSetDown: return False
-            s = model.stackManager.GetUiViewByModel(model)
-            o = model.stackManager.GetUiViewByModel(oModel)
-            if not s or not o:
-                return False
-            sreg = wx.Region(s.GetHitRegion())
-            oreg = o.GetHitRegion()
-            sreg.Intersect(oreg)
-            return not sreg.IsEmpty()
-        return f()
+        if model.didSetDown or oModel.didSetDown: return False
+        if not model.stackManager.GetUiViewByModel(model) or not model.stackManager.GetUiViewByModel(oModel):
+            return False
+        return collisionGeometry.PolygonsIntersect(model.GetPolygons(), oModel.GetPolygons())
 
     def is_touching_edge(self, obj, skipIsTouchingCheck=False):
         if not isinstance(obj, ViewProxy):
@@ -1617,66 +1951,46 @@ class ViewProxy(object):
         model = self._model
         oModel = obj._model
         if not model or not oModel: return []
-        ui = model.stackManager.GetUiViewByModel(model)
-        oUi = model.stackManager.GetUiViewByModel(oModel)
-
-        @RunOnMainSync
-        def f():
-            if model.didSetDown or oModel.didSetDown: return []
-
-            if not skipIsTouchingCheck and not self.is_touching(obj):
-                return []
-
-            def intersectTest(r, edge):
-                testReg = wx.Region(r)
-                testReg.Intersect(edge)
-                return not testReg.IsEmpty()
-
-            reg = ui.GetHitRegion()
-            oRot = oModel.GetProperty("rotation")
-            if oRot is None: oRot = 0
-
-            rect = oModel.GetFrame() # other frame in card coords
-            cornerSetback = 4
-            # Pull edge lines away from the corners, so we don't always hit a corner when 2 objects touch
-            rects = [wx.Rect(rect.TopLeft+(cornerSetback,0), rect.TopRight+(-cornerSetback,1)),
-                      wx.Rect(rect.TopRight+(-1,cornerSetback), rect.BottomRight+(0,-cornerSetback)),
-                      wx.Rect(rect.BottomLeft+(cornerSetback,-1), rect.BottomRight+(-cornerSetback,0)),
-                      wx.Rect(rect.TopLeft+(0,cornerSetback), rect.BottomLeft+(1,-cornerSetback))]
-
-            if oRot == 0:
-                bottom = rects[0]
-                right = rects[1]
-                top = rects[2]
-                left = rects[3]
-            else:
-                for r in rects:
-                    r.Offset(wx.Point(0,0)-rect.TopLeft)
-                bottom = oUi.MakeRegionFromLocalRect(rects[0])
-                right = oUi.MakeRegionFromLocalRect(rects[1])
-                top = oUi.MakeRegionFromLocalRect(rects[2])
-                left = oUi.MakeRegionFromLocalRect(rects[3])
-
-            def RotEdge(rot):
-                # Rotate reported edge hits according to other object's rotation
-                edgesMap = [["Top"], ["Top", "Right"], ["Right"], ["Bottom", "Right"],
-                            ["Bottom"], ["Bottom", "Left"], ["Left"], ["Top", "Left"]]
-                i = int(((rot+22.5)%360)/45)
-                return edgesMap[i]
-
-            edges = set()
-            if intersectTest(reg, top): [edges.add(e) for e in RotEdge(oRot)]
-            if intersectTest(reg, bottom): [edges.add(e) for e in RotEdge(oRot+180)]
-            if intersectTest(reg, left): [edges.add(e) for e in RotEdge(oRot+270)]
-            if intersectTest(reg, right): [edges.add(e) for e in RotEdge(oRot+90)]
-            if len(edges) == 3 and "Top" in edges and "Bottom" in edges:
-                edges.remove("Top")
-                edges.remove("Bottom")
-            if len(edges) == 3 and "Left" in edges and "Right" in edges:
-                edges.remove("Left")
-                edges.remove("Right")
-            return edges
-        return f()
+        if model.didSetDown or oModel.didSetDown: return []
+
+        if not skipIsTouchingCheck and not self.is_touching(obj):
+            return []
+
+        polys = model.GetPolygons()
+        oRot = oModel.properties.get("rotation")
+        if oRot is None: oRot = 0
+
+        s = oModel.properties["size"] # other frame in its local coords
+        w, h = s[0], s[1]
+        cornerSetback = 6
+        # Pull edge lines away from the corners, so we don't always hit a corner when 2 objects touch
+        rects = [(cornerSetback, 0, w-2*cornerSetback, 2),
+                 (w-2, cornerSetback, 2, h-2*cornerSetback),
+                 (cornerSetback, h-2, w-2*cornerSetback, 2),
+                 (0, cornerSetback, 2, h-2*cornerSetback)]
+        aff = oModel.GetGeometryTransform()
+        bottom, right, top, left = [[collisionGeometry.ConvexPolygon(aff.TransformPoints(collisionGeometry.RectPoints(*r)))]
+                                    for r in rects]
+
+        def RotEdge(rot):
+            # Rotate reported edge hits according to other object's rotation
+            edgesMap = [["Top"], ["Top", "Right"], ["Right"], ["Bottom", "Right"],
+                        ["Bottom"], ["Bottom", "Left"], ["Left"], ["Top", "Left"]]
+            i = int(((rot+22.5)%360)/45)
+            return edgesMap[i]
+
+        edges = set()
+        if collisionGeometry.PolygonsIntersect(polys, top): [edges.add(e) for e in RotEdge(oRot)]
+        if collisionGeometry.PolygonsIntersect(polys, bottom): [edges.add(e) for e in RotEdge(oRot+180)]
+        if collisionGeometry.PolygonsIntersect(polys, left): [edges.add(e) for e in RotEdge(oRot+270)]
+        if collisionGeometry.PolygonsIntersect(polys, right): [edges.add(e) for e in RotEdge(oRot+90)]
+        if len(edges) == 3 and "Top" in edges and "Bottom" in edges:
+            edges.remove("Top")
+            edges.remove("Bottom")
+        if len(edges) == 3 and "Left" in edges and "Right" in edges:
+            edges.remove("Left")
+            edges.remove("Right")
+        return edges
 
     def animate_position(self, duration, end_position, on_finished=None, *args, **kwargs):
         if not isinstance(duration, (int, float)):
@@ -70,7 +70,7 @@ class UiWebView(UiView):
     def PaintBoundingBox(self, gc, color='Gray'):
         if self.stackManager.isEditing:
             gc.SetBrush(wx.TRANSPARENT_BRUSH)
-            gc.SetPen(wx.Pen(color, 1, wx.PENSTYLE_DOT))
+            gc.SetPen(self.stackManager.gdiCache.GetPen(color, 1, wx.PENSTYLE_DOT))
 
             pos = wx.Point(0,0)-tuple(int(x) for x in self.model.GetProperty("position"))
             f = self.model.GetFrame()
@@ -129,29 +129,27 @@ class WebViewModel(ViewModel):
     This is the model for a WebView object.
     """
 
+    __slots__ = ()
+
+    # Add custom handlers to the top of the list
+    handlerKeys = ("on_setup", "on_done_loading", "on_card_stock_link") + ViewModel.handlerKeys[1:]
+    # Custom property order and mask for the inspector
+    propertyKeys = ["name", "URL", "allowed_hosts", "position", "size"]
+    propertyTypes = {**ViewModel.propertyTypes,
+                     "URL": "string",
+                     "HTML": "string",
+                     "allowed_hosts": "list"}
+
     def __init__(self, stackManager):
         super().__init__(stackManager)
         self.type = "webview"
         self.proxyClass = WebView
-
-        # Add custom handlers to the top of the list
-        handlers = {"on_setup": "", "on_done_loading": "", "on_card_stock_link": ""}
-        for k,v in self.handlers.items():
-            if "Mouse" not in k:
-                handlers[k] = v
-        self.handlers = handlers
         self.initialEditHandler = "on_done_loading"
 
         self.properties["name"] = "webview_1"
         self.properties["URL"] = ""
         self.properties["HTML"] = ""
         self.properties["allowed_hosts"] = []
-        self.propertyTypes["URL"] = "string"
-        self.propertyTypes["HTML"] = "string"
-        self.propertyTypes["allowed_hosts"] = "list"
-
-        # Custom property order and mask for the inspector
-        self.propertyKeys = ["name", "URL", "allowed_hosts", "position", "size"]
 
     def SetProperty(self, key, value, notify=True):
         if key == "URL":
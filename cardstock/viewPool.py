@@ -0,0 +1,118 @@
+# This file is part of CardStock.
+#     https://github.com/benjie-git/CardStock
+#
+# Copyright Ben Levitt 2020-2023
+#
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.  If a copy
+# of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections import OrderedDict
+
+
+class ViewPool(object):
+    """
+    Cuts down on native widget churn when changing cards while running a stack.  This keeps:
+     - Free lists of hidden native widgets, keyed by a kind that covers everything that's fixed when the widget is
+       created (like a text field's multiline flag and alignment), so a new UiView can rebind one instead of
+       creating a new widget.
+     - The UiView trees of the last MAX_CARDS cards shown, so going back to one of them just re-attaches its views.
+       A retained tree only gets reused if none of the card's objects have changed, been added, or been removed since.
+       Cards with web views aren't retained, so their pages don't keep playing audio or video after leaving the card.
+    """
+
+    MAX_PER_KIND = 16
+    MAX_CARDS = 3
+
+    def __init__(self, stackManager):
+        super().__init__()
+        self.stackManager = stackManager
+        self.freeViews = {}          # kind -> [widget, ...]
+        self.cards = OrderedDict()   # cardModel -> (uiViews, signature)
+        self.numReused = 0
+        self.numCreated = 0
+        self.numCardsReused = 0
+
+    def TakeView(self, kind):
+        # On Main thread.  Returns a free widget of this kind, or None if the caller needs to create one.
+        views = self.freeViews.get(kind)
+        while views:
+            view = views.pop()
+            if view:  # Skip any widgets that were destroyed along with their parent
+                self.numReused += 1
+                return view
+        self.numCreated += 1
+        return None
+
+    def GiveView(self, kind, view):
+        # On Main thread.  Keep view for reuse, already unbound from its old UiView.  Returns False if the pool for
+        # this kind is full, and the caller should destroy it.
+        views = self.freeViews.setdefault(kind, [])
+        if len(views) >= self.MAX_PER_KIND:
+            return False
+        view.Hide()
+        views.append(view)
+        return True
+
+    @staticmethod
+    def GetSignature(models):
+        return [(m, m.changeCount) for m in models]
+
+    def RetainCard(self, cardModel, uiViews):
+        # Hold onto the top-level UiViews of a card that's being hidden
+        allUiViews = []
+        for ui in uiViews:
+            allUiViews.append(ui)
+            if ui.model.type == "group":
+                ui.GetAllUiViews(allUiViews)
+        self.DropCard(cardModel)
+        if any(ui.model.type == "webview" for ui in allUiViews):
+            self.SetDownUiViews(uiViews)
+            return
+        for ui in allUiViews:
+            ui.Detach()
+        self.cards[cardModel] = (uiViews, self.GetSignature(ui.model for ui in allUiViews))
+        while len(self.cards) > self.MAX_CARDS:
+            (oldCard, (oldUiViews, signature)) = self.cards.popitem(last=False)
+            self.SetDownUiViews(oldUiViews)
+
+    def TakeCard(self, cardModel):
+        # Returns the retained top-level UiViews for cardModel, if it has any and they're still up to date
+        entry = self.cards.pop(cardModel, None)
+        if not entry:
+            return None
+        (uiViews, signature) = entry
+        if signature != self.GetSignature(cardModel.GetAllChildModels()):
+            self.SetDownUiViews(uiViews)
+            return None
+        self.numCardsReused += 1
+        return uiViews
+
+    def DropCard(self, cardModel):
+        entry = self.cards.pop(cardModel, None)
+        if entry:
+            self.SetDownUiViews(entry[0])
+
+    def ClearCards(self):
+        for (uiViews, signature) in self.cards.values():
+            self.SetDownUiViews(uiViews)
+        self.cards = OrderedDict()
+
+    @staticmethod
+    def SetDownUiViews(uiViews):
+        for ui in uiViews:
+            ui.SetDown()
+
+    def Clear(self):
+        self.ClearCards()
+        for views in self.freeViews.values():
+            for view in views:
+                if view:
+                    view.Destroy()
+        self.freeViews = {}
+
+    def GetStats(self):
+        return {"free_views": sum(len(v) for v in self.freeViews.values()),
+                "views_reused": self.numReused,
+                "views_created": self.numCreated,
+                "retained_cards": len(self.cards),
+                "cards_reused": self.numCardsReused}
@@ -1318,6 +1318,19 @@ class StackModel(ViewModel):
             migrations.MigrateModelFromFormatVersion(formatVer, self)
 
 
+class PropertyBatch(object):
+    """
+    The context manager returned by stack.batch_update().  The web viewer draws each change as it's made, so there's
+    nothing to hold back, but stacks using batch_update() still run here.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
 class Stack(ViewProxy):
     @property
     def num_cards(self):
@@ -1343,6 +1356,9 @@ class Stack(ViewProxy):
     def get_setup_value(self):
         return self._model.stackManager.runner.GetStackSetupValue()
 
+    def batch_update(self):
+        return PropertyBatch()
+
     def add_card(self, name="card", atNumber=0):
         if not isinstance(name, str):
             raise TypeError("add_card(): name is not a string")
@@ -23,6 +23,36 @@ import types
 import math
 
 
+class Timer(object):
+    """
+    A Timer object is returned from run_after_delay(), and lets stack code cancel the delayed call before it runs.
+    """
+
+    def __init__(self, runner):
+        super().__init__()
+        self._runner = runner
+        self._timeoutId = None
+        self._state = "pending"  # pending, fired, or cancelled
+
+    def __repr__(self):
+        return f"<Timer:{self._state}>"
+
+    def cancel(self):
+        """ Stop this timer's function from running.  Returns True if it was still waiting to run. """
+        if self._state != "pending":
+            return False
+        self._state = "cancelled"
+        if self._timeoutId is not None:
+            timer.clear_timeout(self._timeoutId)
+        if self in self._runner.timers:
+            self._runner.timers.remove(self)
+        return True
+
+    @property
+    def is_pending(self):
+        return self._state == "pending"
+
+
 class Runner():
     """
     The Runner object runs all of the stack's user-written event handlers.  It keeps track of user variables, so that they
@@ -156,8 +186,8 @@ class Runner():
             self.cardVarKeys.remove(name)
 
     def StopTimers(self):
-        for t in self.timers:
-            timer.clear_timeout(t)
+        for t in list(self.timers):
+            t.cancel()
         self.timers = []
 
     def DoReturnFromStack(self, stackReturnVal):
@@ -710,13 +740,21 @@ class Runner():
         except ValueError:
             raise TypeError("run_after_delay(): duration must be a number")
 
+        handle = Timer(self)
         if duration > 0.010:
             def onTimer():
+                if handle._state != "pending":
+                    return
+                handle._state = "fired"
+                if handle in self.timers:
+                    self.timers.remove(handle)
                 func(*args, **kwargs)
-            t = timer.set_timeout(onTimer, int(duration*1000))
-            self.timers.append(t)
+            handle._timeoutId = timer.set_timeout(onTimer, int(duration*1000))
+            self.timers.append(handle)
         else:
+            handle._state = "fired"
             func(*args, **kwargs)
+        return handle
 
     def quit(self):
         pass